@@ -1,3 +1,4 @@
 from .basler_camera import BaslerCamera
 from .basler_camera_array import BaslerCameraArray
 from .helper import BaslerCameraManager
+from .process_array import ProcessCameraArray
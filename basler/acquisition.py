@@ -0,0 +1,116 @@
+import math
+import pypylon.pylon
+from .backend import is_writable
+from .stream import GRAB_STRATEGIES, get_grab_strategy
+
+
+ACQUISITION_DEFAULTS = {
+    'max_num_buffer': None,
+    'output_queue_size': None,
+    'max_buffer_size': None,
+    'strategy': 'OneByOne',
+    'timeout': 2000,
+    'timeout_handling': 'raise', }
+"""The acquisition settings of :func:`~basler.basler_camera.BaslerCamera.set_acquisition_settings` and their
+defaults (``None`` keeps pylon's value):
+
+* ``max_num_buffer``: the number of grab buffers of each camera (pylon's ``MaxNumBuffer``, 10 by default); frames
+  are lost when the consumer falls behind by more than that, see :func:`size_buffer_pool`
+* ``output_queue_size``: the number of frames kept by the ``'LatestImages'`` strategy (``OutputQueueSize``)
+* ``max_buffer_size``: the size of each grab buffer in bytes (the stream grabber's ``MaxBufferSize``), if the
+  stream grabber has that parameter
+* ``strategy``: the grab strategy of ``grab_many``, ``grab_n_save``, the streams and the callbacks when they are
+  not given one; see :func:`~basler.stream.get_grab_strategy`
+* ``timeout``: the time to wait for each frame, in milliseconds
+* ``timeout_handling``: ``'raise'`` to raise a :class:`~basler.basler_camera.GrabTimeoutError` when no frame
+  arrives in time, or ``'return'`` to end the acquisition with the frames captured so far
+"""
+
+TIMEOUT_HANDLING = {
+    'raise': pypylon.pylon.TimeoutHandling_ThrowException,
+    'return': pypylon.pylon.TimeoutHandling_Return, }
+
+
+def check_acquisition_settings(settings: dict, current: dict = None) -> dict:
+    """return ``current`` (:data:`ACQUISITION_DEFAULTS` by default) updated with ``settings``, after checking
+    them; raise ``ValueError`` for unknown or invalid settings
+    """
+
+    unknown = [key for key in settings if key not in ACQUISITION_DEFAULTS]
+    if unknown:
+        raise ValueError(f'Unknown acquisition settings {unknown}, expected any of {list(ACQUISITION_DEFAULTS)}')
+    result = dict(ACQUISITION_DEFAULTS if current is None else current)
+    result.update(settings)
+
+    for key in ('max_num_buffer', 'output_queue_size', 'max_buffer_size'):
+        if result[key] is not None and (int(result[key]) != result[key] or result[key] < 1):
+            raise ValueError(f'{key} must be a positive integer, got {result[key]!r}')
+    if result['strategy'] not in GRAB_STRATEGIES:
+        raise ValueError(f"Unknown grab strategy {result['strategy']!r}, expected one of {list(GRAB_STRATEGIES)}")
+    if not result['timeout'] >= 0:
+        raise ValueError(f"timeout must be a non-negative number of milliseconds, got {result['timeout']!r}")
+    if result['timeout_handling'] not in TIMEOUT_HANDLING:
+        raise ValueError(f"Unknown timeout handling {result['timeout_handling']!r}, "
+                         f"expected one of {list(TIMEOUT_HANDLING)}")
+    return result
+
+
+def get_grab_settings(settings: dict, strategy: str = None) -> tuple:
+    """return the pylon grab strategy (``strategy``, or the one of ``settings``), the timeout and the pylon timeout
+    handling of acquisition settings
+    """
+    return (get_grab_strategy(strategy or settings['strategy']), settings['timeout'],
+            TIMEOUT_HANDLING[settings['timeout_handling']])
+
+
+def apply_buffer_settings(cam, settings: dict):
+    """set the buffer settings (``max_num_buffer``, ``output_queue_size``, ``max_buffer_size``) of a pylon camera
+    that is not grabbing
+    """
+
+    if settings['max_num_buffer'] is not None:
+        cam.MaxNumBuffer.SetValue(int(settings['max_num_buffer']))
+    if settings['output_queue_size'] is not None:
+        cam.OutputQueueSize.SetValue(int(settings['output_queue_size']))
+    if settings['max_buffer_size'] is not None:
+        node = cam.GetStreamGrabberNodeMap().GetNode('MaxBufferSize')
+        if node is not None and is_writable(node):
+            node.SetValue(int(settings['max_buffer_size']))
+
+
+def size_buffer_pool(frame_bytes: int, framerate: float, stall_tolerance: float, headroom: int = 2,
+                     memory_limit: int = None) -> dict:
+    """return the size of a buffer pool that lets the consumer stall for ``stall_tolerance`` seconds without
+    losing frames: the camera keeps filling buffers at ``framerate`` while none is returned.
+
+    :param frame_bytes: the size of a frame as sent by the camera, e.g. its ``PayloadSize``
+    :param framerate: the frame rate in Hz
+    :param stall_tolerance: the longest stall of the consumer to absorb, in seconds
+    :param headroom: extra buffers for the frames being transferred and being processed
+    :param memory_limit: if given, the maximum memory of the pool in bytes; a ``ValueError`` is raised if the pool
+        does not fit
+    :return: a dictionary with ``max_num_buffer`` and ``max_buffer_size`` (the acquisition settings), the
+        ``memory`` of the pool in bytes and the ``stall_tolerance`` it actually provides, in seconds
+
+    Example:
+
+    ``pool = size_buffer_pool(2048 * 2048, 90, 0.5)``  # absorb 0.5 s stalls at 90 fps: 47 buffers
+    ``cam.set_acquisition_settings(max_num_buffer=pool['max_num_buffer'])``
+
+    See also :func:`~basler.basler_camera.BaslerCamera.size_buffer_pool`, which reads the frame size and the
+    frame rate from the camera.
+    """
+
+    if frame_bytes <= 0 or framerate <= 0 or stall_tolerance < 0:
+        raise ValueError('frame_bytes and framerate must be positive and stall_tolerance non-negative')
+    num_buffers = math.ceil(framerate * stall_tolerance) + headroom
+    num_buffers = max(num_buffers, 1)
+    memory = num_buffers * frame_bytes
+    if memory_limit is not None and memory > memory_limit:
+        raise ValueError(f'A pool of {num_buffers} buffers of {frame_bytes} bytes needs {memory} bytes, '
+                         f'more than the limit of {memory_limit} bytes; '
+                         f'{max(memory_limit // frame_bytes - headroom, 0) / framerate:.3g} s of stall fit')
+    return {'max_num_buffer': num_buffers,
+            'max_buffer_size': int(frame_bytes),
+            'memory': memory,
+            'stall_tolerance': max(num_buffers - headroom, 0) / framerate}
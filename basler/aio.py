@@ -0,0 +1,203 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from .basler_camera import BaslerCamera
+from .basler_camera_array import BaslerCameraArray
+
+
+_END = object()
+
+
+class _AsyncDevice:
+
+    """
+    The common part of the asyncio façades: every call into the wrapped device runs in a single-thread executor
+    dedicated to that device, so the calls of one device stay in order while several devices progress
+    concurrently and the event loop is never blocked.
+    """
+
+    def __init__(self, device):
+        self._device = device
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=type(device).__name__)
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def call(self, method: str, *args, **kwargs):
+        """call any method of the wrapped device by name in its executor and return the result"""
+        return await self._run(getattr(self._device, method), *args, **kwargs)
+
+    async def connect(self):
+        await self._run(self._device.connect)
+
+    async def disconnect(self):
+        await self._run(self._device.disconnect)
+
+    async def close(self):
+        """disconnect if connected and shut the executor down"""
+        try:
+            await self._run(self._disconnect_if_connected)
+        finally:
+            self._executor.shutdown(wait=False)
+
+    def _disconnect_if_connected(self):
+        try:
+            self._device.disconnect()
+        except NameError:
+            # not connected
+            pass
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def _iterate(self, func, args, kwargs):
+        frames = await self._run(func, *args, **kwargs)
+        try:
+            while True:
+                item = await self._run(next, frames, _END)
+                if item is _END:
+                    return
+                yield item
+        finally:
+            await self._run(frames.close)
+
+    # ----------------------- getter -----------------------------------
+
+    async def get_aoi(self, *args):
+        return await self._run(self._device.get_aoi, *args)
+
+    async def get_exposure_time(self, *args):
+        return await self._run(self._device.get_exposure_time, *args)
+
+    async def get_resulting_framerate(self, *args):
+        return await self._run(self._device.get_resulting_framerate, *args)
+
+    async def get_capabilities(self, *args):
+        return await self._run(self._device.get_capabilities, *args)
+
+    # ----------------------- setter -----------------------------------
+
+    async def set_converter(self, *args, **kwargs):
+        await self._run(self._device.set_converter, *args, **kwargs)
+
+    async def set_pixel_format(self, *args):
+        await self._run(self._device.set_pixel_format, *args)
+
+    async def set_acquisition_framerate(self, *args):
+        await self._run(self._device.set_acquisition_framerate, *args)
+
+    async def set_exposure_time(self, *args):
+        await self._run(self._device.set_exposure_time, *args)
+
+    async def set_aoi(self, *args):
+        await self._run(self._device.set_aoi, *args)
+
+    async def configure(self, settings):
+        return await self._run(self._device.configure, settings)
+
+    # --------------------------- grabbing -----------------------------
+
+    async def grab_one(self):
+        return await self._run(self._device.grab_one)
+
+    async def grab_many(self, *args, **kwargs):
+        return await self._run(self._device.grab_many, *args, **kwargs)
+
+    async def grab_reduce(self, *args, **kwargs):
+        return await self._run(self._device.grab_reduce, *args, **kwargs)
+
+    async def grab_to_memmap(self, *args, **kwargs):
+        return await self._run(self._device.grab_to_memmap, *args, **kwargs)
+
+    async def grab_n_save(self, *args, **kwargs):
+        return await self._run(self._device.grab_n_save, *args, **kwargs)
+
+    def stream(self, *args, **kwargs):
+        """return an async iterator over the frames of the ``stream`` method of the wrapped device, which takes
+        the same arguments. Each frame is retrieved in the executor. Breaking out of the ``async for`` loop stops
+        grabbing once the iterator is closed, e.g. with ``contextlib.aclosing``.
+        """
+        return self._iterate(self._device.stream, args, kwargs)
+
+
+class AsyncBaslerCamera(_AsyncDevice):
+
+    """
+    An asyncio façade of :class:`~basler.basler_camera.BaslerCamera`. The methods take the same arguments as the
+    methods of the same name of BaslerCamera, and are awaitable. Each instance has its own executor thread, so
+    several cameras can be driven concurrently from one event loop, e.g. with ``asyncio.gather``.
+
+    Example:
+
+    ``async with AsyncBaslerCamera(serial_number='21939024') as cam:``
+    ``    frames = await cam.grab_many(10)``
+    """
+
+    def __init__(self, ip: str = None, serial_number: str = None, camera: BaslerCamera = None):
+        """
+        :param ip: IP address
+        :param serial_number: serial number
+        :param camera: an existing camera (e.g. of a subclass of BaslerCamera) to wrap instead
+        """
+        super().__init__(camera if camera is not None else BaslerCamera(ip, serial_number))
+
+    @property
+    def camera(self) -> BaslerCamera:
+        """the wrapped camera; do not call it while an awaitable method is running"""
+        return self._device
+
+    async def get_camera_info(self):
+        return await self._run(self._device.get_camera_info)
+
+    async def get_dynamic_range(self):
+        return await self._run(self._device.get_dynamic_range)
+
+    async def get_frame_dtype(self):
+        return await self._run(self._device.get_frame_dtype)
+
+    async def get_snapshot(self):
+        return await self._run(self._device.get_snapshot)
+
+    async def apply_snapshot(self, snapshot):
+        return await self._run(self._device.apply_snapshot, snapshot)
+
+
+class AsyncBaslerCameraArray(_AsyncDevice):
+
+    """
+    An asyncio façade of :class:`~basler.basler_camera_array.BaslerCameraArray`. The methods take the same
+    arguments as the methods of the same name of BaslerCameraArray, and are awaitable. All the calls of the array
+    run in its own executor thread, in order, since the cameras share one pylon camera array.
+    """
+
+    def __init__(self, devices_info: list = None, camera_array: BaslerCameraArray = None):
+        """
+        :param devices_info: a list of camera device info, as for BaslerCameraArray
+        :param camera_array: an existing camera array to wrap instead
+        """
+        super().__init__(camera_array if camera_array is not None else BaslerCameraArray(devices_info))
+
+    @property
+    def camera_array(self) -> BaslerCameraArray:
+        """the wrapped camera array; do not call it while an awaitable method is running"""
+        return self._device
+
+    async def snapshot(self, *args, **kwargs):
+        return await self._run(self._device.snapshot, *args, **kwargs)
+
+    async def get_snapshots(self):
+        return await self._run(self._device.get_snapshots)
+
+    async def apply_snapshots(self, snapshots):
+        return await self._run(self._device.apply_snapshots, snapshots)
+
+    def stream_sets(self, *args, **kwargs):
+        """return an async iterator over the frame sets of
+        :func:`~basler.basler_camera_array.BaslerCameraArray.stream_sets`, which takes the same arguments
+        """
+        return self._iterate(self._device.stream_sets, args, kwargs)
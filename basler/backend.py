@@ -0,0 +1,116 @@
+import pypylon.genicam
+import pypylon.pylon
+from .helper import BaslerCameraManager
+
+
+class FeatureNode:
+
+    """
+    The base class of feature nodes that are implemented in Python by a backend rather than by GenApi. Like the
+    nodes of pylon, they have ``GetValue()`` and ``SetValue()``; :func:`is_available`, :func:`is_readable` and
+    :func:`is_writable` check their access mode.
+    """
+
+    def IsAvailable(self) -> bool:
+        return True
+
+    def IsReadable(self) -> bool:
+        return self.IsAvailable()
+
+    def IsWritable(self) -> bool:
+        return self.IsAvailable()
+
+
+def is_available(node) -> bool:
+    """return whether a feature node of any backend is available, like ``genicam.IsAvailable``"""
+    if isinstance(node, FeatureNode):
+        return node.IsAvailable()
+    return pypylon.genicam.IsAvailable(node)
+
+
+def is_readable(node) -> bool:
+    """return whether a feature node of any backend is readable, like ``genicam.IsReadable``"""
+    if isinstance(node, FeatureNode):
+        return node.IsReadable()
+    return pypylon.genicam.IsReadable(node)
+
+
+def is_writable(node) -> bool:
+    """return whether a feature node of any backend is writable, like ``genicam.IsWritable``"""
+    if isinstance(node, FeatureNode):
+        return node.IsWritable()
+    return pypylon.genicam.IsWritable(node)
+
+
+class PylonBackend:
+
+    """
+    The default backend: real cameras (or pylon's camera emulation) through pypylon.
+
+    A backend creates the objects that :class:`~basler.basler_camera.BaslerCamera` and
+    :class:`~basler.basler_camera_array.BaslerCameraArray` drive: cameras with the interface of pylon's
+    ``InstantCamera``, camera arrays with the interface of ``InstantCameraArray``, wait objects and the pylon
+    converter. See :class:`~basler.sim.SimulatedBackend` for a backend that needs no camera.
+    """
+
+    name = 'pylon'
+
+    def enumerate_devices(self) -> tuple:
+        """return a tuple of the ``CDeviceInfo`` of the available cameras"""
+        return BaslerCameraManager.get_devices()
+
+    def create_device(self, device_info):
+        """create the device matching a (possibly partial) ``CDeviceInfo``, to be attached to a camera"""
+        return BaslerCameraManager.create_device(device_info)
+
+    def create_camera(self, device_info):
+        """create a camera (not open yet) for the device matching a ``CDeviceInfo``"""
+        return pypylon.pylon.InstantCamera(self.create_device(device_info))
+
+    def create_camera_array(self, size: int):
+        """create a camera array of ``size`` cameras, to which devices are attached with ``Attach()``"""
+        return pypylon.pylon.InstantCameraArray(size)
+
+    def create_wait_objects(self):
+        """create an empty container of wait objects, to which ``GetGrabResultWaitObject()`` of the cameras are
+        added
+        """
+        return pypylon.pylon.WaitObjects()
+
+    def create_converter(self, msb_align: bool = True):
+        """create the converter of the ``'pylon'`` engine; see
+        :func:`~basler.basler_camera.BaslerCamera.set_converter`
+        """
+        converter = pypylon.pylon.ImageFormatConverter()
+        converter.OutputPixelFormat = pypylon.pylon.PixelType_Mono16
+        if msb_align:
+            converter.OutputBitAlignment = pypylon.pylon.OutputBitAlignment_MsbAligned
+        else:
+            converter.OutputBitAlignment = pypylon.pylon.OutputBitAlignment_LsbAligned
+        return converter
+
+    def save_features(self, cam, path: str):
+        """save all the feature nodes of a camera to a ``.pfs`` file"""
+        pypylon.pylon.FeaturePersistence.Save(path, cam.GetNodeMap())
+
+    def load_features(self, cam, path: str, validate: bool = True):
+        """load a ``.pfs`` file into a camera"""
+        pypylon.pylon.FeaturePersistence.Load(path, cam.GetNodeMap(), validate)
+
+
+_default_backend = PylonBackend()
+
+
+def get_default_backend():
+    """return the backend used by the cameras and arrays created without an explicit backend"""
+    return _default_backend
+
+
+def set_default_backend(backend):
+    """set the backend used by the cameras and arrays created from now on without an explicit backend, e.g. a
+    :class:`~basler.sim.SimulatedBackend` to run code written for real cameras without hardware
+
+    :param backend: a backend instance, or ``None`` to restore the pylon backend
+    """
+    global _default_backend
+    _default_backend = backend if backend is not None else PylonBackend()
@@ -0,0 +1,119 @@
+import math
+
+
+GIGABIT_ETHERNET = 125_000_000
+"""The capacity of a Gigabit Ethernet link in bytes per second."""
+
+DEFAULT_TICK_FREQUENCY = 125_000_000
+"""The frequency of the timestamp counter of most Basler GigE cameras (``GevTimestampTickFrequency``), in Hz.
+The delays ``GevSCPD`` and ``GevSCFTD`` are counted in ticks of this counter."""
+
+PACKET_HEADER_SIZE = 36
+"""The headers of a stream packet included in ``GevSCPSPacketSize``: IP (20 bytes), UDP (8) and GVSP (8)."""
+
+ETHERNET_OVERHEAD = 38
+"""The bytes a packet takes on the wire beyond ``GevSCPSPacketSize``: the Ethernet header (14), the frame check
+sequence (4), the preamble (8) and the inter-frame gap (12)."""
+
+FRAME_OVERHEAD = 192
+"""The bytes on the wire of the leader and the trailer packets that frame every image."""
+
+PIXEL_FORMAT_BITS = {
+    'Mono8': 8, 'Mono10': 16, 'Mono12': 16, 'Mono16': 16,
+    'Mono10p': 10, 'Mono12p': 12, 'Mono10Packed': 12, 'Mono12Packed': 12,
+    'BayerGR8': 8, 'BayerRG8': 8, 'BayerGB8': 8, 'BayerBG8': 8,
+    'BayerGR10': 16, 'BayerRG10': 16, 'BayerGB10': 16, 'BayerBG10': 16,
+    'BayerGR12': 16, 'BayerRG12': 16, 'BayerGB12': 16, 'BayerBG12': 16,
+    'BayerGR12Packed': 12, 'BayerRG12Packed': 12, 'BayerGB12Packed': 12, 'BayerBG12Packed': 12,
+    'RGB8': 24, 'BGR8': 24, 'RGB8Packed': 24, 'BGR8Packed': 24,
+    'YUV422_8': 16, 'YUV422Packed': 16, 'YCbCr422_8': 16, }
+"""The number of bits per pixel sent by the camera for common pixel formats."""
+
+
+def get_payload_size(width: int, height: int, pixel_format: str) -> int:
+    """return the size in bytes of an image of ``width`` x ``height`` pixels of a pixel format of
+    :data:`PIXEL_FORMAT_BITS`
+    """
+    if pixel_format not in PIXEL_FORMAT_BITS:
+        raise ValueError(f'Unknown pixel format {pixel_format!r}, expected one of {list(PIXEL_FORMAT_BITS)}')
+    return math.ceil(width * height * PIXEL_FORMAT_BITS[pixel_format] / 8)
+
+
+def get_frame_size(payload_size: int, packet_size: int) -> tuple:
+    """return the number of stream packets of an image of ``payload_size`` bytes, and the bytes it takes on the
+    wire with all the headers, the leader and the trailer
+
+    :param packet_size: the packet size (``GevSCPSPacketSize``), including the IP, UDP and GVSP headers
+    """
+    if packet_size <= PACKET_HEADER_SIZE:
+        raise ValueError(f'The packet size must be larger than {PACKET_HEADER_SIZE} bytes, got {packet_size}')
+    packets = math.ceil(payload_size / (packet_size - PACKET_HEADER_SIZE))
+    return packets, payload_size + packets * (PACKET_HEADER_SIZE + ETHERNET_OVERHEAD) + FRAME_OVERHEAD
+
+
+def plan_bandwidth(cameras: list, link_capacity: float = GIGABIT_ETHERNET, margin: float = 0.1,
+                   packet_size: int = 1500, tick_frequency: float = DEFAULT_TICK_FREQUENCY) -> dict:
+
+    """plan the transport settings of GigE cameras that share one link (e.g. one network card behind a switch)
+    so that their streams fit its capacity, without resends.
+
+    The usable capacity (``link_capacity`` less the ``margin``) is shared among the cameras in proportion to the
+    bandwidth they need. The inter-packet delay (``GevSCPD``) of each camera spaces its packets so that it never
+    sends faster than its share, and the frame transmission delays (``GevSCFTD``) offset the cameras by one
+    packet each, so that the packets of cameras triggered together interleave instead of arriving in bursts.
+    If the cameras need more than the usable capacity, the delays throttle them and ``achievable_framerate``
+    gives the frame rate each camera can sustain.
+
+    The cameras are assumed to send at the speed of the shared link.
+
+    :param cameras: a list of dictionaries, one per camera, with the ``framerate`` in Hz and either the
+        ``payload_size`` in bytes (``PayloadSize``) or the ``width``, ``height`` and ``pixel_format`` of the
+        AOI; optionally the ``packet_size`` and the ``tick_frequency`` of this camera
+    :param link_capacity: the capacity of the shared link in bytes per second
+    :param margin: the fraction of the capacity kept free, e.g. for other traffic and resends
+    :param packet_size: the packet size (``GevSCPSPacketSize``) of the cameras that do not have one, e.g. 1500
+        for standard frames or up to 9000 with jumbo frames enabled on the network card
+    :param tick_frequency: the frequency of the timestamp counter of the cameras that do not have one
+    :return: a dictionary with the required ``bandwidth`` and the usable ``budget`` in bytes per second, whether
+        the cameras ``fit``, and a list of dictionaries ``cameras`` with the ``packet_size``, the
+        ``packet_delay`` and the ``frame_delay`` in ticks (the values of ``GevSCPSPacketSize``, ``GevSCPD`` and
+        ``GevSCFTD``), the ``packets`` and the ``frame_size`` on the wire per image, the required ``bandwidth``,
+        the ``framerate`` and the ``achievable_framerate`` of each camera
+
+    Example:
+
+    ``plan = plan_bandwidth([{'width': 1920, 'height': 1200, 'pixel_format': 'Mono8', 'framerate': 40}] * 2)``
+    """
+
+    if not 0 <= margin < 1:
+        raise ValueError(f'margin must be between 0 and 1, got {margin}')
+    budget = link_capacity * (1 - margin)
+
+    plans = []
+    for camera in cameras:
+        if camera.get('framerate') is None or camera['framerate'] <= 0:
+            raise ValueError(f'Every camera needs a positive framerate, got {camera}')
+        if camera.get('payload_size') is not None:
+            payload_size = camera['payload_size']
+        else:
+            payload_size = get_payload_size(camera['width'], camera['height'], camera['pixel_format'])
+        camera_packet_size = camera.get('packet_size') or packet_size
+        packets, frame_size = get_frame_size(payload_size, camera_packet_size)
+        plans.append({'payload_size': payload_size, 'packet_size': camera_packet_size, 'packets': packets,
+                      'frame_size': frame_size, 'bandwidth': frame_size * camera['framerate'],
+                      'framerate': camera['framerate'],
+                      'tick_frequency': camera.get('tick_frequency') or tick_frequency})
+
+    bandwidth = sum(plan['bandwidth'] for plan in plans)
+    scale = min(budget / bandwidth, 1) if bandwidth else 1
+    offset = 0
+    for plan in plans:
+        share = budget * plan['bandwidth'] / bandwidth
+        packet_time = (plan['packet_size'] + ETHERNET_OVERHEAD) / link_capacity
+        plan['packet_delay'] = max(round(((plan['packet_size'] + ETHERNET_OVERHEAD) / share - packet_time)
+                                         * plan['tick_frequency']), 0)
+        plan['frame_delay'] = round(offset * plan['tick_frequency'])
+        plan['achievable_framerate'] = plan['framerate'] * scale
+        offset += packet_time
+
+    return {'bandwidth': bandwidth, 'budget': budget, 'fits': bandwidth <= budget, 'cameras': plans}
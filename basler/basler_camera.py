@@ -1,20 +1,38 @@
+import re
+import time
 import pypylon
 import pypylon.pylon
 import numpy as np
+from .acquisition import (ACQUISITION_DEFAULTS, apply_buffer_settings, check_acquisition_settings,
+                          get_grab_settings, size_buffer_pool)
+from .backend import get_default_backend, is_available
+from .events import FrameEventHandler
+from .metadata import FRAME_METADATA_DTYPE, empty_metadata, get_frame_metadata
+from .reduce import FrameReducer
+from .snapshot import AOI_NODES, SNAPSHOT_NODES, FeatureSnapshot, read_features
+from .stream import FrameStream
+from .trace import CONVERT, RETRIEVE, SUBMIT
+from .unpack import NumpyConverter
+from .writers import AsyncFrameWriter, RawFileWriter, get_writer
 
 
 class DeviceError(Exception):
     pass
 
 
+class GrabTimeoutError(DeviceError):
+    """raised when no frame arrives within the timeout of the acquisition settings"""
+
+
 class BaslerCamera:
 
     """
     A generic class for connecting Basler cameras and capturing images.
     """
 
-    _TIME_OUT = 2000
-    
+    # the default timeout in milliseconds of the acquisition settings, see set_acquisition_settings
+    _TIME_OUT = ACQUISITION_DEFAULTS['timeout']
+
     _PROPERTIES = [
         'Address',
         'DeviceClass',
@@ -25,13 +43,46 @@ class BaslerCamera:
         'ModelName',
         'SerialNumber', ]
 
-    def __init__(self, ip: str = None, serial_number: str = None):
+    _CAPABILITIES = {
+        'exposure_time': ('ExposureTime', 'ExposureTimeAbs'),
+        'acquisition_framerate': ('AcquisitionFrameRate', 'AcquisitionFrameRateAbs'),
+        'resulting_framerate': ('ResultingFrameRateAbs', 'ResultingFrameRate'), }
+
+    # the order in which configure() applies settings: the pixel format and binning limit the size, the size
+    # limits the offsets, and everything before limits the exposure time and the frame rate. Other keys are
+    # feature node names, applied after the geometry in the order given.
+    _SETTING_ORDER = {
+        'pixel_format': 0,
+        'PixelFormat': 0,
+        'BinningHorizontal': 1,
+        'BinningVertical': 1,
+        'DecimationHorizontal': 1,
+        'DecimationVertical': 1,
+        'aoi': 2,
+        'Width': 2,
+        'Height': 2,
+        'OffsetX': 3,
+        'OffsetY': 3,
+        'exposure_time': 5,
+        'ExposureTime': 5,
+        'ExposureTimeAbs': 5,
+        'acquisition_framerate': 6,
+        'AcquisitionFrameRateEnable': 6,
+        'AcquisitionFrameRate': 6,
+        'AcquisitionFrameRateAbs': 6, }
+    _OTHER_SETTINGS_ORDER = 4
+    _SIZE_OFFSETS = {'Width': 'OffsetX', 'Height': 'OffsetY'}
+
+    def __init__(self, ip: str = None, serial_number: str = None, backend=None):
         """The constructor looks for the camera by IP address or serial number (or both). If neither is specified,
         the first device is created.
         
         :param ip: IP address
         :param serial_number: serial number
+        :param backend: the backend that provides the camera, e.g. a :class:`~basler.sim.SimulatedBackend`;
+            by default the backend of :func:`~basler.backend.get_default_backend` (pylon)
         """
+        self._backend = backend if backend is not None else get_default_backend()
         self._device = None
         self._device_info = pypylon.pylon.CDeviceInfo()
         if ip is not None:
@@ -39,6 +90,10 @@ class BaslerCamera:
         if serial_number is not None:
             self._device_info.SetSerialNumber(serial_number)
         self._converter = None
+        self._capabilities = None
+        self._handler = None
+        self._trace = None
+        self._acquisition = dict(ACQUISITION_DEFAULTS, timeout=self._TIME_OUT)
 
     def _get_device(self):
         if self._device is None:
@@ -47,14 +102,19 @@ class BaslerCamera:
 
     def connect(self):
         if self._device is None:
-            self._device = pypylon.pylon.InstantCamera(pypylon.pylon.TlFactory.GetInstance().CreateFirstDevice(self._device_info))
+            self._device = self._backend.create_camera(self._device_info)
         self.set_converter()
         self._get_device().Open()
+        self._capabilities = BaslerCamera.get_capabilities_helper(self._get_device())
+        apply_buffer_settings(self._get_device(), self._acquisition)
 
     def disconnect(self):
+        if self._handler is not None:
+            self.stop_callback()
         if self._get_device().IsOpen():
             self._get_device().Close()
         self._device = None
+        self._capabilities = None
 
     def __del__(self):
         self._converter = None
@@ -106,47 +166,109 @@ class BaslerCamera:
             cam.OffsetY.GetValue())
         return aoi
 
+    def get_capabilities(self):
+        """return the names of the feature nodes that the camera supports for the features whose name varies from
+        camera to camera, resolved once at :func:`connect`. A dictionary with the keys ``exposure_time``
+        (``ExposureTime`` or ``ExposureTimeAbs``), ``acquisition_framerate`` (``AcquisitionFrameRate`` or
+        ``AcquisitionFrameRateAbs``) and ``resulting_framerate`` (``ResultingFrameRateAbs`` or
+        ``ResultingFrameRate``); the value is ``None`` if the camera supports neither.
+        """
+        self._get_device()
+        return dict(self._capabilities)
+
+    @staticmethod
+    def get_capabilities_helper(cam) -> dict:
+
+        node_map = cam.GetNodeMap()
+        capabilities = {}
+        for capability, names in BaslerCamera._CAPABILITIES.items():
+            capabilities[capability] = None
+            for name in names:
+                if is_available(node_map.GetNode(name)):
+                    capabilities[capability] = name
+                    break
+        return capabilities
+
+    @staticmethod
+    def _get_feature_node(cam, capabilities, capability):
+
+        if capabilities is None:
+            capabilities = BaslerCamera.get_capabilities_helper(cam)
+        name = capabilities[capability]
+        if name is None:
+            return None
+        return getattr(cam, name)
+
     def get_exposure_time(self):
         """get the exposure time in millisecond (ms)"""
         cam = self._get_device()
-        exposure_time = BaslerCamera.get_exposure_time_helper(cam)
+        exposure_time = BaslerCamera.get_exposure_time_helper(cam, self._capabilities)
         return exposure_time
 
     @staticmethod
-    def get_exposure_time_helper(cam):
+    def get_exposure_time_helper(cam, capabilities: dict = None):
+        """A helper method for get_exposure_time
+
+        :param capabilities: the result of :func:`get_capabilities_helper`; resolved on the fly if ``None``
+        """
         
-        try:
-            exposure_time = cam.ExposureTime.GetValue() / 1000
-        except pypylon._genicam.LogicalErrorException:
-            try:
-                exposure_time = cam.ExposureTimeAbs.GetValue() / 1000
-            except pypylon._genicam.LogicalErrorException:
-                raise RuntimeError(f'Unable to set exposure time.')
+        node = BaslerCamera._get_feature_node(cam, capabilities, 'exposure_time')
+        if node is None:
+            raise RuntimeError(f'Unable to get exposure time.')
+        exposure_time = node.GetValue() / 1000
         return exposure_time
 
     def get_resulting_framerate(self):
         """get the resulting frame rate. If frame rate control is not enabled, return None"""
 
         cam = self._get_device()
-        resulting_framerate = BaslerCamera.get_resulting_framerate_helper(cam)
+        resulting_framerate = BaslerCamera.get_resulting_framerate_helper(cam, self._capabilities)
         return resulting_framerate
 
     @staticmethod
-    def get_resulting_framerate_helper(cam):
+    def get_resulting_framerate_helper(cam, capabilities: dict = None):
 
         framrate_control_enabled = cam.AcquisitionFrameRateEnable.GetValue()
         if not framrate_control_enabled:
             return None
-        try:
-            resulting_framerate = cam.ResultingFrameRateAbs.GetValue()
-        except pypylon._genicam.LogicalErrorException:
-            try:
-                resulting_framerate = cam.ResultingFrameRate.GetValue()
-            except pypylon._genicam.LogicalErrorException as e:
-                raise RuntimeError("Unable to get the resulting framerate")
+        node = BaslerCamera._get_feature_node(cam, capabilities, 'resulting_framerate')
+        if node is None:
+            raise RuntimeError("Unable to get the resulting framerate")
+        resulting_framerate = node.GetValue()
 
         return resulting_framerate
 
+    @staticmethod
+    def get_framerate_limit_helper(cam, capabilities: dict = None) -> float:
+
+        """return the frame rate the camera runs at when grabbing freely: the resulting frame rate, which accounts
+        for the exposure time, the AOI and the frame rate control whether it is enabled or not
+        """
+
+        node = BaslerCamera._get_feature_node(cam, capabilities, 'resulting_framerate')
+        if node is None:
+            raise RuntimeError("Unable to get the resulting framerate")
+        return node.GetValue()
+
+    def get_frame_dtype(self):
+        """return the numpy dtype of the frames returned by the grabbing methods.
+
+        The dtype depends on the pixel format of the camera and on whether the converter is active
+        (see :func:`set_converter`): 8-bit formats give ``numpy.uint8``, everything else ``numpy.uint16``.
+        """
+        cam = self._get_device()
+        return BaslerCamera.get_frame_dtype_helper(cam, self._converter)
+
+    @staticmethod
+    def get_frame_dtype_helper(cam, converter=None):
+
+        if converter is not None:
+            return np.dtype(np.uint16)
+        bit_depth = re.search(r'\d+', cam.PixelFormat.GetValue())
+        if bit_depth is not None and int(bit_depth.group()) <= 8:
+            return np.dtype(np.uint8)
+        return np.dtype(np.uint16)
+
     # ----------------------- setter -----------------------------------
 
     def set_aoi(self, aoi:tuple):
@@ -161,7 +283,10 @@ class BaslerCamera:
     def set_aoi_helper(cam, aoi: tuple):
 
         offset_x, offset_y, width, height = aoi
-        
+
+        # the current offsets may not leave room for a larger size
+        cam.OffsetX.SetValue(0)
+        cam.OffsetY.SetValue(0)
         cam.Height.SetValue(height)
         cam.Width.SetValue(width)
         cam.OffsetX.SetValue(offset_x)
@@ -178,20 +303,93 @@ class BaslerCamera:
         cam = self._get_device()
         cam.PixelFormat.SetValue(pixel_format_string)
 
-    def set_converter(self, convert=True):
+    def set_converter(self, convert=True, engine: str = 'pylon', msb_align: bool = True):
 
         """when saving TIFF files, always use a 16-bit format with the most significant bit (MSB)
         aligned.
 
         :param convert: a boolean
+        :param engine: ``'pylon'`` to convert with pylon's ``ImageFormatConverter``, or ``'numpy'`` to copy
+            unpacked formats straight from the grab buffer and unpack ``Mono10Packed``/``Mono12Packed`` (and
+            ``Mono10p``/``Mono12p``) with NumPy (see :class:`~basler.unpack.NumpyConverter`)
+        :param msb_align: align the most significant bit; if ``False``, keep the raw values (e.g. 0 to 4095
+            for 12-bit formats)
         """
 
-        if convert:
-            self._converter = pypylon.pylon.ImageFormatConverter()
-            self._converter.OutputPixelFormat = pypylon.pylon.PixelType_Mono16
-            self._converter.OutputBitAlignment = pypylon.pylon.OutputBitAlignment_MsbAligned
-        else:
-            self._converter = None
+        self._converter = BaslerCamera.get_converter_helper(convert, engine, msb_align, self._backend)
+
+    def set_trace(self, trace=None):
+
+        """record the stages of :func:`grab_many` and :func:`grab_n_save` (waiting for grab results, conversion,
+        hand-over to and writing by the writer threads) into a trace, or stop tracing if ``trace`` is ``None``.
+
+        :param trace: an :class:`~basler.trace.AcquisitionTrace`
+        """
+
+        self._trace = trace
+
+    def get_trace(self):
+        """return the trace set with :func:`set_trace`, or ``None``"""
+        return self._trace
+
+    def set_acquisition_settings(self, **settings):
+
+        """set how frames are buffered and waited for: the number and size of pylon's grab buffers, the default
+        grab strategy, the timeout and what happens on a timeout. See :data:`~basler.acquisition.ACQUISITION_DEFAULTS`
+        for the settings; the others keep their value. The buffer settings are applied now if the camera is
+        connected (it must not be grabbing) and again at every :func:`connect`.
+
+        The settings apply to :func:`grab_many`, :func:`grab_n_save`, :func:`grab_reduce`, :func:`grab_to_memmap`,
+        :func:`stream` and :func:`start_callback`.
+
+        Example:
+
+        ``cam.set_acquisition_settings(strategy='LatestImageOnly', timeout=100, timeout_handling='return')``
+        """
+
+        acquisition = check_acquisition_settings(settings, self._acquisition)
+        if self._device is not None:
+            apply_buffer_settings(self._device, acquisition)
+        self._acquisition = acquisition
+
+    def get_acquisition_settings(self) -> dict:
+        """return the acquisition settings; see :func:`set_acquisition_settings`"""
+        return dict(self._acquisition)
+
+    def size_buffer_pool(self, stall_tolerance: float, framerate: float = None, headroom: int = 2,
+                         memory_limit: int = None, apply: bool = True) -> dict:
+
+        """size the grab buffers so that the consumer can stall for ``stall_tolerance`` seconds without losing
+        frames, from the frame size (``PayloadSize``) and the frame rate of the camera; see
+        :func:`~basler.acquisition.size_buffer_pool`
+
+        :param framerate: the frame rate in Hz; by default the resulting frame rate of the camera (see
+            :func:`get_framerate_limit_helper`)
+        :param apply: set ``max_num_buffer`` and ``max_buffer_size`` with :func:`set_acquisition_settings`
+        :return: the dictionary of :func:`~basler.acquisition.size_buffer_pool`
+        """
+
+        cam = self._get_device()
+        if framerate is None:
+            framerate = BaslerCamera.get_framerate_limit_helper(cam, self._capabilities)
+        pool = size_buffer_pool(cam.PayloadSize.GetValue(), framerate, stall_tolerance, headroom, memory_limit)
+        if apply:
+            self.set_acquisition_settings(max_num_buffer=pool['max_num_buffer'],
+                                          max_buffer_size=pool['max_buffer_size'])
+        return pool
+
+    @staticmethod
+    def get_converter_helper(convert=True, engine: str = 'pylon', msb_align: bool = True, backend=None):
+
+        if not convert:
+            return None
+        if engine == 'numpy':
+            return NumpyConverter(msb_align)
+        if engine != 'pylon':
+            raise ValueError(f"Unknown converter engine {engine!r}, expected 'pylon' or 'numpy'")
+        if backend is None:
+            backend = get_default_backend()
+        return backend.create_converter(msb_align)
 
     def set_exposure_time(self, exposure_time: float):
 
@@ -201,24 +399,21 @@ class BaslerCamera:
         """
 
         cam = self._get_device()
-        BaslerCamera.set_exposure_time_helper(cam, exposure_time)
+        BaslerCamera.set_exposure_time_helper(cam, exposure_time, self._capabilities)
 
     @staticmethod
-    def set_exposure_time_helper(cam, exposure_time: float):
+    def set_exposure_time_helper(cam, exposure_time: float, capabilities: dict = None):
         """A helper method for set_exposure_time
 
-        This method will attempt to change ``ExposureTime`` property and then ``ExposureTimeAbs``
-        (as the property name varies from camera to camera). If no property is found,
-        this method throws an error.
+        This method changes the ``ExposureTime`` or the ``ExposureTimeAbs`` property, whichever the camera
+        supports according to ``capabilities`` (see :func:`get_capabilities`; resolved on the fly if ``None``).
+        If no property is found, this method throws an error.
         """
         
-        try:
-            cam.ExposureTime.SetValue(exposure_time * 1000)
-        except pypylon._genicam.LogicalErrorException:
-            try:
-                cam.ExposureTimeAbs.SetValue(exposure_time * 1000)
-            except pypylon._genicam.LogicalErrorException:
-                raise RuntimeError(f'Unable to set exposure time.')
+        node = BaslerCamera._get_feature_node(cam, capabilities, 'exposure_time')
+        if node is None:
+            raise RuntimeError(f'Unable to set exposure time.')
+        node.SetValue(exposure_time * 1000)
 
     def set_acquisition_framerate(self, framerate: float=None):
         """set the acquisition frame rate for the camera.
@@ -230,44 +425,214 @@ class BaslerCamera:
         and may not equal the "acquisition frame rate" here.
         """
         cam = self._get_device()
-        BaslerCamera.set_acquisition_framerate_helper(cam, framerate)
+        BaslerCamera.set_acquisition_framerate_helper(cam, framerate, self._capabilities)
 
     @staticmethod
-    def set_acquisition_framerate_helper(cam, framerate: float=None):
+    def set_acquisition_framerate_helper(cam, framerate: float=None, capabilities: dict = None):
 
         """A helper method for set_acquisition_framerate
 
-        This method will attempt to change ``AcquisitionFrameRate`` property and then ``AcquisitionFrameRateAbs``
-        (as the property name varies from camera to camera). If no property is found,
-        this method throws an error.
+        This method changes the ``AcquisitionFrameRate`` or the ``AcquisitionFrameRateAbs`` property, whichever
+        the camera supports according to ``capabilities`` (see :func:`get_capabilities`; resolved on the fly if
+        ``None``). If no property is found, this method throws an error.
         If framerate is not specified or ``None``, framerate control will be disabled.
         """
        
         if framerate:
-            try:
-                cam.AcquisitionFrameRateEnable.SetValue(True)
-                cam.AcquisitionFrameRate.SetValue(framerate)
-            except pypylon._genicam.LogicalErrorException:
-                try:
-                    cam.AcquisitionFrameRateEnable.SetValue(True)
-                    cam.AcquisitionFrameRateAbs.SetValue(framerate)
-                except pypylon._genicam.LogicalErrorException:
-                    raise RuntimeError(f'Unable to set frame rate.') 
+            node = BaslerCamera._get_feature_node(cam, capabilities, 'acquisition_framerate')
+            if node is None:
+                raise RuntimeError(f'Unable to set frame rate.')
+            cam.AcquisitionFrameRateEnable.SetValue(True)
+            node.SetValue(framerate)
         else:
             cam.AcquisitionFrameRateEnable.SetValue(False)
 
+    def configure(self, settings: dict) -> dict:
+
+        """apply several settings at once, in an order that respects the dependencies between the feature nodes
+        (pixel format and binning before size, size before offsets, exposure time and frame rate last).
+
+        :param settings: a dictionary with any of the keys ``pixel_format``, ``aoi``, ``exposure_time`` (ms) and
+            ``acquisition_framerate`` (``None`` disables it), which have the meaning of the corresponding setters,
+            and feature node names such as ``Gain`` or ``TriggerMode``, whose values are set as they are
+        :return: a dictionary with the list of keys ``applied`` and a dictionary ``failed`` with the error message
+            of each key that could not be applied. A failure does not prevent the other keys from being applied.
+
+        Example:
+
+        ``cam.configure({'pixel_format': 'Mono12', 'aoi': (0, 0, 800, 800), 'exposure_time': 10, 'Gain': 0})``
+        """
+
+        cam = self._get_device()
+        return BaslerCamera.configure_helper(cam, settings, self._capabilities)
+
+    @staticmethod
+    def configure_helper(cam, settings: dict, capabilities: dict = None) -> dict:
+
+        report = {'applied': [], 'failed': {}}
+        keys = sorted(settings, key=lambda k: BaslerCamera._SETTING_ORDER.get(k, BaslerCamera._OTHER_SETTINGS_ORDER))
+        for key in keys:
+            value = settings[key]
+            try:
+                if key == 'pixel_format':
+                    cam.PixelFormat.SetValue(value)
+                elif key == 'aoi':
+                    BaslerCamera.set_aoi_helper(cam, value)
+                elif key == 'exposure_time':
+                    BaslerCamera.set_exposure_time_helper(cam, value, capabilities)
+                elif key == 'acquisition_framerate':
+                    BaslerCamera.set_acquisition_framerate_helper(cam, value, capabilities)
+                else:
+                    node = getattr(cam, key, None)
+                    if node is None:
+                        raise RuntimeError(f'Unknown setting or feature node {key!r}')
+                    offset = BaslerCamera._SIZE_OFFSETS.get(key)
+                    if offset in settings:
+                        # the current offset may not leave room for a larger size; it is set afterwards anyway
+                        getattr(cam, offset).SetValue(0)
+                    node.SetValue(value)
+            except Exception as e:
+                report['failed'][key] = str(e)
+            else:
+                report['applied'].append(key)
+        return report
+
+    # ----------------------- snapshot ---------------------------------
+
+    def get_snapshot(self) -> FeatureSnapshot:
+
+        """return a :class:`~basler.snapshot.FeatureSnapshot` of the current configuration of the camera
+        (the nodes of :data:`~basler.snapshot.SNAPSHOT_NODES`, the exposure time and the frame rate)
+        """
+
+        cam = self._get_device()
+        return BaslerCamera.get_snapshot_helper(cam, self._capabilities)
+
+    @staticmethod
+    def get_snapshot_helper(cam, capabilities: dict = None) -> FeatureSnapshot:
+
+        if capabilities is None:
+            capabilities = BaslerCamera.get_capabilities_helper(cam)
+        names = list(SNAPSHOT_NODES)
+        names += [capabilities[capability] for capability in ('exposure_time', 'acquisition_framerate')
+                  if capabilities[capability] is not None]
+        device_info = cam.GetDeviceInfo()
+        return FeatureSnapshot(read_features(cam, names), device_info.GetModelName(),
+                               device_info.GetSerialNumber())
+
+    def apply_snapshot(self, snapshot: FeatureSnapshot) -> dict:
+
+        """restore the configuration of a snapshot, writing only the nodes whose current value differs.
+
+        :param snapshot: a :class:`~basler.snapshot.FeatureSnapshot`, e.g. from :func:`get_snapshot` or loaded
+            with :func:`~basler.snapshot.FeatureSnapshot.load`
+        :return: the report of :func:`configure`, with the list of nodes left ``unchanged`` in addition. The AOI
+            nodes are written together as the ``aoi`` key.
+        """
+
+        cam = self._get_device()
+        return BaslerCamera.apply_snapshot_helper(cam, snapshot, self._capabilities)
+
+    @staticmethod
+    def apply_snapshot_helper(cam, snapshot: FeatureSnapshot, capabilities: dict = None) -> dict:
+
+        current = read_features(cam, snapshot.values)
+        changes = snapshot.diff(current)
+        settings = {name: value for name, value in changes.items() if name not in AOI_NODES}
+        if any(name in changes for name in AOI_NODES):
+            aoi = tuple(snapshot.values.get(name, current.get(name)) for name in AOI_NODES)
+            if None in aoi:
+                settings.update({name: changes[name] for name in AOI_NODES if name in changes})
+            else:
+                settings['aoi'] = aoi
+        report = BaslerCamera.configure_helper(cam, settings, capabilities)
+        report['unchanged'] = [name for name in snapshot.values if name not in changes]
+        return report
+
+    def save_features(self, path: str):
+
+        """save all the feature nodes of the camera with pylon's feature persistence (a ``.pfs`` file, which can
+        also be loaded by the pylon Viewer)
+        """
+
+        cam = self._get_device()
+        self._backend.save_features(cam, path)
+
+    def load_features(self, path: str, validate: bool = True):
+
+        """load a ``.pfs`` file saved with :func:`save_features` or the pylon Viewer into the camera"""
+
+        cam = self._get_device()
+        self._backend.load_features(cam, path, validate)
+
     # ----------------------- helper -----------------------------------
 
     def post_processing(self, grab_result):
+        """return a successful grab result as a ``pypylon.pylon.PylonImage``, converted by the converter of
+        :func:`set_converter` if it is active (the same conversion as :func:`copy_frame`)
+        """
+        return BaslerCamera.post_processing_helper(grab_result, self._converter)
 
-        if self._converter is not None:
-            target_image = self._converter.Convert(grab_result)
-        else:
-            target_image = pypylon.pylon.PylonImage()
+    @staticmethod
+    def post_processing_helper(grab_result, converter=None):
+
+        target_image = pypylon.pylon.PylonImage()
+        if converter is None:
             target_image.AttachGrabResultBuffer(grab_result)
-        
+        else:
+            frame = np.empty((grab_result.Height, grab_result.Width), dtype=np.uint16)
+            BaslerCamera.copy_frame_helper(grab_result, frame, converter)
+            target_image.AttachArray(frame, pypylon.pylon.PixelType_Mono16)
+
         return target_image
 
+    def copy_frame(self, grab_result, dest):
+        """post-process a grab result and write the pixels into ``dest`` (e.g. a slot of a preallocated stack)
+        without creating an intermediate numpy array.
+
+        :param grab_result: a successful grab result
+        :param dest: a writable numpy array of shape ``(height, width)``
+        """
+        BaslerCamera.copy_frame_helper(grab_result, dest, self._converter)
+
+    @staticmethod
+    def copy_frame_helper(grab_result, dest, converter=None):
+
+        if isinstance(converter, NumpyConverter):
+            converter.copy_frame(grab_result, dest)
+        elif converter is not None:
+            image = converter.Convert(grab_result)
+            with image.GetArrayZeroCopy() as frame:
+                dest[...] = frame
+            image.Release()
+        else:
+            with grab_result.GetArrayZeroCopy() as frame:
+                dest[...] = frame
+
+    @staticmethod
+    def timeout_helper(function, *args):
+        """call a pylon function that waits for the camera, e.g. ``cam.RetrieveResult``, and raise a
+        :class:`GrabTimeoutError` instead of pylon's ``TimeoutException``
+        """
+
+        try:
+            return function(*args)
+        except pypylon.genicam.TimeoutException as e:
+            raise GrabTimeoutError(f'Timeout when grabbing images: {e}') from e
+
+    @staticmethod
+    def allocate_frames_helper(cam, n: int, converter=None, out=None):
+        """return an array of shape ``(n, height, width)`` in the frame dtype of the camera, or check that
+        the caller-provided ``out`` has that shape.
+        """
+
+        shape = (n, cam.Height.GetValue(), cam.Width.GetValue())
+        if out is None:
+            return np.empty(shape, dtype=BaslerCamera.get_frame_dtype_helper(cam, converter))
+        if out.shape != shape:
+            raise ValueError(f'Output array has shape {out.shape}, expected {shape}')
+        return out
+
     # --------------------------- grabbing -----------------------------
 
     def grab_one(self):
@@ -275,44 +640,301 @@ class BaslerCamera:
         """grab one frame and return data as a numpy array"""
 
         cam = self._get_device()
-        acquired_image = cam.GrabOne(self._TIME_OUT)
-        result = self.post_processing(acquired_image).GetArray()
-        acquired_image.Release()
+        acquired_image = BaslerCamera.timeout_helper(cam.GrabOne, self._acquisition['timeout'])
+        try:
+            if not acquired_image.GrabSucceeded():
+                raise DeviceError("Error when grabbing images: " +
+                                  str(acquired_image.ErrorCode) + str(acquired_image.ErrorDescription))
+            result = np.empty((acquired_image.Height, acquired_image.Width),
+                              dtype=BaslerCamera.get_frame_dtype_helper(cam, self._converter))
+            self.copy_frame(acquired_image, result)
+        finally:
+            acquired_image.Release()
         return result
 
-    def grab_many(self, n: int):
+    def grab_many(self, n: int, out=None, metadata: bool = False):
     
         """grab n frames and return a numpy array of shape (n, height, width)
 
+        The array has the dtype of the camera output (see :func:`get_frame_dtype`).
+
+        :param n: the number of frames
+        :param out: optional preallocated array of shape ``(n, height, width)`` to grab into, e.g. to reuse
+            one allocation for repeated bursts. If ``None``, a new array is allocated.
+        :param metadata: if ``True``, return a tuple ``(frames, metadata)`` where ``metadata`` is a structured
+            array of n records of :data:`~basler.metadata.FRAME_METADATA_DTYPE` (timestamps, frame IDs, ...)
+
+        With ``timeout_handling='return'`` (see :func:`set_acquisition_settings`), a timeout ends the grab and
+        only the frames captured so far are returned.
+        """
+
+        cam = self._get_device()
+
+        r = BaslerCamera.allocate_frames_helper(cam, n, self._converter, out)
+        meta = empty_metadata(n) if metadata else None
+        trace = self._trace
+        grab_strategy, timeout, timeout_handling = get_grab_settings(self._acquisition)
+        i = 0
+
+        cam.StartGrabbingMax(n, grab_strategy)
+        try:
+            while cam.IsGrabbing():
+
+                if trace is not None:
+                    start = trace.clock()
+                grab_result = BaslerCamera.timeout_helper(cam.RetrieveResult, timeout, timeout_handling)
+                if not grab_result.IsValid():
+                    break
+                try:
+                    if trace is not None:
+                        trace.record(RETRIEVE, 0, i, start, trace.clock(), trace.ready_buffers(cam))
+
+                    # Image grabbed successfully?
+                    if not grab_result.GrabSucceeded():
+                        raise DeviceError("Error when grabbing images: " +
+                                          str(grab_result.ErrorCode) + str(grab_result.ErrorDescription))
+                    if meta is not None:
+                        meta[i] = get_frame_metadata(grab_result)
+                    if trace is not None:
+                        trace.frame(0, grab_result)
+                        start = trace.clock()
+                    self.copy_frame(grab_result, r[i])
+                    if trace is not None:
+                        trace.record(CONVERT, 0, i, start, trace.clock())
+                finally:
+                    grab_result.Release()
+                i += 1
+        finally:
+            cam.StopGrabbing()
+
+        if i < n:
+            r = r[:i]
+            meta = None if meta is None else meta[:i]
+        if meta is not None:
+            return r, meta
+        return r
+
+    def grab_reduce(self, n: int, ops=('mean',), ddof: int = 0):
+
+        """grab n frames and return per-pixel statistics, accumulated frame by frame as they arrive so that the
+        frames are never stored together (e.g. to average dark or flat-field frames).
+
+        :param n: the number of frames
+        :param ops: the statistics to compute, any of ``'sum'``, ``'mean'``, ``'var'``, ``'std'``, ``'min'``,
+            ``'max'``; see :class:`~basler.reduce.FrameReducer`
+        :param ddof: delta degrees of freedom of the variance
+        :return: a dictionary with an array of shape ``(height, width)`` for each statistic
+
+        Example:
+
+        ``dark = cam.grab_reduce(500, ops=['mean', 'std'])['mean']``
+        """
+
+        cam = self._get_device()
+
+        frame = BaslerCamera.allocate_frames_helper(cam, 1, self._converter)[0]
+        reducer = FrameReducer(frame.shape, ops, ddof)
+        grab_strategy, timeout, timeout_handling = get_grab_settings(self._acquisition)
+
+        cam.StartGrabbingMax(n, grab_strategy)
+
+        try:
+            while cam.IsGrabbing():
+
+                grab_result = BaslerCamera.timeout_helper(cam.RetrieveResult, timeout, timeout_handling)
+                if not grab_result.IsValid():
+                    break
+
+                try:
+                    # Image grabbed successfully?
+                    if not grab_result.GrabSucceeded():
+                        raise DeviceError("Error when grabbing images: " +
+                                          str(grab_result.ErrorCode) + str(grab_result.ErrorDescription))
+                    self.copy_frame(grab_result, frame)
+                finally:
+                    grab_result.Release()
+                reducer.add(frame)
+        finally:
+            cam.StopGrabbing()
+
+        return reducer.result()
+
+    def grab_to_memmap(self, n: int, path: str, flush_every: int = None, fsync: bool = False):
+
+        """grab n frames directly into a memory-mapped ``.npy`` file, so that the burst length is not limited
+        by the memory. A sidecar JSON file is written next to it (see :class:`~basler.writers.RawFileWriter`).
+
         :param n: the number of frames
+        :param path: the path of the ``.npy`` file
+        :param flush_every: if given, flush the frames to disk every ``flush_every`` frames;
+            otherwise the operating system decides until the end of the acquisition
+        :param fsync: also commit the file to the storage device at every flush, for durability at the expense
+            of throughput
+        :return: the ``numpy.memmap`` of shape ``(n, height, width)``. It can be reopened lazily later with
+            ``numpy.load(path, mmap_mode='r')``.
         """
 
         cam = self._get_device()
 
-        width = cam.Width.GetValue()
-        height = cam.Height.GetValue()
-        r = np.zeros([n, height, width])
+        frame_writer = RawFileWriter(path)
+        frame_writer.open(n, (cam.Height.GetValue(), cam.Width.GetValue()),
+                          BaslerCamera.get_frame_dtype_helper(cam, self._converter))
+        frames = frame_writer.frames
+        grab_strategy, timeout, timeout_handling = get_grab_settings(self._acquisition)
         i = 0
 
-        cam.StartGrabbingMax(n)
-        while cam.IsGrabbing():
+        cam.StartGrabbingMax(n, grab_strategy)
+
+        try:
+            while cam.IsGrabbing():
 
-            grab_result = cam.RetrieveResult(self._TIME_OUT, pypylon.pylon.TimeoutHandling_ThrowException)
+                grab_result = BaslerCamera.timeout_helper(cam.RetrieveResult, timeout, timeout_handling)
+                if not grab_result.IsValid():
+                    break
 
-            # Image grabbed successfully?
-            if grab_result.GrabSucceeded():
-                r[i, :, :] = self.post_processing(grab_result).GetArray()
+                try:
+                    # Image grabbed successfully?
+                    if not grab_result.GrabSucceeded():
+                        raise DeviceError("Error when grabbing images: " +
+                                          str(grab_result.ErrorCode) + str(grab_result.ErrorDescription))
+                    self.copy_frame(grab_result, frames[i])
+                finally:
+                    grab_result.Release()
+                frame_writer.mark_written()
                 i += 1
-            else:
-                raise DeviceError("Error when grabbing images: " +
-                                  str(grab_result.ErrorCode) + str(grab_result.ErrorDescription))
-            grab_result.Release()
+                if flush_every and i % flush_every == 0:
+                    frame_writer.flush(fsync)
+        finally:
+            cam.StopGrabbing()
+            frame_writer.close(fsync)
+
+        return frames
+
+    def stream(self, max_frames: int = None, duration: float = None, strategy: str = None,
+               pool_size: int = None, metadata: bool = False):
+
+        """grab continuously and iterate over the frames until the consumer stops, or until one of the bounds
+        is reached. The returned stream can also be used as a context manager; grabbing is stopped when it is
+        exhausted, closed or garbage collected.
+
+        :param max_frames: optional maximum number of frames
+        :param duration: optional maximum duration in seconds
+        :param strategy: the pylon grab strategy, e.g. ``'OneByOne'`` to get every frame or
+            ``'LatestImageOnly'`` for the lowest latency; see :func:`~basler.stream.get_grab_strategy`.
+            By default the strategy of :func:`set_acquisition_settings`.
+        :param pool_size: if ``None``, every frame is a new numpy array. Otherwise frames are views into a
+            recycled pool of ``pool_size`` buffers, i.e. a frame is overwritten ``pool_size`` frames later.
+        :param metadata: if ``True``, iterate over ``(frame, record)`` tuples where ``record`` is a record of
+            :data:`~basler.metadata.FRAME_METADATA_DTYPE`
+        :return: a :class:`~basler.stream.FrameStream` of numpy arrays of shape ``(height, width)``. With
+            ``timeout_handling='return'``, the stream ends at the first timeout.
 
-        return r
+        Example:
+
+        ``for frame in cam.stream(duration=60, strategy='LatestImageOnly'): ...``
+        """
+
+        cam = self._get_device()
+        grab_strategy = get_grab_settings(self._acquisition, strategy)[0]
+        return FrameStream(self._stream(cam, max_frames, duration, grab_strategy, pool_size, metadata))
 
-    def grab_n_save(self, n: int, save_pattern: str, n_start: int = 1):
+    def _stream(self, cam, max_frames, duration, grab_strategy, pool_size, metadata):
+
+        shape = (cam.Height.GetValue(), cam.Width.GetValue())
+        dtype = BaslerCamera.get_frame_dtype_helper(cam, self._converter)
+        pool = None if pool_size is None else np.empty((pool_size,) + shape, dtype=dtype)
+        deadline = None if duration is None else time.monotonic() + duration
+        _, timeout, timeout_handling = get_grab_settings(self._acquisition)
+        i = 0
+
+        if max_frames is None:
+            cam.StartGrabbing(grab_strategy)
+        else:
+            cam.StartGrabbingMax(max_frames, grab_strategy)
+
+        try:
+            while cam.IsGrabbing():
+
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+
+                grab_result = BaslerCamera.timeout_helper(cam.RetrieveResult, timeout, timeout_handling)
+                if not grab_result.IsValid():
+                    break
+                try:
+                    if not grab_result.GrabSucceeded():
+                        raise DeviceError("Error when grabbing images: " +
+                                          str(grab_result.ErrorCode) + str(grab_result.ErrorDescription))
+                    frame = np.empty(shape, dtype=dtype) if pool is None else pool[i % pool_size]
+                    self.copy_frame(grab_result, frame)
+                    if metadata:
+                        record = np.array(get_frame_metadata(grab_result), dtype=FRAME_METADATA_DTYPE)[()]
+                finally:
+                    grab_result.Release()
+
+                i += 1
+                yield (frame, record) if metadata else frame
+        finally:
+            cam.StopGrabbing()
+
+    def start_callback(self, callback, strategy: str = None, num_threads: int = 0, queue_size: int = 64,
+                       overflow: str = 'block'):
+
+        """start grabbing in the background and call ``callback(frame, record)`` for every frame from pylon's
+        grab thread, until :func:`stop_callback` is called. ``record`` is a record of
+        :data:`~basler.metadata.FRAME_METADATA_DTYPE`.
+
+        Without worker threads, ``frame`` is only valid until the callback returns (copy it to keep it) and the
+        callback should return quickly. With ``num_threads`` worker threads, frames are copied and handed off to
+        the workers. See :class:`~basler.events.FrameEventHandler` for details.
+
+        :param callback: the function called for every frame
+        :param strategy: the pylon grab strategy; see :func:`~basler.stream.get_grab_strategy`. By default the
+            strategy of :func:`set_acquisition_settings`.
+        :param num_threads: the number of worker threads; 0 calls the callback on the grab thread
+        :param queue_size: the maximum number of frames waiting for a worker thread
+        :param overflow: when the queue is full, ``'block'`` the grab thread or ``'drop'`` the new frame
+        """
+
+        cam = self._get_device()
+        if self._handler is not None:
+            raise RuntimeError('Callback grabbing is already running')
+
+        grab_strategy = get_grab_settings(self._acquisition, strategy)[0]
+        copy_frame = None if self._converter is None else self.copy_frame
+        handler = FrameEventHandler(callback, None, copy_frame,
+                                    BaslerCamera.get_frame_dtype_helper(cam, self._converter),
+                                    num_threads, queue_size, overflow)
+        cam.RegisterImageEventHandler(handler, pypylon.pylon.RegistrationMode_Append, pypylon.pylon.Cleanup_None)
+        cam.StartGrabbing(grab_strategy, pypylon.pylon.GrabLoop_ProvidedByInstantCamera)
+        self._handler = handler
+
+    def stop_callback(self) -> dict:
+
+        """stop the grabbing started by :func:`start_callback` and wait for the worker threads.
+
+        :return: a dictionary with the number of ``frames`` passed to the callback and ``dropped``
+        """
+
+        cam = self._get_device()
+        if self._handler is None:
+            raise RuntimeError('Callback grabbing is not running')
+
+        handler = self._handler
+        self._handler = None
+        cam.StopGrabbing()
+        cam.DeregisterImageEventHandler(handler)
+        return handler.close()
+
+    def grab_n_save(self, n: int, save_pattern, n_start: int = 1,
+                    num_threads: int = 1, queue_size: int = 64, overflow: str = 'block', writer: str = 'tiff',
+                    metadata_path: str = None):
     
-        r"""grab n frames and save them sequentially as TIFF files according to save_pattern.
+        r"""grab n frames and save them sequentially as TIFF files according to save_pattern,
+        or into a single container file (see ``writer``).
+
+        Frames are copied out of the grab results and written by background threads, so that slow disk I/O
+        does not stall the camera.
 
         :param n: the number of frames to grab
         :param save_pattern: a string that contains one single '%d' as the number.
@@ -320,7 +942,18 @@ class BaslerCamera:
             alternatively, use double backslash, e.g. ``'D:\\20200212Z\\002\\002-%d.tiff'``)
             For Linux: ``'/home/zheli/002/002-%d.tiff'``
         
+            For the container writers, the path of the output file. Can also be a
+            :class:`~basler.writers.FrameWriter` instance.
+        
         :param n_start: the starting number or the sequence; default is 1
+        :param num_threads: the number of writer threads
+        :param queue_size: the maximum number of frames waiting to be written
+        :param overflow: ``'block'``, ``'drop_oldest'`` or ``'fail'``; see :class:`~basler.writers.AsyncFrameWriter`
+        :param writer: ``'tiff'`` (one file per frame, the default), ``'multipage_tiff'``, ``'raw'`` or ``'hdf5'``;
+            see :func:`~basler.writers.get_writer`
+        :param metadata_path: if given, the per-frame metadata (see :data:`~basler.metadata.FRAME_METADATA_DTYPE`)
+            is saved to this ``.npy`` file
+        :return: a dictionary with the number of frames ``written`` and ``dropped``
         
         Example:
         
@@ -331,27 +964,68 @@ class BaslerCamera:
 
         cam = self._get_device()
 
-        i = 0
+        shape = (cam.Height.GetValue(), cam.Width.GetValue())
+        dtype = BaslerCamera.get_frame_dtype_helper(cam, self._converter)
+        frame_writer = get_writer(save_pattern, writer, n_start)
+        if frame_writer.ORDERED and num_threads > 1:
+            raise ValueError(f'{type(frame_writer).__name__} must be used with a single writer thread')
+
+        frame_writer.open(n, shape, dtype)
+        trace = self._trace
+        async_writer = AsyncFrameWriter(num_threads, queue_size, overflow, trace)
+        meta = empty_metadata(n) if metadata_path is not None else None
 
-        cam.StartGrabbingMax(n)
+        grab_strategy, timeout, timeout_handling = get_grab_settings(self._acquisition)
+        i = 0
 
-        while cam.IsGrabbing():
+        raise_errors = True
 
-            grab_result = cam.RetrieveResult(self._TIME_OUT, pypylon.pylon.TimeoutHandling_ThrowException)
+        cam.StartGrabbingMax(n, grab_strategy)
 
-            # Image grabbed successfully?
-            if grab_result.GrabSucceeded():
+        try:
+            while cam.IsGrabbing():
 
-                filename = save_pattern % (n_start + i)
+                if trace is not None:
+                    start = trace.clock()
+                grab_result = BaslerCamera.timeout_helper(cam.RetrieveResult, timeout, timeout_handling)
+                if not grab_result.IsValid():
+                    break
+                try:
+                    if trace is not None:
+                        trace.record(RETRIEVE, 0, i, start, trace.clock(), trace.ready_buffers(cam))
+
+                    # Image grabbed successfully?
+                    if not grab_result.GrabSucceeded():
+                        raise DeviceError("Error when grabbing images: " +
+                                          str(grab_result.ErrorCode) + str(grab_result.ErrorDescription))
+                    if meta is not None:
+                        meta[i] = get_frame_metadata(grab_result)
+                    if trace is not None:
+                        trace.frame(0, grab_result)
+                        start = trace.clock()
+                    frame = async_writer.get_buffer(shape, dtype)
+                    self.copy_frame(grab_result, frame)
+                finally:
+                    grab_result.Release()
+
+                if trace is not None:
+                    trace.record(CONVERT, 0, i, start, trace.clock())
+                    start = trace.clock()
+                async_writer.submit(frame_writer, i, frame)
+                if trace is not None:
+                    trace.record(SUBMIT, 0, i, start, trace.clock(), async_writer.pending())
                 i += 1
+        except BaseException:
+            # an error of the writer threads must not hide the error of the grab loop
+            raise_errors = False
+            raise
+        finally:
+            cam.StopGrabbing()
+            try:
+                report = async_writer.close(raise_errors)
+            finally:
+                frame_writer.close()
+                if meta is not None:
+                    np.save(metadata_path, meta[:i])
 
-                r = self.post_processing(grab_result)
-                
-                img = pypylon.pylon.PylonImage(r)
-                img.Save(pypylon.pylon.ImageFileFormat_Tiff, filename)
-                img.Release()
-                
-                grab_result.Release()
-            else:
-                raise DeviceError("Error when grabbing images: " +
-                                  str(grab_result.ErrorCode) + str(grab_result.ErrorDescription))
+        return report
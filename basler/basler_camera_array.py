@@ -1,5 +1,19 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 import numpy as np
-from .basler_camera import BaslerCamera
+from .acquisition import (ACQUISITION_DEFAULTS, apply_buffer_settings, check_acquisition_settings,
+                          get_grab_settings, size_buffer_pool)
+from .basler_camera import BaslerCamera, DeviceError, GrabTimeoutError
+from .backend import get_default_backend, is_available
+from .bandwidth import GIGABIT_ETHERNET, plan_bandwidth
+from .events import FrameEventHandler
+from .metadata import FRAME_METADATA_DTYPE, empty_metadata, get_frame_metadata
+from .reduce import FrameReducer
+from .stream import FrameStream
+from .trace import CONVERT, RETRIEVE, SUBMIT
+from .sync import FrameSetAssembler
+from .writers import AsyncFrameWriter, RawFileWriter, get_writer
 import pypylon
 
 
@@ -11,22 +25,30 @@ class BaslerCameraArray:
 
     """
 
-    _TIME_OUT = 2000
+    # the default timeout in milliseconds of the acquisition settings, see set_acquisition_settings
+    _TIME_OUT = ACQUISITION_DEFAULTS['timeout']
 
-    def __init__(self, devices_info):
+    def __init__(self, devices_info, backend=None):
 
         """The constructor of the array.
         
         :param devices_info: a list of camera device info stored as dictionaries that has IP address
             or serial number.
+        :param backend: the backend that provides the cameras, e.g. a :class:`~basler.sim.SimulatedBackend`;
+            by default the backend of :func:`~basler.backend.get_default_backend` (pylon)
 
         Examples:
         ``devices_info = [{'serial_number': '21939024'}, {'ip': '192.168.0.31'}]``
         """
 
+        self._backend = backend if backend is not None else get_default_backend()
         self._camera_array = None
         self._device_info_objects = []
         self._converter = None
+        self._capabilities = []
+        self._handlers = []
+        self._trace = None
+        self._acquisition = dict(ACQUISITION_DEFAULTS, timeout=self._TIME_OUT)
 
         for device_info in devices_info:
             info = pypylon.pylon.CDeviceInfo()
@@ -54,18 +76,37 @@ class BaslerCameraArray:
         return camera
 
     def connect(self):
-        tlf = pypylon.pylon.TlFactory.GetInstance()
+
+        """create and open the devices of all cameras concurrently, which saves most of the start-up time of
+        arrays of GigE cameras. With the pylon backend, the devices are created from the cached enumeration of
+        :class:`~basler.helper.BaslerCameraManager`.
+        """
+
         num_devices = len(self._device_info_objects)
-        self._camera_array = pypylon.pylon.InstantCameraArray(num_devices)
-        for idx, device_info in enumerate(self._device_info_objects):
-            self._camera_array[idx].Attach(tlf.CreateDevice(device_info))
-        self._camera_array.Open()
+        self._camera_array = self._backend.create_camera_array(num_devices)
+        cameras = [self._camera_array[idx] for idx in range(num_devices)]
+        try:
+            with ThreadPoolExecutor(max(num_devices, 1)) as executor:
+                devices = list(executor.map(self._backend.create_device, self._device_info_objects))
+                for camera, device in zip(cameras, devices):
+                    camera.Attach(device)
+                list(executor.map(lambda camera: camera.Open(), cameras))
+                self._capabilities = list(executor.map(BaslerCamera.get_capabilities_helper, cameras))
+            for camera in cameras:
+                apply_buffer_settings(camera, self._acquisition)
+        except Exception:
+            self._camera_array.Close()
+            self._camera_array = None
+            raise
 
     def disconnect(self):
         
+        if self._handlers:
+            self.stop_callback()
         camera_array = self._get_camera_array()
         camera_array.Close()
         self._camera_array = None
+        self._capabilities = []
 
     # ----------------------- getter -----------------------------------
 
@@ -85,7 +126,7 @@ class BaslerCameraArray:
         :param cam_id: camera ID
         """
         cam = self._get_camera_by_id(cam_id)
-        exposure_time = BaslerCamera.get_exposure_time(cam)
+        exposure_time = BaslerCamera.get_exposure_time_helper(cam, self._capabilities[cam_id])
         return exposure_time
 
     def get_resulting_framerate(self, cam_id:int):
@@ -94,25 +135,149 @@ class BaslerCameraArray:
         :param cam_id: camera ID
         """
         cam = self._get_camera_by_id(cam_id)
-        framerate = BaslerCamera.get_resulting_framerate(cam)
+        framerate = BaslerCamera.get_resulting_framerate_helper(cam, self._capabilities[cam_id])
         return framerate
 
+    def get_capabilities(self, cam_id: int):
+        """return the names of the feature nodes supported by a certain camera, resolved once at :func:`connect`.
+
+        :param cam_id: camera ID
+
+        See the :func:`~basler.BaslerCamera.get_capabilities` of the BaslerCamera class for details.
+        """
+        self._get_camera_by_id(cam_id)
+        return dict(self._capabilities[cam_id])
+
     # ----------------------- setter -----------------------------------
 
-    def set_converter(self, convert=True):
+    def set_converter(self, convert=True, engine: str = 'pylon', msb_align: bool = True):
 
         """when saving TIFF files, always use a 16-bit format with the most significant bit (MSB)
         aligned.
 
         :param convert: a boolean
+        :param engine: ``'pylon'`` or ``'numpy'``
+        :param msb_align: align the most significant bit; if ``False``, keep the raw values
+
+        See the :func:`~basler.BaslerCamera.set_converter` of the BaslerCamera class for details.
         """
 
-        if convert:
-            self._converter = pypylon.pylon.ImageFormatConverter()
-            self._converter.OutputPixelFormat = pypylon.pylon.PixelType_Mono16
-            self._converter.OutputBitAlignment = pypylon.pylon.OutputBitAlignment_MsbAligned
-        else:
-            self._converter = None
+        self._converter = BaslerCamera.get_converter_helper(convert, engine, msb_align, self._backend)
+
+    def set_trace(self, trace=None):
+
+        """record the stages of the grab loops of all cameras (e.g. :func:`grab_many` and :func:`grab_n_save`)
+        into a trace, or stop tracing if ``trace`` is ``None``. Events carry the camera ID.
+
+        See the :func:`~basler.BaslerCamera.set_trace` of the BaslerCamera class for details.
+        """
+
+        self._trace = trace
+
+    def get_trace(self):
+        """return the trace set with :func:`set_trace`, or ``None``"""
+        return self._trace
+
+    def set_acquisition_settings(self, **settings):
+
+        """set how the frames of all cameras are buffered and waited for. With ``timeout_handling='return'``,
+        a timeout of all cameras ends the acquisition with the frames captured so far.
+
+        See the :func:`~basler.BaslerCamera.set_acquisition_settings` of the BaslerCamera class for details.
+        """
+
+        acquisition = check_acquisition_settings(settings, self._acquisition)
+        if self._camera_array is not None:
+            for i in range(self._camera_array.GetSize()):
+                apply_buffer_settings(self._camera_array[i], acquisition)
+        self._acquisition = acquisition
+
+    def get_acquisition_settings(self) -> dict:
+        """return the acquisition settings; see :func:`set_acquisition_settings`"""
+        return dict(self._acquisition)
+
+    def size_buffer_pool(self, stall_tolerance: float, framerate: float = None, headroom: int = 2,
+                         memory_limit: int = None, apply: bool = True) -> list:
+
+        """size the grab buffers of every camera so that the consumer can stall for ``stall_tolerance`` seconds
+        without losing frames. The settings are shared by all cameras, so the largest pool is applied.
+
+        :param memory_limit: if given, the maximum memory of the pool of each camera in bytes
+        :return: a list of dictionaries, one per camera; see :func:`~basler.acquisition.size_buffer_pool`
+
+        See the :func:`~basler.BaslerCamera.size_buffer_pool` of the BaslerCamera class for the other parameters.
+        """
+
+        camera_array = self._get_camera_array()
+        pools = []
+        for i in range(camera_array.GetSize()):
+            cam = camera_array[i]
+            camera_framerate = framerate if framerate is not None else \
+                BaslerCamera.get_framerate_limit_helper(cam, self._capabilities[i])
+            pools.append(size_buffer_pool(cam.PayloadSize.GetValue(), camera_framerate, stall_tolerance, headroom,
+                                          memory_limit))
+        if apply and pools:
+            self.set_acquisition_settings(max_num_buffer=max(pool['max_num_buffer'] for pool in pools),
+                                          max_buffer_size=max(pool['max_buffer_size'] for pool in pools))
+        return pools
+
+    def plan_bandwidth(self, link_capacity: float = GIGABIT_ETHERNET, margin: float = 0.1, packet_size: int = 1500,
+                       framerates: list = None, apply: bool = True) -> dict:
+
+        """share the capacity of the link between the GigE cameras of the array by setting their packet size
+        (``GevSCPSPacketSize``), inter-packet delay (``GevSCPD``) and frame transmission delay (``GevSCFTD``);
+        see :func:`~basler.bandwidth.plan_bandwidth`. The cameras must not be grabbing.
+
+        :param link_capacity: the capacity of the link shared by the cameras, in bytes per second
+        :param margin: the fraction of the capacity kept free
+        :param packet_size: the packet size, limited to what each camera supports. Packets larger than 1500 bytes
+            require jumbo frames on the network card and the switches.
+        :param framerates: the frame rate of each camera in Hz; by default their resulting frame rates
+        :param apply: set the nodes of the cameras
+        :return: the plan of :func:`~basler.bandwidth.plan_bandwidth`; with ``apply``, each camera also has the
+            ``report`` of :func:`configure`
+
+        Example:
+
+        ``plan = array.plan_bandwidth(framerates=[30, 30, 60])``
+        ``if not plan['fits']: print([camera['achievable_framerate'] for camera in plan['cameras']])``
+        """
+
+        camera_array = self._get_camera_array()
+
+        size = camera_array.GetSize()
+        if framerates is not None and len(framerates) != size:
+            raise ValueError(f'Expected {size} frame rates, got {len(framerates)}')
+
+        cameras = []
+        for i in range(size):
+            cam = camera_array[i]
+            node_map = cam.GetNodeMap()
+            packet_size_node = node_map.GetNode('GevSCPSPacketSize')
+            if not is_available(packet_size_node):
+                raise RuntimeError(f'Camera {i} is not a GigE camera')
+            camera_packet_size = min(max(packet_size, packet_size_node.GetMin()), packet_size_node.GetMax())
+            camera_packet_size -= (camera_packet_size - packet_size_node.GetMin()) % packet_size_node.GetInc()
+
+            camera = {'packet_size': camera_packet_size,
+                      'framerate': framerates[i] if framerates is not None else
+                      BaslerCamera.get_framerate_limit_helper(cam, self._capabilities[i])}
+            if is_available(node_map.GetNode('PayloadSize')):
+                camera['payload_size'] = cam.PayloadSize.GetValue()
+            else:
+                camera.update(width=cam.Width.GetValue(), height=cam.Height.GetValue(),
+                              pixel_format=cam.PixelFormat.GetValue())
+            if is_available(node_map.GetNode('GevTimestampTickFrequency')):
+                camera['tick_frequency'] = cam.GevTimestampTickFrequency.GetValue()
+            cameras.append(camera)
+
+        plan = plan_bandwidth(cameras, link_capacity, margin, packet_size)
+        if apply:
+            for i, camera in enumerate(plan['cameras']):
+                camera['report'] = BaslerCamera.configure_helper(
+                    camera_array[i], {'GevSCPSPacketSize': camera['packet_size'], 'GevSCPD': camera['packet_delay'],
+                                      'GevSCFTD': camera['frame_delay']}, self._capabilities[i])
+        return plan
 
     def set_pixel_format(self, cam_id: int, pixel_format_string: str):
 
@@ -139,7 +304,7 @@ class BaslerCameraArray:
         """
 
         cam = self._get_camera_by_id(cam_id)
-        BaslerCamera.set_acquisition_framerate_helper(cam, framerate)
+        BaslerCamera.set_acquisition_framerate_helper(cam, framerate, self._capabilities[cam_id])
 
     def set_exposure_time(self, cam_id: int, exposure_time: float):
 
@@ -154,7 +319,7 @@ class BaslerCameraArray:
         """
 
         cam = self._get_camera_by_id(cam_id)
-        BaslerCamera.set_exposure_time_helper(cam, exposure_time)
+        BaslerCamera.set_exposure_time_helper(cam, exposure_time, self._capabilities[cam_id])
 
     def set_aoi(self, cam_id: int, aoi: tuple):
 
@@ -168,23 +333,81 @@ class BaslerCameraArray:
         
         BaslerCamera.set_aoi_helper(cam, aoi)
 
+    def configure(self, settings) -> list:
+
+        """apply several settings to the cameras, all cameras in parallel.
+
+        :param settings: either one dictionary applied to every camera, or a list of dictionaries, one per camera
+            (``None`` or ``{}`` leaves a camera unchanged). See :func:`~basler.BaslerCamera.configure` of the
+            BaslerCamera class for the keys and the order in which they are applied.
+        :return: a list of reports, one per camera, with the keys ``applied`` and ``failed``
+
+        Example:
+
+        ``cam_array.configure({'pixel_format': 'Mono12', 'aoi': (0, 0, 800, 800), 'exposure_time': 10})``
+        """
+
+        camera_array = self._get_camera_array()
+        size = camera_array.GetSize()
+        if isinstance(settings, dict):
+            settings = [settings] * size
+        elif len(settings) != size:
+            raise ValueError(f'Expected {size} settings, got {len(settings)}')
+
+        with ThreadPoolExecutor(max(size, 1)) as executor:
+            return list(executor.map(
+                lambda i: BaslerCamera.configure_helper(camera_array[i], settings[i] or {}, self._capabilities[i]),
+                range(size)))
+
+    # ----------------------- snapshot ---------------------------------
+
+    def get_snapshots(self) -> list:
+
+        """return a list of :class:`~basler.snapshot.FeatureSnapshot`, one per camera; save them with
+        :func:`~basler.snapshot.save_snapshots`
+        """
+
+        camera_array = self._get_camera_array()
+        return [BaslerCamera.get_snapshot_helper(camera_array[i], self._capabilities[i])
+                for i in range(camera_array.GetSize())]
+
+    def apply_snapshots(self, snapshots: list) -> list:
+
+        """restore the configuration of a list of snapshots, one per camera (``None`` leaves a camera
+        unchanged), all cameras in parallel, writing only the nodes whose current value differs.
+
+        :return: a list of reports, one per camera; see :func:`~basler.BaslerCamera.apply_snapshot`
+        """
+
+        camera_array = self._get_camera_array()
+        size = camera_array.GetSize()
+        if len(snapshots) != size:
+            raise ValueError(f'Expected {size} snapshots, got {len(snapshots)}')
+
+        def apply(i):
+            if snapshots[i] is None:
+                return {'applied': [], 'failed': {}, 'unchanged': []}
+            return BaslerCamera.apply_snapshot_helper(camera_array[i], snapshots[i], self._capabilities[i])
+
+        with ThreadPoolExecutor(max(size, 1)) as executor:
+            return list(executor.map(apply, range(size)))
+
     # ----------------------- helper -----------------------------------
 
     def post_processing(self, grab_result):
-
-        if self._converter is not None:
-            target_image = self._converter.Convert(grab_result)
-        else:
-            target_image = pypylon.pylon.PylonImage()
-            target_image.AttachGrabResultBuffer(grab_result)
-        
-        return target_image
+        """return a successful grab result as a ``pypylon.pylon.PylonImage``, converted by the converter of
+        :func:`set_converter` if it is active (see :func:`~basler.BaslerCamera.post_processing`)
+        """
+        return BaslerCamera.post_processing_helper(grab_result, self._converter)
 
     # --------------------------- grabbing -----------------------------
     
     def grab_one(self):
 
-        """grab one frame from each camera as a list of numpy arrays"""
+        """grab one frame from each camera as a list of numpy arrays.
+
+        The cameras are read one after another; see :func:`snapshot` to capture them simultaneously.
+        """
 
         camera_array = self._get_camera_array()
 
@@ -193,19 +416,168 @@ class BaslerCameraArray:
         result = []
 
         for i in range(size):
-            grab_result = camera_array[i].GrabOne(self._TIME_OUT)
-            image_array = self.post_processing(grab_result).GetArray()
-            grab_result.Release()
+            grab_result = BaslerCamera.timeout_helper(camera_array[i].GrabOne, self._acquisition['timeout'])
+            try:
+                if not grab_result.GrabSucceeded():
+                    raise DeviceError("Error when grabbing images: " +
+                                      str(grab_result.ErrorCode) + str(grab_result.ErrorDescription))
+                image_array = np.empty((grab_result.Height, grab_result.Width),
+                                       dtype=BaslerCamera.get_frame_dtype_helper(camera_array[i], self._converter))
+                BaslerCamera.copy_frame_helper(grab_result, image_array, self._converter)
+            finally:
+                grab_result.Release()
             result.append(image_array)
 
         return result
 
-    def grab_many(self, n: int):
+    def _grab_results(self, camera_array, frames_captured, max_frames: int = None, grab_strategy=None,
+                      on_started=None):
+
+        """start grabbing on every camera and iterate over ``(camera_no, index, grab_result)``, where ``index``
+        counts the frames of each camera from 0.
+
+        Each camera is limited to ``max_frames`` at the transport level and stops on its own while the others
+        finish. A grab result is released as soon as the consumer asks for the next one, so it must not be
+        used afterwards. ``frames_captured`` is updated in place with the number of frames of each camera.
+        ``on_started``, if given, is called with the list of cameras once all of them are grabbing.
+        ``grab_strategy`` defaults to the strategy of the acquisition settings; when no frame arrives within their
+        timeout, a ``GrabTimeoutError`` is raised or the iteration ends, depending on their timeout handling.
+        """
+
+        default_strategy, timeout, timeout_handling = get_grab_settings(self._acquisition)
+        if grab_strategy is None:
+            grab_strategy = default_strategy
+        size = camera_array.GetSize()
+        cameras = [camera_array[i] for i in range(size)]
+
+        wait_objects = self._backend.create_wait_objects()
+        for cam in cameras:
+            wait_objects.Add(cam.GetGrabResultWaitObject())
+
+        try:
+            for cam in cameras:
+                if max_frames is None:
+                    cam.StartGrabbing(grab_strategy)
+                else:
+                    cam.StartGrabbingMax(max_frames, grab_strategy)
+            if on_started is not None:
+                on_started(cameras)
+
+            # the retrieve stage of a frame spans from the end of the previous frame to its retrieval
+            trace = self._trace
+            if trace is not None:
+                start = trace.clock()
+
+            while any(cam.IsGrabbing() for cam in cameras):
+
+                if not wait_objects.WaitForAny(timeout):
+                    if timeout_handling == pypylon.pylon.TimeoutHandling_Return:
+                        return
+                    raise GrabTimeoutError(f'Timeout when grabbing images; frames captured per camera: '
+                                           f'{list(frames_captured)}')
+
+                for camera_no, cam in enumerate(cameras):
+                    if not cam.IsGrabbing():
+                        continue
+                    grab_result = cam.RetrieveResult(0, pypylon.pylon.TimeoutHandling_Return)
+                    if not grab_result.IsValid():
+                        continue
+                    try:
+                        if not grab_result.GrabSucceeded():
+                            raise DeviceError("Error when grabbing images: " +
+                                              str(grab_result.ErrorCode) + str(grab_result.ErrorDescription))
+                        if trace is not None:
+                            trace.record(RETRIEVE, camera_no, frames_captured[camera_no], start, trace.clock(),
+                                         trace.ready_buffers(cam))
+                            trace.frame(camera_no, grab_result)
+                        yield camera_no, frames_captured[camera_no], grab_result
+                    finally:
+                        grab_result.Release()
+                    frames_captured[camera_no] += 1
+                    if trace is not None:
+                        start = trace.clock()
+        finally:
+            for cam in cameras:
+                cam.StopGrabbing()
+
+    def snapshot(self, software_trigger: bool = True):
+
+        """grab one frame from every camera at (nearly) the same time, and collect the frames concurrently.
+
+        With ``software_trigger``, the cameras are switched to software triggering, armed, and then triggered
+        together, so the snapshot takes about as long as the slowest camera rather than the sum of all cameras.
+        The previous trigger settings are restored afterwards. Otherwise, all cameras simply start grabbing
+        together and the first frame of each is kept.
+
+        :param software_trigger: trigger all cameras with a software trigger broadcast
+        :return: a tuple ``(frames, metadata)``: a list of numpy arrays, one per camera, and a structured array
+            with one record of :data:`~basler.metadata.FRAME_METADATA_DTYPE` per camera (e.g. ``timestamp``)
+        """
+
+        camera_array = self._get_camera_array()
+
+        size = camera_array.GetSize()
+
+        result = [None] * size
+        meta = empty_metadata(size)
+        frames_captured = np.zeros(size, dtype=int)
+        trigger_settings = []
+        on_started = None
+
+        try:
+            if software_trigger:
+                for i in range(size):
+                    cam = camera_array[i]
+                    trigger_selector = cam.TriggerSelector.GetValue()
+                    cam.TriggerSelector.SetValue('FrameStart')
+                    trigger_settings.append((trigger_selector, cam.TriggerMode.GetValue(),
+                                             cam.TriggerSource.GetValue()))
+                    cam.TriggerMode.SetValue('On')
+                    cam.TriggerSource.SetValue('Software')
+                on_started = self._trigger_all
+
+            with closing(self._grab_results(camera_array, frames_captured, 1,
+                                            on_started=on_started)) as grab_results:
+                for camera_no, i, grab_result in grab_results:
+                    meta[camera_no] = get_frame_metadata(grab_result)
+                    result[camera_no] = np.empty((grab_result.Height, grab_result.Width),
+                                                 dtype=BaslerCamera.get_frame_dtype_helper(camera_array[camera_no],
+                                                                                           self._converter))
+                    BaslerCamera.copy_frame_helper(grab_result, result[camera_no], self._converter)
+        finally:
+            for i, (trigger_selector, trigger_mode, trigger_source) in enumerate(trigger_settings):
+                cam = camera_array[i]
+                cam.TriggerSelector.SetValue('FrameStart')
+                cam.TriggerSource.SetValue(trigger_source)
+                cam.TriggerMode.SetValue(trigger_mode)
+                cam.TriggerSelector.SetValue(trigger_selector)
+
+        return result, meta
+
+    def _trigger_all(self, cameras):
+
+        for cam in cameras:
+            BaslerCamera.timeout_helper(cam.WaitForFrameTriggerReady, self._acquisition['timeout'],
+                                        pypylon.pylon.TimeoutHandling_ThrowException)
+        for cam in cameras:
+            cam.ExecuteSoftwareTrigger()
+
+    def grab_many(self, n: int, out: list = None, metadata: bool = False):
 
         """grab n frames from each camera, and return a list of numpy arrays of shape ``(n, height_i, width_i)``
-        where ``height_i`` and ``width_i`` are the height and width of the i-th camera
+        where ``height_i`` and ``width_i`` are the height and width of the i-th camera.
+        Each array has the dtype of the output of its camera (see :func:`~basler.BaslerCamera.get_frame_dtype`).
+
+        Each camera grabs exactly n frames; a camera that is done stops while the others finish.
 
         :param n: the number of frames
+        :param out: optional list of preallocated arrays, one per camera, to grab into.
+            If ``None``, new arrays are allocated.
+        :param metadata: if ``True``, return a tuple ``(frames, metadata)`` where ``metadata`` is a list of
+            structured arrays, one per camera, of n records of :data:`~basler.metadata.FRAME_METADATA_DTYPE`
+
+        With ``timeout_handling='return'`` (see :func:`set_acquisition_settings`), a timeout ends the grab and
+        the arrays only hold the frames captured so far.
         """
 
         camera_array = self._get_camera_array()
@@ -213,42 +585,277 @@ class BaslerCameraArray:
         size = camera_array.GetSize()
 
         result = []
+        meta = [empty_metadata(n) for _ in range(size)] if metadata else None
         frames_captured = np.zeros(size, dtype=int)
 
+        if out is not None and len(out) != size:
+            raise ValueError(f'Expected {size} output arrays, got {len(out)}')
+
         for i in range(size): # pre allocate array memory
+            r = BaslerCamera.allocate_frames_helper(camera_array[i], n, self._converter,
+                                                    None if out is None else out[i])
+            result.append(r)
+
+        trace = self._trace
+        with closing(self._grab_results(camera_array, frames_captured, n)) as grab_results:
+            for camera_no, i, grab_result in grab_results:
+                if meta is not None:
+                    meta[camera_no][i] = get_frame_metadata(grab_result)
+                if trace is not None:
+                    start = trace.clock()
+                BaslerCamera.copy_frame_helper(grab_result, result[camera_no][i], self._converter)
+                if trace is not None:
+                    trace.record(CONVERT, camera_no, i, start, trace.clock())
+
+        if (frames_captured < n).any():
+            result = [r[:count] for r, count in zip(result, frames_captured)]
+            if meta is not None:
+                meta = [m[:count] for m, count in zip(meta, frames_captured)]
+        if meta is not None:
+            return result, meta
+        return result
+
+    def grab_reduce(self, n: int, ops=('mean',), ddof: int = 0):
+
+        """grab n frames from each camera and return per-pixel statistics of each camera, accumulated frame by
+        frame as they arrive.
+
+        :param n: the number of frames per camera
+        :return: a list of dictionaries, one per camera, with an array of shape ``(height_i, width_i)`` for each
+            statistic
+
+        See :func:`~basler.BaslerCamera.grab_reduce` of the BaslerCamera class for the other parameters.
+        """
+
+        camera_array = self._get_camera_array()
+
+        size = camera_array.GetSize()
+
+        frames = [BaslerCamera.allocate_frames_helper(camera_array[i], 1, self._converter)[0] for i in range(size)]
+        reducers = [FrameReducer(frame.shape, ops, ddof) for frame in frames]
+        frames_captured = np.zeros(size, dtype=int)
+
+        with closing(self._grab_results(camera_array, frames_captured, n)) as grab_results:
+            for camera_no, i, grab_result in grab_results:
+                BaslerCamera.copy_frame_helper(grab_result, frames[camera_no], self._converter)
+                reducers[camera_no].add(frames[camera_no])
+
+        return [reducer.result() for reducer in reducers]
+
+    def grab_to_memmap(self, n: int, paths: list, flush_every: int = None, fsync: bool = False):
+
+        """grab n frames from each camera directly into one memory-mapped ``.npy`` file per camera.
+
+        :param n: the number of frames per camera
+        :param paths: a list of paths of the ``.npy`` files, one per camera
+        :return: a list of ``numpy.memmap`` of shape ``(n, height_i, width_i)``
+
+        See :func:`~basler.BaslerCamera.grab_to_memmap` of the BaslerCamera class for the other parameters.
+        """
+
+        camera_array = self._get_camera_array()
+
+        size = camera_array.GetSize()
+
+        frames_captured = np.zeros(size, dtype=int)
+        writers = []
+        for i in range(size):
             cam = camera_array[i]
+            frame_writer = RawFileWriter(paths[i])
+            frame_writer.open(n, (cam.Height.GetValue(), cam.Width.GetValue()),
+                              BaslerCamera.get_frame_dtype_helper(cam, self._converter))
+            writers.append(frame_writer)
+
+        try:
+            with closing(self._grab_results(camera_array, frames_captured, n)) as grab_results:
+                for camera_no, i, grab_result in grab_results:
+                    frame_writer = writers[camera_no]
+                    BaslerCamera.copy_frame_helper(grab_result, frame_writer.frames[i], self._converter)
+                    frame_writer.mark_written()
+                    if flush_every and (i + 1) % flush_every == 0:
+                        frame_writer.flush(fsync)
+        finally:
+            for frame_writer in writers:
+                frame_writer.close(fsync)
+
+        return [frame_writer.frames for frame_writer in writers]
+
+    def stream(self, max_frames: int = None, duration: float = None, strategy: str = None,
+               pool_size: int = None, metadata: bool = False):
+
+        """grab continuously from all cameras and iterate over ``(cam_id, frame)`` tuples (or
+        ``(cam_id, frame, record)`` tuples if ``metadata`` is ``True``) until the consumer stops, or until one
+        of the bounds is reached. The returned stream can also be used as a context manager; grabbing is stopped
+        when it is exhausted, closed or garbage collected.
+
+        :param max_frames: optional maximum number of frames per camera
+        :param duration: optional maximum duration in seconds
+
+        See :func:`~basler.BaslerCamera.stream` of the BaslerCamera class for the other parameters.
+        """
 
-            width = cam.Width.GetValue()
-            height = cam.Height.GetValue()
-            r = np.zeros([n, height, width])
-            result.append(r)
+        camera_array = self._get_camera_array()
+        grab_strategy = get_grab_settings(self._acquisition, strategy)[0]
+        return FrameStream(self._stream(camera_array, max_frames, duration, grab_strategy, pool_size, metadata))
 
-        camera_array.StartGrabbing()
+    def _stream(self, camera_array, max_frames, duration, grab_strategy, pool_size, metadata):
 
-        while True:
+        size = camera_array.GetSize()
 
-            if (not camera_array.IsGrabbing()) or np.all(frames_captured >= n):
-                break
-        
-            grab_result = camera_array.RetrieveResult(self._TIME_OUT, pypylon.pylon.TimeoutHandling_ThrowException)
-            camera_no = grab_result.GetCameraContext()
-            image_array = self.post_processing(grab_result).GetArray()
-            
-            result[camera_no][frames_captured[camera_no], :, :] = image_array
-            frames_captured[camera_no] += 1
+        shapes = []
+        dtypes = []
+        pools = []
+        for i in range(size):
+            cam = camera_array[i]
+            shapes.append((cam.Height.GetValue(), cam.Width.GetValue()))
+            dtypes.append(BaslerCamera.get_frame_dtype_helper(cam, self._converter))
+            pools.append(None if pool_size is None else np.empty((pool_size,) + shapes[i], dtype=dtypes[i]))
 
-        camera_array.StopGrabbing()
+        frames_captured = np.zeros(size, dtype=int)
+        deadline = None if duration is None else time.monotonic() + duration
+
+        with closing(self._grab_results(camera_array, frames_captured, max_frames, grab_strategy)) as grab_results:
+            for camera_no, i, grab_result in grab_results:
+
+                frame = np.empty(shapes[camera_no], dtype=dtypes[camera_no]) if pool_size is None \
+                    else pools[camera_no][i % pool_size]
+                BaslerCamera.copy_frame_helper(grab_result, frame, self._converter)
+                if metadata:
+                    record = np.array(get_frame_metadata(grab_result), dtype=FRAME_METADATA_DTYPE)[()]
+
+                yield (camera_no, frame, record) if metadata else (camera_no, frame)
+
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+
+    def stream_sets(self, max_sets: int = None, duration: float = None, key: str = 'image_number',
+                    tolerance: float = 0, window: int = 8, strategy: str = None):
+
+        """grab continuously from all cameras and iterate over synchronized frame sets, i.e. one frame per camera
+        for the same trigger, matched by frame number or by timestamp.
+
+        :param max_sets: optional maximum number of sets (complete or not)
+        :param duration: optional maximum duration in seconds
+        :param key: the metadata field used to match frames: ``'image_number'`` (default; requires the cameras
+            to be triggered together from the start), ``'block_id'``, ``'timestamp'`` (requires synchronized
+            camera clocks, e.g. PTP) or ``'host_time'``
+        :param tolerance: the maximum difference between the keys of frames of the same set, e.g. in timestamp
+            ticks
+        :param window: the maximum number of incomplete sets kept in memory while waiting for slower cameras
+        :param strategy: the pylon grab strategy; see :func:`~basler.stream.get_grab_strategy`. By default the
+            strategy of :func:`set_acquisition_settings`.
+        :return: a :class:`~basler.stream.FrameStream` of :class:`~basler.sync.FrameSet`. Sets that miss
+            frames from some cameras are yielded with ``complete = False``.
+        """
 
-        return result
+        camera_array = self._get_camera_array()
+        grab_strategy = get_grab_settings(self._acquisition, strategy)[0]
+        assembler = FrameSetAssembler(camera_array.GetSize(), key, tolerance, window)
+        return FrameStream(self._stream_sets(camera_array, max_sets, duration, grab_strategy, assembler))
+
+    def _stream_sets(self, camera_array, max_sets, duration, grab_strategy, assembler):
+
+        sets_yielded = 0
+        with closing(self._stream(camera_array, None, duration, grab_strategy, None, True)) as frames:
+            for camera_no, frame, record in frames:
+                for frame_set in assembler.add(camera_no, frame, record):
+                    yield frame_set
+                    sets_yielded += 1
+                    if max_sets is not None and sets_yielded >= max_sets:
+                        return
+        for frame_set in assembler.flush():
+            if max_sets is not None and sets_yielded >= max_sets:
+                return
+            yield frame_set
+            sets_yielded += 1
+
+    def start_callback(self, callback, strategy: str = None, num_threads: int = 0, queue_size: int = 64,
+                       overflow: str = 'block'):
+
+        """start grabbing on all cameras in the background and call a callback for every frame from pylon's grab
+        threads, until :func:`stop_callback` is called.
+
+        :param callback: either one function called as ``callback(cam_id, frame, record)`` for the frames of all
+            cameras, or a list of functions, one per camera, called as ``callback(frame, record)``
+        :param num_threads: the number of worker threads per camera; 0 calls the callbacks on the grab threads
+
+        See :func:`~basler.BaslerCamera.start_callback` of the BaslerCamera class for the other parameters
+        and the buffer lifetime.
+        """
+
+        camera_array = self._get_camera_array()
+        if self._handlers:
+            raise RuntimeError('Callback grabbing is already running')
+
+        size = camera_array.GetSize()
+        if isinstance(callback, (list, tuple)) and len(callback) != size:
+            raise ValueError(f'Expected {size} callbacks, got {len(callback)}')
+
+        grab_strategy = get_grab_settings(self._acquisition, strategy)[0]
+        copy_frame = None if self._converter is None else \
+            lambda grab_result, dest: BaslerCamera.copy_frame_helper(grab_result, dest, self._converter)
+
+        for i in range(size):
+            cam = camera_array[i]
+            if isinstance(callback, (list, tuple)):
+                handler = FrameEventHandler(callback[i], None, copy_frame,
+                                            BaslerCamera.get_frame_dtype_helper(cam, self._converter),
+                                            num_threads, queue_size, overflow)
+            else:
+                handler = FrameEventHandler(callback, i, copy_frame,
+                                            BaslerCamera.get_frame_dtype_helper(cam, self._converter),
+                                            num_threads, queue_size, overflow)
+            cam.RegisterImageEventHandler(handler, pypylon.pylon.RegistrationMode_Append,
+                                          pypylon.pylon.Cleanup_None)
+            self._handlers.append(handler)
+
+        for i in range(size):
+            camera_array[i].StartGrabbing(grab_strategy, pypylon.pylon.GrabLoop_ProvidedByInstantCamera)
+
+    def stop_callback(self) -> list:
 
-    def grab_n_save(self, n: int, save_patterns: list, n_start: list = None):
+        """stop the grabbing started by :func:`start_callback` and wait for the worker threads.
+
+        :return: a list of dictionaries, one per camera, with the number of ``frames`` passed to the callback
+            and ``dropped``
+        """
+
+        camera_array = self._get_camera_array()
+        if not self._handlers:
+            raise RuntimeError('Callback grabbing is not running')
+
+        handlers = self._handlers
+        self._handlers = []
+        for i, handler in enumerate(handlers):
+            camera_array[i].StopGrabbing()
+            camera_array[i].DeregisterImageEventHandler(handler)
+        return [handler.close() for handler in handlers]
+
+    def grab_n_save(self, n: int, save_patterns: list, n_start: list = None,
+                    num_threads: int = 1, queue_size: int = 64, overflow: str = 'block', writer: str = 'tiff',
+                    metadata_paths: list = None):
     
-        r"""grab n frames and save them sequentially as TIFF files
+        r"""grab n frames and save them sequentially as TIFF files, or into one container file per camera
+        (see ``writer``).
+
+        Frames are copied out of the grab results and written by background threads shared by all cameras,
+        so that slow disk I/O does not stall the cameras.
 
         :param n: the number of frames to grab for each camera
         :param save_patterns: a list of strings where each contains one single '%d' as the number.
+            For the container writers, the paths of the output files. Items can also be
+            :class:`~basler.writers.FrameWriter` instances.
         :param n_start: a list of integers indicating the start number of the filename.
             Default is ``[1, 1, ...]``, i.e. 1 for each camera.
+        :param num_threads: the number of writer threads
+        :param queue_size: the maximum number of frames waiting to be written
+        :param overflow: ``'block'``, ``'drop_oldest'`` or ``'fail'``; see :class:`~basler.writers.AsyncFrameWriter`
+        :param writer: ``'tiff'`` (one file per frame, the default), ``'multipage_tiff'``, ``'raw'`` or ``'hdf5'``;
+            see :func:`~basler.writers.get_writer`
+        :param metadata_paths: if given, a list of ``.npy`` paths, one per camera, where the per-frame metadata
+            (see :data:`~basler.metadata.FRAME_METADATA_DTYPE`) is saved
+        :return: a dictionary with the number of frames ``written`` and ``dropped``, and the list of
+            ``frames_captured`` per camera
         
         Example:
         
@@ -266,27 +873,53 @@ class BaslerCameraArray:
         if n_start is None:
             n_start = np.ones(size, dtype=int)
 
-        camera_array.StartGrabbing()
-
-        while True:
-
-            if (not camera_array.IsGrabbing()) or np.all(frames_captured >= n):
-                break
-        
-            grab_result = camera_array.RetrieveResult(self._TIME_OUT, pypylon.pylon.TimeoutHandling_ThrowException)
-            camera_no = grab_result.GetCameraContext()
-            
-            image = self.post_processing(grab_result)
-            
-            image = pypylon.pylon.PylonImage(image)
-
-            filename = save_patterns[camera_no] % (n_start[camera_no] + frames_captured[camera_no])
-
-            image.Save(pypylon.pylon.ImageFileFormat_Tiff, filename)
-            image.Release()
-                
-            grab_result.Release()
-
-            frames_captured[camera_no] += 1
+        shapes = []
+        dtypes = []
+        writers = []
+        for i in range(size):
+            cam = camera_array[i]
+            shapes.append((cam.Height.GetValue(), cam.Width.GetValue()))
+            dtypes.append(BaslerCamera.get_frame_dtype_helper(cam, self._converter))
+            frame_writer = get_writer(save_patterns[i], writer, n_start[i])
+            if frame_writer.ORDERED and num_threads > 1:
+                raise ValueError(f'{type(frame_writer).__name__} must be used with a single writer thread')
+            writers.append(frame_writer)
 
-        camera_array.StopGrabbing()
+        for i in range(size):
+            writers[i].open(n, shapes[i], dtypes[i])
+        trace = self._trace
+        async_writer = AsyncFrameWriter(num_threads, queue_size, overflow, trace)
+        meta = [empty_metadata(n) for _ in range(size)] if metadata_paths is not None else None
+        raise_errors = True
+
+        try:
+            with closing(self._grab_results(camera_array, frames_captured, n)) as grab_results:
+                for camera_no, i, grab_result in grab_results:
+                    if meta is not None:
+                        meta[camera_no][i] = get_frame_metadata(grab_result)
+                    if trace is not None:
+                        start = trace.clock()
+                    frame = async_writer.get_buffer(shapes[camera_no], dtypes[camera_no])
+                    BaslerCamera.copy_frame_helper(grab_result, frame, self._converter)
+                    if trace is not None:
+                        trace.record(CONVERT, camera_no, i, start, trace.clock())
+                        start = trace.clock()
+                    async_writer.submit(writers[camera_no], i, frame, camera_no)
+                    if trace is not None:
+                        trace.record(SUBMIT, camera_no, i, start, trace.clock(), async_writer.pending())
+        except BaseException:
+            # an error of the writer threads must not hide the error of the grab loop
+            raise_errors = False
+            raise
+        finally:
+            try:
+                report = async_writer.close(raise_errors)
+            finally:
+                for frame_writer in writers:
+                    frame_writer.close()
+                if meta is not None:
+                    for i in range(size):
+                        np.save(metadata_paths[i], meta[i][:frames_captured[i]])
+
+        report['frames_captured'] = frames_captured.tolist()
+        return report
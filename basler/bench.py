@@ -0,0 +1,448 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+import pypylon.pylon
+from .basler_camera import BaslerCamera
+from .basler_camera_array import BaslerCameraArray
+from .helper import BaslerCameraManager
+from .sim import PIXEL_FORMATS, SimulatedBackend
+
+
+OPERATIONS = ('raw', 'grab_one', 'grab_many', 'grab_n_save')
+"""The benchmarked operations. ``'raw'`` is the baseline: a plain pypylon loop (``StartGrabbingMax``,
+``RetrieveResult``, ``GetArray``) on the same camera, without pybasler. With several cameras, the other operations
+are those of :class:`~basler.basler_camera_array.BaslerCameraArray`."""
+
+METRICS = ('fps', 'mb_per_s', 'latency_ms', 'peak_rss_mb', 'rss_delta_mb', 'dropped')
+"""The metrics of a benchmark result:
+
+* ``fps``: frames per second, summed over the cameras
+* ``mb_per_s``: megabytes of output frames per second
+* ``latency_ms``: percentiles (``p50``, ``p90``, ``p99``, ``max``) of the time spent per frame, i.e. the interval
+  between consecutive frames of a camera on the host (the duration of each call for ``grab_one``)
+* ``peak_rss_mb``: the peak resident memory of the process during the run, sampled every few milliseconds
+* ``rss_delta_mb``: the peak resident memory minus the memory before the run
+* ``dropped``: the frames lost by the camera or the grab engine (gaps in the image numbers and skipped images)
+  plus the frames dropped by the writer
+
+The memory metrics are ``None`` where they cannot be measured, i.e. without ``/proc`` (Windows, macOS).
+"""
+
+
+class _RssSampler:
+
+    """sample the resident memory of the process in a thread to find its peak during a run"""
+
+    def __init__(self, interval: float = 0.002):
+        self._interval = interval
+        self._page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+        self._stop = threading.Event()
+        self._thread = None
+        self.start_rss = self.peak_rss = self._read()
+
+    def _read(self) -> int:
+        # without /proc the memory is not measured: ru_maxrss is the peak over the lifetime of the process,
+        # which every run would inherit from the previous ones
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * self._page_size
+        except OSError:
+            return None
+
+    def _run(self):
+        if self.start_rss is None:
+            return
+        while not self._stop.wait(self._interval):
+            self.peak_rss = max(self.peak_rss, self._read())
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        if self.start_rss is not None:
+            self.peak_rss = max(self.peak_rss, self._read())
+
+
+def _percentiles(values) -> dict:
+    if len(values) == 0:
+        return {'p50': None, 'p90': None, 'p99': None, 'max': None}
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {'p50': float(p50), 'p90': float(p90), 'p99': float(p99), 'max': float(np.max(values))}
+
+
+def _lost(metadata) -> int:
+    """return the number of frames missing from a metadata array of one camera"""
+    if len(metadata) == 0:
+        return 0
+    image_numbers = metadata['image_number'].astype(np.int64)
+    gaps = int(image_numbers[-1] - image_numbers[0] + 1 - len(image_numbers))
+    return gaps + int(metadata['skipped_images'].sum())
+
+
+def sweep(operations=OPERATIONS, sizes=((640, 480),), pixel_formats=('Mono8',), converters=('none',),
+          frames=(100,), cameras=(1,), writers=('raw',)) -> list:
+    """return the list of benchmark cases of every combination of the parameters. A case is a dictionary with the
+    keys ``operation``, ``width``, ``height``, ``pixel_format``, ``converter``, ``n``, ``num_cameras`` and
+    ``writer``.
+
+    The writer only varies for ``grab_n_save``, the converter does not apply to ``raw``, packed pixel formats
+    are not run without a converter (they cannot be returned as arrays), and ``raw`` only runs with one camera.
+
+    :param operations: any of :data:`OPERATIONS`
+    :param sizes: a list of ``(width, height)``
+    :param pixel_formats: a list of pixel formats, e.g. ``'Mono8'`` or ``'Mono12p'``
+    :param converters: any of ``'none'``, ``'pylon'``, ``'numpy'``; see
+        :func:`~basler.basler_camera.BaslerCamera.set_converter`
+    :param frames: a list of frame counts
+    :param cameras: a list of camera counts
+    :param writers: the writers of ``grab_n_save``; see :data:`~basler.writers.WRITERS`
+    """
+
+    cases = []
+    for operation, (width, height), pixel_format, n, num_cameras in itertools.product(
+            operations, sizes, pixel_formats, frames, cameras):
+        if operation not in OPERATIONS:
+            raise ValueError(f'Unknown operation {operation!r}, expected one of {OPERATIONS}')
+        if operation == 'raw' and num_cameras != 1:
+            continue
+        for converter in (('none',) if operation == 'raw' else converters):
+            if operation != 'raw' and converter == 'none' and PIXEL_FORMATS.get(pixel_format, (0, 0, None))[2]:
+                continue
+            for writer in (writers if operation == 'grab_n_save' else (None,)):
+                cases.append({'operation': operation, 'width': width, 'height': height,
+                              'pixel_format': pixel_format, 'converter': converter, 'n': n,
+                              'num_cameras': num_cameras, 'writer': writer})
+    return cases
+
+
+def _open(case, backend, framerate):
+    """connect the camera or the camera array of a case and configure it"""
+
+    num_cameras = case['num_cameras']
+    if backend == 'sim':
+        backend = SimulatedBackend(num_devices=num_cameras, width=case['width'], height=case['height'],
+                                   pixel_format=case['pixel_format'], max_framerate=framerate or 1e5)
+        devices_info = [{'serial_number': device.serial_number} for device in backend.devices]
+    elif backend == 'pylon':
+        backend = None
+        devices = BaslerCameraManager.get_devices()
+        if len(devices) < num_cameras:
+            raise RuntimeError(f'{num_cameras} cameras are needed, {len(devices)} are available')
+        devices_info = [{'serial_number': device.GetSerialNumber()} for device in devices[:num_cameras]]
+    else:
+        devices_info = [{'serial_number': device.GetSerialNumber()}
+                        for device in backend.enumerate_devices()[:num_cameras]]
+
+    settings = {'pixel_format': case['pixel_format'], 'aoi': (0, 0, case['width'], case['height']),
+                'exposure_time': 0.01}
+    if framerate is not None:
+        settings['acquisition_framerate'] = framerate
+
+    if num_cameras == 1:
+        device = BaslerCamera(serial_number=devices_info[0]['serial_number'], backend=backend)
+        device.connect()
+        reports = [device.configure(settings)]
+    else:
+        device = BaslerCameraArray(devices_info, backend=backend)
+        device.connect()
+        reports = device.configure(settings)
+    failed = {key: message for report in reports for key, message in report['failed'].items()}
+    if failed:
+        device.disconnect()
+        raise RuntimeError(f'Unable to configure the cameras: {failed}')
+
+    converter = case['converter']
+    if converter in (None, 'none'):
+        device.set_converter(False)
+    else:
+        device.set_converter(True, converter)
+    return device
+
+
+def _run_raw(cam, n):
+    """the baseline: grab with pypylon only"""
+
+    device = cam._get_device()
+    times = np.empty(n)
+    image_numbers = np.empty(n, dtype=np.int64)
+    skipped = 0
+    nbytes = 0
+    i = 0
+    device.StartGrabbingMax(n)
+    try:
+        while device.IsGrabbing():
+            grab_result = device.RetrieveResult(5000, pypylon.pylon.TimeoutHandling_ThrowException)
+            if grab_result.GrabSucceeded():
+                try:
+                    frame = grab_result.GetArray()
+                except Exception:
+                    # packed pixel formats have no array; copy the raw buffer instead
+                    frame = np.frombuffer(grab_result.GetImageMemoryView(), dtype=np.uint8).copy()
+                nbytes += frame.nbytes
+                image_numbers[i] = grab_result.ImageNumber
+                skipped += grab_result.NumberOfSkippedImages
+                times[i] = time.perf_counter()
+                i += 1
+            grab_result.Release()
+    finally:
+        device.StopGrabbing()
+    dropped = int(image_numbers[i - 1] - image_numbers[0] + 1 - i) + skipped if i else 0
+    return i, nbytes, np.diff(times[:i]), dropped
+
+
+def _run_case(case, device, directory):
+    """run the timed part of a case; return ``(frames, bytes, latencies in s, dropped)``"""
+
+    operation, n = case['operation'], case['n']
+    is_array = isinstance(device, BaslerCameraArray)
+
+    if operation == 'raw':
+        return _run_raw(device, n)
+
+    if operation == 'grab_one':
+        latencies = np.empty(n)
+        nbytes = 0
+        for i in range(n):
+            start = time.perf_counter()
+            frames = device.grab_one()
+            latencies[i] = time.perf_counter() - start
+            nbytes += sum(frame.nbytes for frame in frames) if is_array else frames.nbytes
+        return n * case['num_cameras'], nbytes, latencies, 0
+
+    if operation == 'grab_many':
+        frames, metadata = device.grab_many(n, metadata=True)
+        if not is_array:
+            frames, metadata = [frames], [metadata]
+    else:
+        size = case['num_cameras']
+        if case['writer'] == 'tiff':
+            patterns = [os.path.join(directory, f'cam{i}-%06d.tiff') for i in range(size)]
+        else:
+            ext = {'multipage_tiff': 'tiff', 'hdf5': 'h5'}.get(case['writer'], 'npy')
+            patterns = [os.path.join(directory, f'cam{i}.{ext}') for i in range(size)]
+        metadata_paths = [os.path.join(directory, f'cam{i}-metadata.npy') for i in range(size)]
+        if is_array:
+            report = device.grab_n_save(n, patterns, writer=case['writer'], metadata_paths=metadata_paths)
+            dtype = BaslerCamera.get_frame_dtype_helper(device._get_camera_array()[0], device._converter)
+        else:
+            report = device.grab_n_save(n, patterns[0], writer=case['writer'], metadata_path=metadata_paths[0])
+            dtype = device.get_frame_dtype()
+        metadata = [np.load(path) for path in metadata_paths]
+        frame_bytes = case['width'] * case['height'] * np.dtype(dtype).itemsize
+        return (report['written'], report['written'] * frame_bytes,
+                np.concatenate([np.diff(m['host_time']) for m in metadata]),
+                report['dropped'] + sum(_lost(m) for m in metadata))
+
+    return (sum(len(m) for m in metadata), sum(r.nbytes for r in frames),
+            np.concatenate([np.diff(m['host_time']) for m in metadata]), sum(_lost(m) for m in metadata))
+
+
+def run_case(case: dict, backend='sim', repeat: int = 1, framerate: float = None, directory: str = None) -> dict:
+    """run one benchmark case and return its result: the case, the metrics (see :data:`METRICS`) and ``error``,
+    the message of the exception that stopped the case, if any
+
+    :param case: a case of :func:`sweep`
+    :param backend: ``'sim'`` for a :class:`~basler.sim.SimulatedBackend` created for the case, ``'pylon'`` for
+        the cameras found by pylon (real cameras, or pylon's camera emulation with ``PYLON_CAMEMU``), or a
+        backend instance
+    :param repeat: the number of timed runs; the metrics are those of the run with the median frame rate
+    :param framerate: the frame rate of the cameras; if ``None``, the cameras run as fast as they can (a
+        simulated camera at 100 kHz), so that ``dropped`` counts the frames pybasler could not keep up with
+    :param directory: the directory ``grab_n_save`` writes to; a temporary directory by default
+    """
+
+    result = dict(case)
+    result.update({'repeat': repeat, 'frames': None, 'seconds': None, 'fps': None, 'mb_per_s': None,
+                   'latency_ms': _percentiles(()), 'peak_rss_mb': None, 'rss_delta_mb': None, 'dropped': None,
+                   'error': None})
+    try:
+        device = _open(case, backend, framerate)
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+        return result
+
+    runs = []
+    try:
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory(dir=directory) as run_directory, _RssSampler() as rss:
+                start = time.perf_counter()
+                frames, nbytes, latencies, dropped = _run_case(case, device, run_directory)
+                seconds = time.perf_counter() - start
+            runs.append({'frames': frames, 'seconds': seconds, 'fps': frames / seconds,
+                         'mb_per_s': nbytes / seconds / 1e6,
+                         'latency_ms': _percentiles(np.asarray(latencies) * 1000),
+                         'peak_rss_mb': None if rss.start_rss is None else rss.peak_rss / 1e6,
+                         'rss_delta_mb': None if rss.start_rss is None else (rss.peak_rss - rss.start_rss) / 1e6,
+                         'dropped': dropped})
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+    finally:
+        device.disconnect()
+
+    if runs:
+        runs.sort(key=lambda run: run['fps'])
+        result.update(runs[(len(runs) - 1) // 2])
+        result['fps_runs'] = [run['fps'] for run in runs]
+    return result
+
+
+def get_environment() -> dict:
+    """return the versions and the machine the benchmark runs on, to be stored with the results"""
+
+    try:
+        from importlib.metadata import version
+        pybasler_version = version('PyBasler')
+    except Exception:
+        pybasler_version = None
+    return {'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'pybasler': pybasler_version,
+            'pypylon': getattr(pypylon.pylon, '__version__', None),
+            'numpy': np.__version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'cpu_count': os.cpu_count()}
+
+
+def run_suite(cases: list, backend='sim', repeat: int = 1, framerate: float = None, directory: str = None,
+              progress=None) -> dict:
+    """run benchmark cases and return a report: a dictionary with the ``environment`` (see
+    :func:`get_environment`), the ``backend`` and the list of ``results`` (see :func:`run_case`)
+
+    :param progress: an optional function called with each result as soon as it is available
+    """
+
+    results = []
+    for case in cases:
+        result = run_case(case, backend, repeat, framerate, directory)
+        results.append(result)
+        if progress is not None:
+            progress(result)
+    return {'environment': get_environment(),
+            'backend': backend if isinstance(backend, str) else getattr(backend, 'name', type(backend).__name__),
+            'framerate': framerate,
+            'results': results}
+
+
+def save_report(path: str, report: dict):
+    """save a report of :func:`run_suite` as JSON"""
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def load_report(path: str) -> dict:
+    """load a report saved with :func:`save_report`"""
+    with open(path) as f:
+        return json.load(f)
+
+
+_CASE_KEYS = ('operation', 'width', 'height', 'pixel_format', 'converter', 'n', 'num_cameras', 'writer')
+
+
+def compare_reports(baseline: dict, current: dict, metric: str = 'fps', tolerance: float = 0.1) -> list:
+    """return the cases of ``current`` whose ``metric`` regressed by more than ``tolerance`` (a fraction)
+    relative to the same case of ``baseline``, as a list of dictionaries with the case and the ``baseline`` and
+    ``current`` values. Higher is better for ``fps`` and ``mb_per_s``, lower for the other metrics; for
+    ``latency_ms``, the median is compared.
+    """
+
+    def value(result):
+        v = result.get(metric)
+        return v['p50'] if isinstance(v, dict) else v
+
+    higher_is_better = metric in ('fps', 'mb_per_s')
+    baseline_values = {tuple(result[key] for key in _CASE_KEYS): value(result) for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        case = tuple(result[key] for key in _CASE_KEYS)
+        old, new = baseline_values.get(case), value(result)
+        if old is None or new is None:
+            continue
+        if higher_is_better:
+            regressed = new < old * (1 - tolerance)
+        else:
+            regressed = new > old * (1 + tolerance)
+        if regressed:
+            regression = dict(zip(_CASE_KEYS, case))
+            regression.update({'metric': metric, 'baseline': old, 'current': new})
+            regressions.append(regression)
+    return regressions
+
+
+def _parse_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def _split(text, convert=str):
+    return [convert(item) for item in text.split(',') if item]
+
+
+def main(argv=None):
+    """the command line interface, e.g.
+
+    ``python -m basler.bench --operations raw,grab_many --sizes 640x480,2048x2048 --pixel-formats Mono8,Mono12p
+    --converters none,numpy --output results.json``
+    """
+
+    parser = argparse.ArgumentParser(prog='python -m basler.bench',
+                                     description='Benchmark the acquisition of pybasler against raw pypylon.')
+    parser.add_argument('--backend', default='sim', choices=('sim', 'pylon'),
+                        help="'sim' for simulated cameras, 'pylon' for real or emulated (PYLON_CAMEMU) cameras")
+    parser.add_argument('--operations', default=','.join(OPERATIONS), type=_split)
+    parser.add_argument('--sizes', default='640x480', type=lambda text: _split(text, _parse_size))
+    parser.add_argument('--pixel-formats', default='Mono8', type=_split)
+    parser.add_argument('--converters', default='none', type=_split)
+    parser.add_argument('--frames', default='100', type=lambda text: _split(text, int))
+    parser.add_argument('--cameras', default='1', type=lambda text: _split(text, int))
+    parser.add_argument('--writers', default='raw', type=_split)
+    parser.add_argument('--repeat', default=1, type=int)
+    parser.add_argument('--framerate', default=None, type=float,
+                        help='the frame rate of the cameras; as fast as possible by default')
+    parser.add_argument('--directory', default=None, help='where grab_n_save writes; a temporary directory by default')
+    parser.add_argument('--output', default=None, help='the JSON file of the report; printed if not given')
+    parser.add_argument('--baseline', default=None, help='a previous report to compare the frame rates with')
+    parser.add_argument('--tolerance', default=0.1, type=float)
+    args = parser.parse_args(argv)
+
+    cases = sweep(args.operations, args.sizes, args.pixel_formats, args.converters, args.frames, args.cameras,
+                  args.writers)
+
+    def progress(result):
+        if result['error'] is not None:
+            summary = f"error: {result['error']}"
+        else:
+            summary = (f"{result['fps']:10.1f} fps {result['mb_per_s']:9.1f} MB/s "
+                       f"p99 {result['latency_ms']['p99'] or 0:7.3f} ms dropped {result['dropped']}")
+        print(f"{result['operation']:>11} {result['width']}x{result['height']} {result['pixel_format']:>12} "
+              f"{result['converter']:>5} n={result['n']} cameras={result['num_cameras']} "
+              f"{result['writer'] or '':>5} {summary}", file=sys.stderr)
+
+    report = run_suite(cases, args.backend, args.repeat, args.framerate, args.directory, progress)
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        save_report(args.output, report)
+
+    if args.baseline is not None:
+        regressions = compare_reports(load_report(args.baseline), report, tolerance=args.tolerance)
+        for regression in regressions:
+            print(f'regression: {regression}', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pypylon.pylon
+from .metadata import FRAME_METADATA_DTYPE, get_frame_metadata
+
+
+class FrameEventHandler(pypylon.pylon.ImageEventHandler):
+
+    """
+    An image event handler that passes every grabbed frame to a Python callback as ``callback(frame, record)``
+    (or ``callback(cam_id, frame, record)`` if ``cam_id`` is given), where ``record`` is a record of
+    :data:`~basler.metadata.FRAME_METADATA_DTYPE`.
+
+    Buffer lifetime: without worker threads, the callback runs on pylon's grab thread and ``frame`` is a
+    zero-copy view of the grab buffer (or of a reused conversion buffer), valid only until the callback returns;
+    copy it to keep it. The callback should return quickly, since the camera cannot deliver the next frame to
+    Python meanwhile. With worker threads, every frame is copied and handed off to a pool of threads through a
+    bounded queue, and the callback owns the frame.
+    """
+
+    OVERFLOW_POLICIES = ('block', 'drop')
+
+    def __init__(self, callback, cam_id: int = None, copy_frame=None, dtype=None, num_threads: int = 0,
+                 queue_size: int = 64, overflow: str = 'block'):
+        """
+        :param callback: the function called for every frame
+        :param cam_id: if given, passed as the first argument of the callback
+        :param copy_frame: a function ``copy_frame(grab_result, dest)`` that converts a grab result into ``dest``
+            (e.g. :func:`~basler.BaslerCamera.copy_frame`), or ``None`` to use the grab buffer as it is
+        :param dtype: the dtype of the frames produced by ``copy_frame``
+        :param num_threads: the number of worker threads; 0 calls the callback on the grab thread
+        :param queue_size: the maximum number of frames waiting for a worker thread
+        :param overflow: when the queue is full, ``'block'`` the grab thread or ``'drop'`` the new frame
+        """
+        super().__init__()
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f'Unknown overflow policy {overflow!r}, expected one of {self.OVERFLOW_POLICIES}')
+
+        self._callback = callback
+        self._cam_id = cam_id
+        self._copy_frame = copy_frame
+        self._dtype = dtype
+        self._overflow = overflow
+        self._scratch = None
+        self._executor = ThreadPoolExecutor(num_threads) if num_threads > 0 else None
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._lock = threading.Lock()
+        self._frames = 0
+        self._dropped = 0
+        self._error = None
+
+    def _call(self, frame, record):
+        try:
+            if self._cam_id is None:
+                self._callback(frame, record)
+            else:
+                self._callback(self._cam_id, frame, record)
+        except Exception as e:
+            if self._error is None:
+                self._error = e
+
+    def _call_and_release(self, frame, record):
+        try:
+            self._call(frame, record)
+        finally:
+            self._slots.release()
+
+    def OnImageGrabbed(self, camera, grab_result):
+        if not grab_result.GrabSucceeded():
+            with self._lock:
+                self._dropped += 1
+            return
+
+        record = np.array(get_frame_metadata(grab_result), dtype=FRAME_METADATA_DTYPE)[()]
+
+        if self._executor is not None:
+            if not self._slots.acquire(blocking=self._overflow == 'block'):
+                with self._lock:
+                    self._dropped += 1
+                return
+            submitted = False
+            try:
+                if self._copy_frame is None:
+                    with grab_result.GetArrayZeroCopy() as view:
+                        frame = view.copy()
+                else:
+                    frame = np.empty((grab_result.Height, grab_result.Width), dtype=self._dtype)
+                    self._copy_frame(grab_result, frame)
+                self._executor.submit(self._call_and_release, frame, record)
+                submitted = True
+            finally:
+                # the worker releases the slot once the frame is submitted
+                if not submitted:
+                    self._slots.release()
+        elif self._copy_frame is None:
+            with grab_result.GetArrayZeroCopy() as frame:
+                self._call(frame, record)
+        else:
+            shape = (grab_result.Height, grab_result.Width)
+            if self._scratch is None or self._scratch.shape != shape:
+                self._scratch = np.empty(shape, dtype=self._dtype)
+            self._copy_frame(grab_result, self._scratch)
+            self._call(self._scratch, record)
+
+        with self._lock:
+            self._frames += 1
+
+    def close(self) -> dict:
+        """wait for the worker threads to finish.
+
+        :return: a dictionary with the number of ``frames`` passed to the callback and ``dropped``
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        if self._error is not None:
+            raise RuntimeError('Error in frame callback') from self._error
+        return {'frames': self._frames, 'dropped': self._dropped}
@@ -1,3 +1,5 @@
+import threading
+import time
 import pypylon.pylon
 
 
@@ -5,27 +7,163 @@ class BaslerCameraManager:
 
     """
     A helper class
+
+    Device enumeration (which can take seconds on GigE networks) is cached: all the methods share one
+    enumeration, which is repeated only when it is older than :attr:`CACHE_TTL` seconds or when
+    :func:`refresh` is called. :class:`~basler.basler_camera.BaslerCamera` and
+    :class:`~basler.basler_camera_array.BaslerCameraArray` create their devices from the cached device info,
+    so a rig with many cameras pays for a single discovery sweep.
     """
 
+    CACHE_TTL = 30.0
+
+    _lock = threading.Lock()
+    _refresh_lock = threading.Lock()
+    _devices = ()
+    _index = {'serial_number': {}, 'ip': {}, 'user_defined_name': {}, 'model_name': {}}
+    _enumerated_at = None
+
+    @staticmethod
+    def refresh() -> tuple:
+
+        """enumerate the devices again and rebuild the index
+
+        :return: a tuple of the ``CDeviceInfo`` of the available cameras
+        """
+
+        with BaslerCameraManager._refresh_lock:
+            return BaslerCameraManager._enumerate()
+
+    @staticmethod
+    def _enumerate():
+
+        devices = tuple(pypylon.pylon.TlFactory.GetInstance().EnumerateDevices())
+        index = {'serial_number': {}, 'ip': {}, 'user_defined_name': {}, 'model_name': {}}
+        for device in devices:
+            if device.IsSerialNumberAvailable():
+                index['serial_number'][device.GetSerialNumber()] = device
+            if device.IsIpAddressAvailable():
+                index['ip'][device.GetIpAddress()] = device
+            if device.IsUserDefinedNameAvailable() and device.GetUserDefinedName():
+                index['user_defined_name'][device.GetUserDefinedName()] = device
+            if device.IsModelNameAvailable():
+                index['model_name'].setdefault(device.GetModelName(), []).append(device)
+
+        with BaslerCameraManager._lock:
+            BaslerCameraManager._devices = devices
+            BaslerCameraManager._index = index
+            BaslerCameraManager._enumerated_at = time.monotonic()
+        return devices
+
+    @staticmethod
+    def invalidate():
+
+        """forget the cached enumeration, e.g. after connecting or disconnecting cameras"""
+
+        with BaslerCameraManager._lock:
+            BaslerCameraManager._enumerated_at = None
+
+    @staticmethod
+    def get_devices(refresh: bool = False) -> tuple:
+
+        """return a tuple of the ``CDeviceInfo`` of the available cameras, from the cache unless it is older than
+        :attr:`CACHE_TTL` seconds
+
+        :param refresh: enumerate the devices again even if the cache is fresh
+        """
+
+        if refresh:
+            return BaslerCameraManager.refresh()
+        devices = BaslerCameraManager._get_cached()
+        if devices is None:
+            # only one thread enumerates; the others wait and use its result
+            with BaslerCameraManager._refresh_lock:
+                devices = BaslerCameraManager._get_cached()
+                if devices is None:
+                    devices = BaslerCameraManager._enumerate()
+        return devices
+
+    @staticmethod
+    def _get_cached():
+        with BaslerCameraManager._lock:
+            enumerated_at = BaslerCameraManager._enumerated_at
+            if enumerated_at is None or time.monotonic() - enumerated_at > BaslerCameraManager.CACHE_TTL:
+                return None
+            return BaslerCameraManager._devices
+
+    @staticmethod
+    def get_index(refresh: bool = False) -> dict:
+
+        """return the index of the available cameras: a dictionary with the keys ``serial_number``, ``ip`` and
+        ``user_defined_name``, each mapping the values to a ``CDeviceInfo``, and ``model_name``, mapping each model
+        to a list of ``CDeviceInfo``
+        """
+
+        BaslerCameraManager.get_devices(refresh)
+        with BaslerCameraManager._lock:
+            return {key: dict(values) for key, values in BaslerCameraManager._index.items()}
+
+    @staticmethod
+    def find_device(serial_number: str = None, ip: str = None, user_defined_name: str = None,
+                    model_name: str = None, refresh: bool = False):
+
+        """return the ``CDeviceInfo`` of the first available camera that matches all the given criteria
+        (the first camera if none is given), or ``None``
+        """
+
+        for device in BaslerCameraManager.get_devices(refresh):
+            if serial_number is not None and not (device.IsSerialNumberAvailable() and
+                                                  device.GetSerialNumber() == serial_number):
+                continue
+            if ip is not None and not (device.IsIpAddressAvailable() and device.GetIpAddress() == ip):
+                continue
+            if user_defined_name is not None and not (device.IsUserDefinedNameAvailable() and
+                                                      device.GetUserDefinedName() == user_defined_name):
+                continue
+            if model_name is not None and not (device.IsModelNameAvailable() and
+                                               device.GetModelName() == model_name):
+                continue
+            return device
+        return None
+
+    @staticmethod
+    def create_device(device_info):
+
+        """create a pylon device matching a (possibly partial) ``CDeviceInfo`` with a serial number and/or an
+        IP address, from the cached enumeration if it has the camera, otherwise with a fresh enumeration
+        """
+
+        tlf = pypylon.pylon.TlFactory.GetInstance()
+        serial_number = device_info.GetSerialNumber() if device_info.IsSerialNumberAvailable() else None
+        ip = device_info.GetIpAddress() if device_info.IsIpAddressAvailable() else None
+        cached = BaslerCameraManager.find_device(serial_number, ip)
+        if cached is not None:
+            try:
+                return tlf.CreateDevice(cached)
+            except Exception:
+                # the camera is gone or was re-addressed since it was enumerated
+                BaslerCameraManager.invalidate()
+        return tlf.CreateFirstDevice(device_info)
+
     @staticmethod
-    def get_camera_list_names() -> list:
+    def get_camera_list_names(refresh: bool = False) -> list:
 
         """return a list of available cameras in the "friendly name" format containing serial numbers"""
 
-        devices = pypylon.pylon.TlFactory.GetInstance().EnumerateDevices()
+        devices = BaslerCameraManager.get_devices(refresh)
         friendly_names = []
         for device in devices:
             friendly_names.append(device.GetFriendlyName())
         return friendly_names
 
     @staticmethod
-    def get_camera_list_dict() -> list:
+    def get_camera_list_dict(refresh: bool = False) -> list:
 
         """return a list of dictionaries of available cameras, where the keys of each dictionary are
         ``name``, ``serial_number`` and ``model_name``
         """
 
-        devices = pypylon.pylon.TlFactory.GetInstance().EnumerateDevices()
+        devices = BaslerCameraManager.get_devices(refresh)
         dct = []
         for device in devices:
             dct.append({'name': device.GetFriendlyName(),
@@ -34,11 +172,11 @@ class BaslerCameraManager:
         return dct
 
     @staticmethod
-    def get_camera_list_fullname() -> list:
+    def get_camera_list_fullname(refresh: bool = False) -> list:
 
         """return a list of available cameras in the "full name" format containing addresses"""
 
-        devices = pypylon.pylon.TlFactory.GetInstance().EnumerateDevices()
+        devices = BaslerCameraManager.get_devices(refresh)
         full_names = []
         for device in devices:
             full_names.append(device.GetFullName())
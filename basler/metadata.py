@@ -0,0 +1,37 @@
+import time
+import numpy as np
+
+
+FRAME_METADATA_DTYPE = np.dtype([
+    ('timestamp', np.uint64),
+    ('id', np.uint64),
+    ('block_id', np.uint64),
+    ('image_number', np.uint64),
+    ('skipped_images', np.uint64),
+    ('host_time', np.float64), ])
+"""The structured dtype of per-frame metadata:
+
+* ``timestamp``: the camera timestamp of the frame (in ticks; see the camera documentation)
+* ``id``: the ID of the grab result, counting from 1
+* ``block_id``: the block ID of the frame sent by the camera (``2**64 - 1`` if not supported)
+* ``image_number``: the number of the image, counting from 1
+* ``skipped_images``: the number of images skipped before this one by the grab strategy
+* ``host_time``: the time the grab result was retrieved on the host (seconds since the epoch)
+"""
+
+
+def empty_metadata(n: int):
+    """return an array of n metadata records"""
+    return np.zeros(n, dtype=FRAME_METADATA_DTYPE)
+
+
+def get_frame_metadata(grab_result) -> tuple:
+    """return the metadata of a grab result as a tuple that can be assigned to a record of
+    :data:`FRAME_METADATA_DTYPE`
+    """
+    return (grab_result.TimeStamp,
+            grab_result.ID,
+            grab_result.BlockID,
+            grab_result.ImageNumber,
+            grab_result.NumberOfSkippedImages,
+            time.time())
@@ -0,0 +1,286 @@
+import asyncio
+import json
+import socket
+import struct
+import threading
+import numpy as np
+from .metadata import FRAME_METADATA_DTYPE
+
+
+FRAME_HEADER = struct.Struct('<4sQII4sQ')
+"""The header sent before each frame: the magic ``b'PBF1'``, the sequence number of the frame, its height and
+width, its dtype (e.g. ``b'<u2'``) and the number of bytes of pixel data. It is followed by the metadata record
+(see :data:`~basler.metadata.FRAME_METADATA_DTYPE`) and the pixel data in C order."""
+
+_MAGIC = b'PBF1'
+
+
+class _ClientConnection:
+
+    """the state of one client of a :class:`FrameServer`, only touched from the event loop"""
+
+    def __init__(self, writer, queue_size, decimation, roi):
+        self.writer = writer
+        self.queue = asyncio.Queue()
+        self.queue_size = queue_size
+        self.decimation = decimation
+        self.roi = roi
+        self.offered = 0
+        self.sent = 0
+        self.dropped = 0
+        self.task = None
+
+    def offer(self, item):
+        self.offered += 1
+        if (self.offered - 1) % self.decimation:
+            return
+        if self.queue.qsize() >= self.queue_size:
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(item)
+
+    def stats(self) -> dict:
+        return {'address': self.writer.get_extra_info('peername'), 'sent': self.sent, 'dropped': self.dropped}
+
+
+class FrameServer:
+
+    """
+    Serve frames to any number of :class:`FrameClient` over TCP. The server runs an asyncio event loop in a
+    background thread; frames are handed to it with :func:`publish`, which never blocks, e.g. from a camera with
+    ``cam.start_callback(server.publish)`` (see :func:`~basler.basler_camera.BaslerCamera.start_callback`).
+
+    Each client has a bounded queue: when a client is too slow, its oldest queued frame is dropped, so that
+    neither the acquisition nor the other clients are stalled. Clients can ask for every n-th frame only and for
+    a region of interest.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, queue_size: int = 4):
+        """
+        :param host: the address to listen on
+        :param port: the port to listen on; 0 picks a free port, see :attr:`address`
+        :param queue_size: the maximum number of frames queued for each client
+        """
+        if queue_size < 1:
+            raise ValueError('The queue must hold at least one frame')
+        self._host = host
+        self._port = port
+        self._queue_size = queue_size
+        self._loop = None
+        self._thread = None
+        self._server = None
+        self._clients = []
+        self._seq = 0
+
+    @property
+    def address(self) -> tuple:
+        """the ``(host, port)`` the server listens on"""
+        if self._server is None:
+            raise NameError('Not started')
+        return self._server.sockets[0].getsockname()[:2]
+
+    def start(self):
+        """start listening in a background thread"""
+
+        if self._thread is not None:
+            raise RuntimeError('The server is already running')
+        self._loop = asyncio.new_event_loop()
+        started = self._loop.run_until_complete(asyncio.start_server(self._handle, self._host, self._port))
+        self._server = started
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        """send the queued frames, disconnect the clients and stop the server
+
+        :param timeout: the maximum time in seconds to wait for the queued frames to be sent
+        """
+
+        if self._thread is None:
+            raise RuntimeError('The server is not running')
+        asyncio.run_coroutine_threadsafe(self._shutdown(timeout), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._thread = None
+        self._loop = None
+        self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def publish(self, frame, record=None) -> int:
+        """hand a frame to the server, to be sent to every client. The frame is copied (only if any client is
+        connected), so the caller can reuse its buffer right away.
+
+        :param frame: a 2D array
+        :param record: its metadata record (see :data:`~basler.metadata.FRAME_METADATA_DTYPE`), or ``None``
+        :return: the sequence number of the frame, starting from 1
+        """
+
+        self._seq += 1
+        if self._clients:
+            if record is None:
+                record = np.zeros((), dtype=FRAME_METADATA_DTYPE)
+            item = (self._seq, np.array(frame, copy=True), np.array(record, dtype=FRAME_METADATA_DTYPE).tobytes())
+            self._loop.call_soon_threadsafe(self._dispatch, item)
+        return self._seq
+
+    def get_stats(self) -> list:
+        """return a list of dictionaries, one per connected client, with its ``address`` and the number of frames
+        ``sent`` and ``dropped``
+        """
+        if self._loop is None:
+            return []
+        future = asyncio.run_coroutine_threadsafe(self._get_stats(), self._loop)
+        return future.result()
+
+    async def _get_stats(self):
+        return [client.stats() for client in self._clients]
+
+    def _dispatch(self, item):
+        for client in self._clients:
+            client.offer(item)
+
+    async def _handle(self, reader, writer):
+        try:
+            request = json.loads(await reader.readline())
+            decimation = int(request.get('decimation', 1))
+            roi = request.get('roi')
+            if decimation < 1:
+                raise ValueError('The decimation must be at least 1')
+            if roi is not None:
+                roi = tuple(int(v) for v in roi)
+                if len(roi) != 4 or min(roi) < 0:
+                    raise ValueError('The ROI must be (offset_x, offset_y, width, height)')
+        except Exception as e:
+            writer.write(json.dumps({'error': str(e)}).encode() + b'\n')
+            writer.close()
+            return
+
+        client = _ClientConnection(writer, self._queue_size, decimation, roi)
+        client.task = asyncio.current_task()
+        self._clients.append(client)
+        writer.write(b'{"ok": true}\n')
+        try:
+            await self._send_frames(client)
+        except ConnectionError:
+            pass
+        except asyncio.CancelledError:
+            # the client did not take its frames in time; do not wait for the socket buffer to drain
+            writer.transport.abort()
+        finally:
+            self._clients.remove(client)
+            writer.close()
+
+    async def _send_frames(self, client):
+        writer = client.writer
+        while True:
+            item = await client.queue.get()
+            if item is None:
+                await writer.drain()
+                return
+            seq, frame, record = item
+            if client.roi is not None:
+                x, y, w, h = client.roi
+                frame = np.ascontiguousarray(frame[y:y + h, x:x + w])
+            writer.write(FRAME_HEADER.pack(_MAGIC, seq, frame.shape[0], frame.shape[1],
+                                           frame.dtype.str.encode(), frame.nbytes))
+            writer.write(record)
+            writer.write(memoryview(frame).cast('B'))
+            await writer.drain()
+            client.sent += 1
+
+    async def _shutdown(self, timeout):
+        self._server.close()
+        tasks = [client.task for client in self._clients]
+        for client in self._clients:
+            client.queue.put_nowait(None)
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        await self._server.wait_closed()
+
+
+class FrameClient:
+
+    """
+    Receive frames from a :class:`FrameServer`. Iterating over the client yields ``(seq, frame, record)`` until
+    the server closes the connection, where ``seq`` is the sequence number of the frame on the server (gaps
+    reveal decimated or dropped frames) and ``record`` its metadata record.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = None, decimation: int = 1, roi: tuple = None,
+                 timeout: float = None):
+        """
+        :param host: the address of the server
+        :param port: the port of the server
+        :param decimation: receive only every n-th frame published by the server
+        :param roi: receive only a region of interest ``(offset_x, offset_y, width, height)`` of the frames
+        :param timeout: the socket timeout in seconds, or ``None`` to block
+        """
+        self._address = (host, port)
+        self._request = {'decimation': decimation, 'roi': None if roi is None else list(roi)}
+        self._timeout = timeout
+        self._sock = None
+        self._file = None
+
+    def connect(self):
+        self._sock = socket.create_connection(self._address, timeout=self._timeout)
+        self._file = self._sock.makefile('rb')
+        self._sock.sendall(json.dumps(self._request).encode() + b'\n')
+        reply = json.loads(self._file.readline() or b'{"error": "connection closed"}')
+        if 'error' in reply:
+            self.close()
+            raise ConnectionError(f'The server refused the connection: {reply["error"]}')
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._sock.close()
+        self._file = None
+        self._sock = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _read_exactly(self, n):
+        data = self._file.read(n)
+        if len(data) != n:
+            raise EOFError('The server closed the connection')
+        return data
+
+    def recv(self):
+        """wait for the next frame and return ``(seq, frame, record)``
+
+        :raises EOFError: if the server closed the connection
+        """
+
+        if self._file is None:
+            raise NameError('Not connected')
+        magic, seq, height, width, dtype, nbytes = FRAME_HEADER.unpack(self._read_exactly(FRAME_HEADER.size))
+        if magic != _MAGIC:
+            raise ConnectionError('Unexpected data from the server')
+        record = np.frombuffer(self._read_exactly(FRAME_METADATA_DTYPE.itemsize), dtype=FRAME_METADATA_DTYPE)[0]
+        data = bytearray(nbytes)
+        if self._file.readinto(data) != nbytes:
+            raise EOFError('The server closed the connection')
+        frame = np.frombuffer(data, dtype=dtype.rstrip(b'\0').decode()).reshape(height, width)
+        return seq, frame, record
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self.recv()
+            except EOFError:
+                return
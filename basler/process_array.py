@@ -0,0 +1,376 @@
+import multiprocessing
+import pickle
+from multiprocessing import shared_memory
+import numpy as np
+from .basler_camera import BaslerCamera, DeviceError
+
+
+class _SharedMemory(shared_memory.SharedMemory):
+
+    """A shared memory block that can be closed while frames returned by :func:`ProcessCameraArray.grab_many`
+    still use it; it is then unmapped when the last of them is gone."""
+
+    def close(self):
+        try:
+            super().close()
+        except BufferError:
+            pass
+
+
+def _attach(shm, name):
+    if shm is not None and shm.name == name:
+        return shm
+    if shm is not None:
+        shm.close()
+    return shared_memory.SharedMemory(name=name)
+
+
+def _worker(conn, device_info, backend_factory=None):
+    """the main loop of a worker process: own one camera and execute the commands sent by the parent"""
+
+    backend = backend_factory() if backend_factory is not None else None
+    cam = BaslerCamera(ip=device_info.get('ip'), serial_number=device_info.get('serial_number'), backend=backend)
+    shm = None
+    try:
+        while True:
+            command, args, kwargs = conn.recv()
+            try:
+                if command == '_close':
+                    cam.disconnect()
+                    conn.send(('ok', None))
+                    return
+                elif command == '_layout':
+                    device = cam._get_device()
+                    result = ((device.Height.GetValue(), device.Width.GetValue()),
+                              np.dtype(cam.get_frame_dtype()).str)
+                elif command == '_grab_into':
+                    name, n, shape, dtype, metadata = args
+                    shm = _attach(shm, name)
+                    out = np.ndarray((n,) + shape, dtype=dtype, buffer=shm.buf)
+                    result = cam.grab_many(n, out=out, metadata=metadata)
+                    result = (len(result[0]), result[1]) if metadata else (len(result), None)
+                    del out
+                else:
+                    result = getattr(cam, command)(*args, **kwargs)
+                conn.send(('ok', result))
+            except Exception as e:
+                try:
+                    conn.send(('error', pickle.loads(pickle.dumps(e))))
+                except Exception:
+                    conn.send(('error', DeviceError(repr(e))))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        if shm is not None:
+            shm.close()
+
+
+class ProcessCameraArray:
+
+    """
+    A camera array that runs every camera in its own worker process, each owning a
+    :class:`~basler.basler_camera.BaslerCamera`. Grabbing, conversion and saving happen in parallel in the
+    workers instead of contending for the GIL of a single process, which helps with many cameras.
+
+    The cameras are configured through the same setters as :class:`~basler.basler_camera_array.BaslerCameraArray`.
+    The workers write the frames into one shared memory block per camera, which :func:`grab_many` returns
+    without copying or pickling them; other arguments and results are small and sent through pipes. Since the
+    cameras grab independently, use hardware triggering when the frames of different cameras must be
+    synchronized.
+    """
+
+    def __init__(self, devices_info, start_method: str = 'spawn', backend_factory=None):
+
+        """The constructor of the array. No process is started until :func:`connect`.
+
+        :param devices_info: a list of camera device info stored as dictionaries that has IP address
+            or serial number, as for :class:`~basler.basler_camera_array.BaslerCameraArray`
+        :param start_method: the multiprocessing start method of the workers; ``'spawn'`` avoids forking a
+            process that already loaded pylon
+        :param backend_factory: a picklable callable that creates the backend of each worker, e.g.
+            ``functools.partial(SimulatedBackend, num_devices=2)``; by default pylon. Every worker creates its
+            own backend.
+        """
+
+        self._devices_info = [dict(device_info) for device_info in devices_info]
+        self._backend_factory = backend_factory
+        self._context = multiprocessing.get_context(start_method)
+        self._processes = []
+        self._connections = []
+        self._shared = []
+
+    def _get_connections(self):
+        if not self._connections:
+            raise NameError('Not initialized!')
+        return self._connections
+
+    def _send(self, cam_id, command, *args, **kwargs):
+        connections = self._get_connections()
+        if (cam_id < 0) or (cam_id > len(connections) - 1):
+            raise ValueError('Wrong Camera ID')
+        connections[cam_id].send((command, args, kwargs))
+
+    def _receive(self, cam_id):
+        try:
+            status, result = self._connections[cam_id].recv()
+        except EOFError:
+            raise DeviceError(f'The worker process of camera {cam_id} exited unexpectedly')
+        if status == 'error':
+            raise result
+        return result
+
+    def _receive_all(self, cam_ids=None):
+        # read every reply before raising, so that the pipes stay in step with the commands
+        results = []
+        error = None
+        for cam_id in range(len(self._connections)) if cam_ids is None else cam_ids:
+            try:
+                results.append(self._receive(cam_id))
+            except Exception as e:
+                results.append(None)
+                if error is None:
+                    error = e
+        if error is not None:
+            raise error
+        return results
+
+    def call(self, cam_id: int, method: str, *args, **kwargs):
+
+        """call a method of the :class:`~basler.basler_camera.BaslerCamera` of a camera in its worker process
+        and return the result. Arguments and the result are pickled.
+
+        :param cam_id: camera ID
+        :param method: the name of the method, e.g. ``'get_camera_info'``
+        """
+
+        self._send(cam_id, method, *args, **kwargs)
+        return self._receive(cam_id)
+
+    def call_all(self, method: str, *args, **kwargs) -> list:
+
+        """call the same method on all cameras at once, so that the workers run it in parallel, and return the
+        list of results
+        """
+
+        for cam_id in range(len(self._get_connections())):
+            self._send(cam_id, method, *args, **kwargs)
+        return self._receive_all()
+
+    def connect(self):
+        if self._connections:
+            return
+        for device_info in self._devices_info:
+            parent_conn, child_conn = self._context.Pipe()
+            process = self._context.Process(target=_worker, args=(child_conn, device_info, self._backend_factory),
+                                            daemon=True)
+            process.start()
+            child_conn.close()
+            self._processes.append(process)
+            self._connections.append(parent_conn)
+            self._shared.append(None)
+        try:
+            self.call_all('connect')
+        except Exception:
+            self._terminate()
+            raise
+
+    def disconnect(self):
+        self._get_connections()
+        try:
+            self.call_all('_close')
+        finally:
+            self._terminate()
+
+    def _terminate(self):
+        # closing the pipes first ends the workers still waiting for a command, so they exit together
+        for conn in self._connections:
+            conn.close()
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for shm in self._shared:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        self._processes = []
+        self._connections = []
+        self._shared = []
+
+    # ----------------------- getter -----------------------------------
+
+    def get_aoi(self, cam_id: int):
+        """return the area of interest (AOI) of a certain camera"""
+        return self.call(cam_id, 'get_aoi')
+
+    def get_exposure_time(self, cam_id: int):
+        """return the exposure time of a certain camera"""
+        return self.call(cam_id, 'get_exposure_time')
+
+    def get_resulting_framerate(self, cam_id: int):
+        """return the resulting frame rate of a certain camera"""
+        return self.call(cam_id, 'get_resulting_framerate')
+
+    def get_capabilities(self, cam_id: int):
+        """return the feature node names that a certain camera supports; see
+        :func:`~basler.basler_camera.BaslerCamera.get_capabilities`
+        """
+        return self.call(cam_id, 'get_capabilities')
+
+    # ----------------------- setter -----------------------------------
+
+    def set_converter(self, convert=True, engine: str = 'pylon', msb_align: bool = True):
+        """set the converter of all cameras; see :func:`~basler.basler_camera.BaslerCamera.set_converter`"""
+        self.call_all('set_converter', convert, engine, msb_align)
+
+    def set_acquisition_settings(self, **settings):
+        """set the acquisition settings of all cameras; see
+        :func:`~basler.basler_camera.BaslerCamera.set_acquisition_settings`
+        """
+        self.call_all('set_acquisition_settings', **settings)
+
+    def set_pixel_format(self, cam_id: int, pixel_format_string: str):
+        """set the pixel format of a certain camera"""
+        self.call(cam_id, 'set_pixel_format', pixel_format_string)
+
+    def set_acquisition_framerate(self, cam_id: int, framerate: float = None):
+        """set the acquisition frame rate of a certain camera, or disable it if ``framerate`` is ``None``"""
+        self.call(cam_id, 'set_acquisition_framerate', framerate)
+
+    def set_exposure_time(self, cam_id: int, exposure_time: float):
+        """set the exposure time of a certain camera"""
+        self.call(cam_id, 'set_exposure_time', exposure_time)
+
+    def set_aoi(self, cam_id: int, aoi: tuple):
+        """set the area of interest (AOI) of a certain camera, as ``(offset_x, offset_y, width, height)``"""
+        self.call(cam_id, 'set_aoi', aoi)
+
+    def configure(self, settings) -> list:
+        """apply several settings to the cameras, all cameras in parallel; see
+        :func:`~basler.basler_camera_array.BaslerCameraArray.configure`
+        """
+        connections = self._get_connections()
+        if isinstance(settings, dict):
+            settings = [settings] * len(connections)
+        elif len(settings) != len(connections):
+            raise ValueError(f'Expected {len(connections)} settings, got {len(settings)}')
+        for cam_id in range(len(connections)):
+            self._send(cam_id, 'configure', settings[cam_id] or {})
+        return self._receive_all()
+
+    def get_snapshots(self) -> list:
+        """return a list of :class:`~basler.snapshot.FeatureSnapshot`, one per camera"""
+        return self.call_all('get_snapshot')
+
+    def apply_snapshots(self, snapshots: list) -> list:
+        """restore the configuration of a list of snapshots, one per camera, all cameras in parallel; see
+        :func:`~basler.basler_camera_array.BaslerCameraArray.apply_snapshots`
+        """
+        connections = self._get_connections()
+        if len(snapshots) != len(connections):
+            raise ValueError(f'Expected {len(connections)} snapshots, got {len(snapshots)}')
+        cam_ids = [cam_id for cam_id, snapshot in enumerate(snapshots) if snapshot is not None]
+        for cam_id in cam_ids:
+            self._send(cam_id, 'apply_snapshot', snapshots[cam_id])
+        reports = [{'applied': [], 'failed': {}, 'unchanged': []} for _ in snapshots]
+        for cam_id, report in zip(cam_ids, self._receive_all(cam_ids)):
+            reports[cam_id] = report
+        return reports
+
+    # ----------------------- helper -----------------------------------
+
+    def _get_shared(self, cam_id, nbytes):
+        """return a shared memory block of at least ``nbytes`` for a camera, reused between grabs"""
+
+        shm = self._shared[cam_id]
+        if shm is None or shm.size < nbytes:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            shm = _SharedMemory(create=True, size=max(nbytes, 1))
+            self._shared[cam_id] = shm
+        return shm
+
+    # --------------------------- grabbing -----------------------------
+
+    def grab_one(self):
+
+        """grab one frame from every camera in parallel and return a list of numpy arrays, which are views of
+        shared memory as for :func:`grab_many`
+        """
+
+        return [frames[0] for frames in self.grab_many(1)]
+
+    def grab_many(self, n: int, out: list = None, metadata: bool = False):
+
+        """grab n frames from every camera in parallel and return a list of numpy arrays of shape
+        ``(n, height, width)``, one per camera.
+
+        The workers write the frames into a shared memory block per camera, and the returned arrays are views
+        of these blocks: they are not copied in the parent process. A view is valid until the next grab of the
+        array, which reuses the block, or until :func:`disconnect`; copy the frames to keep them longer, or pass
+        ``out``.
+
+        :param n: the number of frames to grab for each camera
+        :param out: optional list of preallocated arrays, one per camera, to copy the frames into. If ``None``,
+            the views of the shared memory are returned.
+        :param metadata: if ``True``, return a tuple ``(frames, metadata)`` where ``metadata`` is a list of
+            structured arrays of :data:`~basler.metadata.FRAME_METADATA_DTYPE`, one per camera
+        """
+
+        layouts = self.call_all('_layout')
+        size = len(layouts)
+        if out is not None:
+            if len(out) != size:
+                raise ValueError(f'Expected {size} output arrays, got {len(out)}')
+            for (shape, dtype), r in zip(layouts, out):
+                if r.shape != (n,) + shape or r.dtype != np.dtype(dtype):
+                    raise ValueError(f'Output array has shape {r.shape} and dtype {r.dtype}, '
+                                     f'expected {(n,) + shape} and {np.dtype(dtype)}')
+
+        for cam_id, (shape, dtype) in enumerate(layouts):
+            shm = self._get_shared(cam_id, n * int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            self._send(cam_id, '_grab_into', shm.name, n, shape, dtype, metadata)
+        counts, meta = zip(*self._receive_all())
+        meta = list(meta)
+
+        result = []
+        for cam_id, (shape, dtype) in enumerate(layouts):
+            # unlike numpy.ndarray(buffer=...), frombuffer keeps the block from being unmapped under the view
+            frames = np.frombuffer(self._shared[cam_id].buf, dtype=dtype,
+                                   count=n * int(np.prod(shape))).reshape((n,) + shape)
+            if out is not None:
+                out[cam_id][...] = frames
+                frames = out[cam_id]
+            # the workers may end early on a timeout, see set_acquisition_settings
+            result.append(frames if counts[cam_id] == n else frames[:counts[cam_id]])
+
+        if metadata:
+            return result, meta
+        return result
+
+    def grab_n_save(self, n: int, save_patterns: list, n_start: list = None, **kwargs) -> list:
+
+        """grab n frames from every camera and save them, each camera in its own process; see
+        :func:`~basler.basler_camera.BaslerCamera.grab_n_save` for the file formats and the keyword arguments
+        (``num_threads``, ``queue_size``, ``overflow``, ``writer``, ...). Writers must be given as patterns or
+        paths, not as :class:`~basler.writers.FrameWriter` instances.
+
+        :param n: the number of frames to grab for each camera
+        :param save_patterns: a list of patterns or paths, one per camera
+        :param n_start: a list of integers indicating the start number of the filename.
+            Default is ``[1, 1, ...]``, i.e. 1 for each camera.
+        :param metadata_paths: if given, a list of ``.npy`` paths, one per camera
+        :return: a list of reports, one per camera, with the number of frames ``written`` and ``dropped``
+        """
+
+        size = len(self._get_connections())
+        if n_start is None:
+            n_start = [1] * size
+        metadata_paths = kwargs.pop('metadata_paths', None)
+
+        for cam_id in range(size):
+            if metadata_paths is not None:
+                kwargs['metadata_path'] = metadata_paths[cam_id]
+            self._send(cam_id, 'grab_n_save', n, save_patterns[cam_id], n_start[cam_id], **kwargs)
+        return self._receive_all()
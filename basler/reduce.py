@@ -0,0 +1,92 @@
+import numpy as np
+
+
+REDUCE_OPS = ('sum', 'mean', 'var', 'std', 'min', 'max')
+
+
+class FrameReducer:
+
+    """
+    Accumulate per-pixel statistics of a sequence of frames one frame at a time, without storing the frames.
+    Mean and variance use Welford's numerically stable online update; ``sum``, ``mean`` and ``var`` are
+    accumulated in ``float64``, ``min`` and ``max`` in the dtype of the frames.
+    """
+
+    def __init__(self, shape: tuple, ops=('mean',), ddof: int = 0):
+        """
+        :param shape: the shape of the frames, ``(height, width)``
+        :param ops: the statistics to compute, any of ``'sum'``, ``'mean'``, ``'var'``, ``'std'``, ``'min'``,
+            ``'max'``
+        :param ddof: delta degrees of freedom of the variance, e.g. 1 for the sample variance
+        """
+        unknown = [op for op in ops if op not in REDUCE_OPS]
+        if unknown:
+            raise ValueError(f'Unknown reduction {unknown}, expected any of {REDUCE_OPS}')
+
+        self._ops = tuple(ops)
+        self._ddof = ddof
+        self._count = 0
+        self._need_var = 'var' in ops or 'std' in ops
+        self._need_mean = self._need_var or 'mean' in ops
+
+        self._sum = np.zeros(shape) if 'sum' in ops else None
+        self._mean = np.zeros(shape) if self._need_mean else None
+        self._m2 = np.zeros(shape) if self._need_var else None
+        self._delta = np.empty(shape) if self._need_mean else None
+        self._scratch = np.empty(shape) if self._need_mean else None
+        self._min = None
+        self._max = None
+
+    @property
+    def count(self) -> int:
+        """the number of frames added so far"""
+        return self._count
+
+    def add(self, frame):
+        """add one frame to the statistics"""
+
+        self._count += 1
+
+        if self._sum is not None:
+            self._sum += frame
+
+        if self._need_mean:
+            np.subtract(frame, self._mean, out=self._delta)
+            np.divide(self._delta, self._count, out=self._scratch)
+            self._mean += self._scratch
+            if self._need_var:
+                np.subtract(frame, self._mean, out=self._scratch)
+                self._scratch *= self._delta
+                self._m2 += self._scratch
+
+        if 'min' in self._ops:
+            if self._min is None:
+                self._min = frame.copy()
+            else:
+                np.minimum(self._min, frame, out=self._min)
+        if 'max' in self._ops:
+            if self._max is None:
+                self._max = frame.copy()
+            else:
+                np.maximum(self._max, frame, out=self._max)
+
+    def result(self) -> dict:
+        """return a dictionary with an array for each of the requested statistics"""
+
+        if self._count == 0:
+            raise ValueError('No frame has been added')
+
+        result = {}
+        for op in self._ops:
+            if op == 'sum':
+                result[op] = self._sum
+            elif op == 'mean':
+                result[op] = self._mean
+            elif op in ('var', 'std'):
+                var = self._m2 / max(self._count - self._ddof, 1)
+                result[op] = var if op == 'var' else np.sqrt(var)
+            elif op == 'min':
+                result[op] = self._min
+            elif op == 'max':
+                result[op] = self._max
+        return result
@@ -0,0 +1,254 @@
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from .metadata import FRAME_METADATA_DTYPE
+
+
+RING_HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('capacity', '<u8'),
+    ('height', '<u8'),
+    ('width', '<u8'),
+    ('dtype', 'S8'),
+    ('head', '<u8'),
+    ('tracker', '<u8'), ])
+"""The header at the start of the ring: the number of slots, the frame shape and dtype, ``head``, the
+sequence number of the last published frame (0 before the first one), and ``tracker``, which identifies the
+resource tracker of the publisher's process (0 where shared memory is not tracked)."""
+
+SLOT_HEADER_DTYPE = np.dtype([
+    ('seq', '<u8'),
+    ('metadata', FRAME_METADATA_DTYPE), ])
+"""The header of each slot: the sequence number of the frame it holds (0 while it is being written) and its
+metadata record (see :data:`~basler.metadata.FRAME_METADATA_DTYPE`)."""
+
+_MAGIC = b'PYBRING1'
+_ALIGN = 64
+# multiprocessing tracks shared memory blocks on POSIX only
+_TRACKED = os.name == 'posix'
+
+
+def _tracker_id():
+    """return an identifier of the resource tracker of this process, which the processes it starts share"""
+    return os.fstat(resource_tracker.getfd()).st_ino
+
+
+def _aligned(nbytes):
+    return (nbytes + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _layout(capacity, shape, dtype):
+    """return the offsets of the slot headers and the frames, and the total size of the ring"""
+
+    slots_offset = _aligned(RING_HEADER_DTYPE.itemsize)
+    frames_offset = slots_offset + _aligned(capacity * SLOT_HEADER_DTYPE.itemsize)
+    size = frames_offset + capacity * shape[0] * shape[1] * np.dtype(dtype).itemsize
+    return slots_offset, frames_offset, size
+
+
+class _Ring:
+
+    def _map(self, shm, capacity, shape, dtype):
+        slots_offset, frames_offset, _ = _layout(capacity, shape, dtype)
+        self._shm = shm
+        self._capacity = capacity
+        self._header = np.ndarray((), dtype=RING_HEADER_DTYPE, buffer=shm.buf)
+        self._slots = np.ndarray((capacity,), dtype=SLOT_HEADER_DTYPE, buffer=shm.buf, offset=slots_offset)
+        self._frames = np.ndarray((capacity,) + tuple(shape), dtype=dtype, buffer=shm.buf, offset=frames_offset)
+
+    @property
+    def name(self) -> str:
+        """the name of the shared memory block, used by the subscribers to attach"""
+        return self._shm.name
+
+    @property
+    def capacity(self) -> int:
+        """the number of slots"""
+        return self._capacity
+
+    @property
+    def shape(self) -> tuple:
+        """the shape of the frames, ``(height, width)``"""
+        return self._frames.shape[1:]
+
+    @property
+    def dtype(self):
+        """the dtype of the frames"""
+        return self._frames.dtype
+
+    @property
+    def head(self) -> int:
+        """the sequence number of the last published frame, 0 if none"""
+        return int(self._header['head'])
+
+    def _release(self):
+        # the views must be dropped before the block can be closed
+        self._header = self._slots = self._frames = None
+        self._shm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class FramePublisher(_Ring):
+
+    """
+    Publish frames into a fixed-size ring of slots in shared memory, from which any number of
+    :class:`FrameSubscriber` in other processes read them without copies.
+
+    There must be a single publishing thread. The publisher never waits for the subscribers: the oldest slot is
+    overwritten, and slow subscribers detect the overrun. It can be fed directly by a camera, e.g.
+    ``cam.start_callback(publisher.publish)`` (see :func:`~basler.basler_camera.BaslerCamera.start_callback`), or
+    one publisher per camera with ``array.start_callback([p0.publish, p1.publish])``.
+    """
+
+    def __init__(self, shape: tuple, dtype, capacity: int = 64, name: str = None):
+        """
+        :param shape: the shape of the frames, ``(height, width)``
+        :param dtype: the dtype of the frames, e.g. from :func:`~basler.basler_camera.BaslerCamera.get_frame_dtype`
+        :param capacity: the number of slots
+        :param name: the name of the shared memory block; a unique name is generated if ``None``
+        """
+        if capacity < 2:
+            raise ValueError('The ring must have at least 2 slots')
+        dtype = np.dtype(dtype)
+        *_, size = _layout(capacity, shape, dtype)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self._map(shm, capacity, shape, dtype)
+        self._header[()] = (_MAGIC, capacity, shape[0], shape[1], dtype.str.encode(), 0,
+                            _tracker_id() if _TRACKED else 0)
+        self._slots['seq'] = 0
+        self._seq = 0
+
+    def publish(self, frame, record=None) -> int:
+        """copy a frame into the next slot, overwriting the oldest frame.
+
+        :param frame: the frame, of the shape and dtype of the ring
+        :param record: its metadata record (see :data:`~basler.metadata.FRAME_METADATA_DTYPE`), or ``None``
+        :return: the sequence number of the frame, starting from 1
+        """
+        seq = self._seq + 1
+        slot = (seq - 1) % self._capacity
+        # mark the slot as being written, so that readers of the old frame notice the overwrite
+        self._slots['seq'][slot] = 0
+        self._frames[slot] = frame
+        if record is None:
+            self._slots['metadata'][slot] = np.zeros((), dtype=FRAME_METADATA_DTYPE)
+        else:
+            self._slots['metadata'][slot] = record
+        self._slots['seq'][slot] = seq
+        self._header['head'] = seq
+        self._seq = seq
+        return seq
+
+    def close(self, unlink: bool = True):
+        """close the ring; if ``unlink``, also remove the shared memory block once all subscribers closed it"""
+        shm = self._shm
+        self._release()
+        if unlink:
+            shm.unlink()
+
+
+class FrameSubscriber(_Ring):
+
+    """
+    Read the frames of a :class:`FramePublisher` from another process.
+
+    Frames are returned as views of the shared memory, without copies. A view stays valid only until the
+    publisher wraps around the ring and overwrites its slot; use :func:`is_valid` after processing a frame to
+    check that it was not overwritten meanwhile, or copy it. :func:`next` returns every frame in order and
+    counts the frames that were overwritten before they could be read in :attr:`overruns`.
+    """
+
+    def __init__(self, name: str, poll_interval: float = 0.0005):
+        """
+        :param name: the name of the publisher's shared memory block (see :attr:`FramePublisher.name`)
+        :param poll_interval: the time in seconds between checks for a new frame in :func:`next`
+        """
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+            tracked = False
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+            tracked = _TRACKED
+
+        header = np.ndarray((), dtype=RING_HEADER_DTYPE, buffer=shm.buf).copy()[()]
+        if tracked and header['tracker'] != _tracker_id():
+            # before Python 3.13, attaching registers the block with the resource tracker of this process, which
+            # would remove it when this process exits; only the publisher owns the block. The publisher's tracker,
+            # which its child processes share, keeps the registration of the publisher.
+            resource_tracker.unregister('/' + shm.name, 'shared_memory')
+        if header['magic'] != _MAGIC:
+            shm.close()
+            raise ValueError(f'{name!r} is not a frame ring')
+        self._map(shm, int(header['capacity']), (int(header['height']), int(header['width'])),
+                  np.dtype(header['dtype'].decode()))
+        self._poll_interval = poll_interval
+        self._next_seq = self.head + 1
+        self.overruns = 0
+
+    def _read(self, seq):
+        """return ``(frame, record)`` of a sequence number, or ``None`` if the slot no longer holds it"""
+        slot = (seq - 1) % self._capacity
+        if self._slots['seq'][slot] != seq:
+            return None
+        record = self._slots['metadata'][slot].copy()
+        frame = self._frames[slot]
+        if self._slots['seq'][slot] != seq:
+            return None
+        return frame, record
+
+    def is_valid(self, seq: int) -> bool:
+        """return whether the frame of a sequence number is still in the ring, i.e. a view of it returned before
+        was not overwritten
+        """
+        return seq > 0 and self._slots['seq'][(seq - 1) % self._capacity] == seq
+
+    def latest(self):
+        """return ``(seq, frame, record)`` of the most recent frame, or ``None`` if nothing was published yet.
+        Frames published before are skipped by the next call of :func:`next`.
+        """
+        while True:
+            head = self.head
+            if head == 0:
+                return None
+            result = self._read(head)
+            if result is not None:
+                self._next_seq = head + 1
+                return (head,) + result
+
+    def next(self, timeout: float = None):
+        """wait for the frame following the last one returned and return ``(seq, frame, record)``.
+
+        If that frame was already overwritten, the frames are skipped up to the oldest one still in the ring
+        and counted in :attr:`overruns`.
+
+        :param timeout: the maximum time to wait in seconds, or ``None`` to wait forever
+        :raises TimeoutError: if no frame arrived in time
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            head = self.head
+            if head >= self._next_seq:
+                # the slot after head may be being overwritten, so the oldest safe frame is one later
+                oldest = max(head - self._capacity + 2, 1)
+                if self._next_seq < oldest:
+                    self.overruns += oldest - self._next_seq
+                    self._next_seq = oldest
+                result = self._read(self._next_seq)
+                if result is not None:
+                    seq = self._next_seq
+                    self._next_seq += 1
+                    return (seq,) + result
+                continue
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError('No new frame was published')
+            time.sleep(self._poll_interval)
+
+    def close(self):
+        """detach from the ring"""
+        self._release()
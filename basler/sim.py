@@ -0,0 +1,916 @@
+import contextlib
+import random
+import threading
+import time
+from collections import deque
+import numpy as np
+import pypylon.genicam
+import pypylon.pylon
+from .backend import FeatureNode
+from .unpack import NumpyConverter
+
+
+def _pack_mono12packed(p, b):
+    b[..., 0] = p[..., 0] >> 4
+    b[..., 1] = (p[..., 0] & 0x0F) | ((p[..., 1] & 0x0F) << 4)
+    b[..., 2] = p[..., 1] >> 4
+
+
+def _pack_mono12p(p, b):
+    b[..., 0] = p[..., 0] & 0xFF
+    b[..., 1] = (p[..., 0] >> 8) | ((p[..., 1] & 0x0F) << 4)
+    b[..., 2] = p[..., 1] >> 4
+
+
+def _pack_mono10packed(p, b):
+    b[..., 0] = p[..., 0] >> 2
+    b[..., 1] = (p[..., 0] & 0x03) | ((p[..., 1] & 0x03) << 4)
+    b[..., 2] = p[..., 1] >> 2
+
+
+def _pack_mono10p(p, b):
+    b[..., 0] = p[..., 0] & 0xFF
+    b[..., 1] = (p[..., 0] >> 8) | ((p[..., 1] & 0x3F) << 2)
+    b[..., 2] = (p[..., 1] >> 6) | ((p[..., 2] & 0x0F) << 4)
+    b[..., 3] = (p[..., 2] >> 4) | ((p[..., 3] & 0x03) << 6)
+    b[..., 4] = p[..., 3] >> 2
+
+
+# pixel format: (pylon pixel type, bit depth, packing function, bytes per group, pixels per group)
+PIXEL_FORMATS = {
+    'Mono8': (pypylon.pylon.PixelType_Mono8, 8, None, 1, 1),
+    'Mono10': (pypylon.pylon.PixelType_Mono10, 10, None, 2, 1),
+    'Mono12': (pypylon.pylon.PixelType_Mono12, 12, None, 2, 1),
+    'Mono16': (pypylon.pylon.PixelType_Mono16, 16, None, 2, 1),
+    'Mono10p': (pypylon.pylon.PixelType_Mono10p, 10, _pack_mono10p, 5, 4),
+    'Mono10Packed': (pypylon.pylon.PixelType_Mono10packed, 10, _pack_mono10packed, 3, 2),
+    'Mono12p': (pypylon.pylon.PixelType_Mono12p, 12, _pack_mono12p, 3, 2),
+    'Mono12Packed': (pypylon.pylon.PixelType_Mono12packed, 12, _pack_mono12packed, 3, 2), }
+"""The pixel formats the simulated cameras support."""
+
+_INCOMPLETE_BUFFER = 0xE1000014
+
+
+# ----------------------- feature nodes --------------------------------
+
+class _Node(FeatureNode):
+
+    def __init__(self, name, value=None, locked_while_grabbing=False, read_only=False):
+        self._name = name
+        self._value = value
+        self._locked_while_grabbing = locked_while_grabbing
+        self._read_only = read_only
+        self._device = None
+
+    def IsWritable(self) -> bool:
+        if self._read_only:
+            return False
+        return not (self._locked_while_grabbing and self._device is not None and self._device.grabbing)
+
+    def GetValue(self):
+        return self._value
+
+    def SetValue(self, value):
+        if not self.IsWritable():
+            raise pypylon.genicam.AccessException(f"Node '{self._name}' is not writable")
+        self._value = self._check(value)
+
+    def _check(self, value):
+        return value
+
+    def ToString(self) -> str:
+        return str(self.GetValue())
+
+    def FromString(self, text: str):
+        self.SetValue(text)
+
+
+class _IntNode(_Node):
+
+    def __init__(self, name, value, minimum, maximum, increment=1, **kwargs):
+        super().__init__(name, value, **kwargs)
+        self._min = minimum
+        self._max = maximum
+        self._inc = increment
+
+    def GetMin(self) -> int:
+        return self._min() if callable(self._min) else self._min
+
+    def GetMax(self) -> int:
+        return self._max() if callable(self._max) else self._max
+
+    def GetInc(self) -> int:
+        return self._inc
+
+    def _check(self, value):
+        value = int(value)
+        if not self.GetMin() <= value <= self.GetMax():
+            raise pypylon.genicam.OutOfRangeException(
+                f"Value {value} of '{self._name}' must be between {self.GetMin()} and {self.GetMax()}")
+        if (value - self.GetMin()) % self._inc:
+            raise pypylon.genicam.OutOfRangeException(
+                f"Value {value} of '{self._name}' must be a multiple of {self._inc} from {self.GetMin()}")
+        return value
+
+    def FromString(self, text: str):
+        self.SetValue(int(text))
+
+
+class _FloatNode(_IntNode):
+
+    def __init__(self, name, value, minimum, maximum, **kwargs):
+        super().__init__(name, float(value), minimum, maximum, **kwargs)
+
+    def _check(self, value):
+        value = float(value)
+        if not self.GetMin() <= value <= self.GetMax():
+            raise pypylon.genicam.OutOfRangeException(
+                f"Value {value} of '{self._name}' must be between {self.GetMin()} and {self.GetMax()}")
+        return value
+
+    def ToString(self) -> str:
+        return repr(self.GetValue())
+
+    def FromString(self, text: str):
+        self.SetValue(float(text))
+
+
+class _ComputedNode(_Node):
+
+    def __init__(self, name, compute):
+        super().__init__(name, read_only=True)
+        self._compute = compute
+
+    def GetValue(self):
+        return self._compute()
+
+
+class _BoolNode(_Node):
+
+    def _check(self, value):
+        return bool(value)
+
+    def ToString(self) -> str:
+        return '1' if self.GetValue() else '0'
+
+    def FromString(self, text: str):
+        self.SetValue(text.strip() in ('1', 'true', 'True'))
+
+
+class _EnumNode(_Node):
+
+    def __init__(self, name, value, symbolics, **kwargs):
+        super().__init__(name, value, **kwargs)
+        self._symbolics = tuple(symbolics)
+
+    def GetSymbolics(self) -> tuple:
+        return self._symbolics
+
+    def _check(self, value):
+        if value not in self._symbolics:
+            raise pypylon.genicam.InvalidArgumentException(
+                f"'{value}' is not a valid value of '{self._name}', expected one of {self._symbolics}")
+        return value
+
+
+class _SelectedEnumNode(_EnumNode):
+
+    """an enumeration with one value per value of a selector node, like ``TriggerMode`` per ``TriggerSelector``"""
+
+    def __init__(self, name, selector, values: dict, symbolics):
+        super().__init__(name, None, symbolics)
+        self._selector = selector
+        self._values = dict(values)
+
+    def GetValue(self):
+        return self._values[self._selector.GetValue()]
+
+    def get(self, selector_value):
+        return self._values[selector_value]
+
+    def SetValue(self, value):
+        self._values[self._selector.GetValue()] = self._check(value)
+
+
+class _UnavailableNode(FeatureNode):
+
+    def __init__(self, name):
+        self._name = name
+
+    def IsAvailable(self) -> bool:
+        return False
+
+    def GetValue(self):
+        raise pypylon.genicam.AccessException(f"Node '{self._name}' is not available")
+
+    def SetValue(self, value):
+        raise pypylon.genicam.AccessException(f"Node '{self._name}' is not available")
+
+
+# ----------------------- device ---------------------------------------
+
+class SimulatedDevice:
+
+    """
+    A simulated camera: its device info, its feature nodes and the model of its sensor. The state of the nodes
+    is kept by the device, so it persists when a camera is closed and opened again, like on a real camera.
+
+    Frames are synthetic: ``num_patterns`` random images of the current AOI and pixel format are generated once
+    and delivered in turn (frame ``image_number`` shows pattern ``(image_number - 1) % num_patterns``, see
+    :func:`get_pattern`), so that producing a frame costs no CPU time and benchmarks measure the library.
+    """
+
+    def __init__(self, serial_number: str = '40000000', model_name: str = 'Simulated', ip: str = None,
+                 user_defined_name: str = '', width: int = 1024, height: int = 1024, pixel_format: str = 'Mono8',
+                 pixel_formats=tuple(PIXEL_FORMATS), generation: str = 'usb', max_framerate: float = 100.0,
+                 jitter: float = 0.0, drop_rate: float = 0.0, error_rate: float = 0.0, num_patterns: int = 4,
+                 seed: int = 0):
+        """
+        :param serial_number: the serial number
+        :param model_name: the model name
+        :param ip: the IP address, if the camera is to be found by IP address
+        :param user_defined_name: the user-defined name
+        :param width: the width of the sensor
+        :param height: the height of the sensor
+        :param pixel_format: the initial pixel format, one of :data:`PIXEL_FORMATS`
+        :param pixel_formats: the pixel formats the camera supports
+        :param generation: ``'usb'`` for the feature names of newer cameras (``ExposureTime``,
+            ``AcquisitionFrameRate``, ``Gain``, ...) or ``'gige'`` for those of older GigE cameras
+            (``ExposureTimeAbs``, ``AcquisitionFrameRateAbs``, ``GainRaw``, ``GevSCPSPacketSize``, ...)
+        :param max_framerate: the maximum frame rate of the sensor at full resolution, in Hz; the exposure time
+            and ``AcquisitionFrameRate`` lower it
+        :param jitter: the maximum random delay in seconds added to the delivery of each frame
+        :param drop_rate: the probability that a frame is lost (a gap in the image numbers)
+        :param error_rate: the probability that a frame is delivered as a failed grab result
+        :param num_patterns: the number of distinct synthetic images
+        :param seed: the seed of the random images and of the random events
+        """
+        if generation not in ('usb', 'gige'):
+            raise ValueError(f"Unknown generation {generation!r}, expected 'usb' or 'gige'")
+        unknown = [name for name in pixel_formats if name not in PIXEL_FORMATS]
+        if unknown or pixel_format not in pixel_formats:
+            raise ValueError(f'Unsupported pixel formats {unknown or pixel_format}, expected any of '
+                             f'{tuple(PIXEL_FORMATS)}')
+
+        self.generation = generation
+        self.max_framerate = max_framerate
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.error_rate = error_rate
+        self.num_patterns = num_patterns
+        self.seed = seed
+        self.grabbing = False
+        self.owner = None
+        self._patterns = {}
+        self._clock = time.monotonic()
+
+        self.device_info = pypylon.pylon.CDeviceInfo()
+        self.device_info.SetSerialNumber(serial_number)
+        self.device_info.SetModelName(model_name)
+        self.device_info.SetVendorName('Basler')
+        self.device_info.SetDeviceClass('BaslerSimulated')
+        self.device_info.SetFriendlyName(f'Basler {model_name} ({serial_number})')
+        self.device_info.SetFullName(f'{model_name} ({serial_number})')
+        self.device_info.SetUserDefinedName(user_defined_name)
+        if ip is not None:
+            self.device_info.SetIpAddress(ip)
+
+        if generation == 'usb':
+            exposure = _FloatNode('ExposureTime', 5000, 10, 1e7)
+            framerate = _FloatNode('AcquisitionFrameRate', max_framerate, 0.1, 1e6)
+            nodes = [exposure, framerate,
+                     _ComputedNode('ResultingFrameRate', self.resulting_framerate),
+                     _FloatNode('Gain', 0, 0, 24)]
+        else:
+            exposure = _FloatNode('ExposureTimeAbs', 5000, 35, 1e7)
+            framerate = _FloatNode('AcquisitionFrameRateAbs', max_framerate, 0.1, 1e6)
+            nodes = [exposure, framerate,
+                     _ComputedNode('ResultingFrameRateAbs', self.resulting_framerate),
+                     _IntNode('GainRaw', 0, 0, 500),
+                     _IntNode('GevSCPSPacketSize', 1500, 220, 16404, 4, locked_while_grabbing=True),
+                     _IntNode('GevSCPD', 0, 0, 65535),
+                     _IntNode('GevSCFTD', 0, 0, 65535),
+                     _IntNode('GevTimestampTickFrequency', 125000000, 125000000, 125000000, read_only=True)]
+        self._exposure = exposure
+        self._framerate = framerate
+
+        trigger_selector = _EnumNode('TriggerSelector', 'FrameStart', ('FrameStart', 'AcquisitionStart'))
+        nodes += [
+            _IntNode('WidthMax', width, width, width, read_only=True),
+            _IntNode('HeightMax', height, height, height, read_only=True),
+            _IntNode('Width', width, 16, lambda: width - self.nodes['OffsetX'].GetValue(), 4,
+                     locked_while_grabbing=True),
+            _IntNode('Height', height, 1, lambda: height - self.nodes['OffsetY'].GetValue(),
+                     locked_while_grabbing=True),
+            _IntNode('OffsetX', 0, 0, lambda: width - self.nodes['Width'].GetValue(), 4),
+            _IntNode('OffsetY', 0, 0, lambda: height - self.nodes['Height'].GetValue()),
+            _EnumNode('PixelFormat', pixel_format, pixel_formats, locked_while_grabbing=True),
+            _ComputedNode('PixelDynamicRangeMin', lambda: 0),
+            _ComputedNode('PixelDynamicRangeMax', lambda: 2 ** self.bit_depth - 1),
+            _ComputedNode('PayloadSize', lambda: self.payload_size),
+            _BoolNode('AcquisitionFrameRateEnable', False),
+            trigger_selector,
+            _SelectedEnumNode('TriggerMode', trigger_selector, {'FrameStart': 'Off', 'AcquisitionStart': 'Off'},
+                              ('Off', 'On')),
+            _SelectedEnumNode('TriggerSource', trigger_selector,
+                              {'FrameStart': 'Software', 'AcquisitionStart': 'Software'},
+                              ('Software', 'Line1', 'Line2', 'Line3')), ]
+        self.nodes = {}
+        for node in nodes:
+            node._device = self
+            self.nodes[node._name] = node
+
+    @property
+    def serial_number(self) -> str:
+        return self.device_info.GetSerialNumber()
+
+    @property
+    def bit_depth(self) -> int:
+        return PIXEL_FORMATS[self.nodes['PixelFormat'].GetValue()][1]
+
+    @property
+    def payload_size(self) -> int:
+        """the size of a frame as sent by the camera, in bytes"""
+        _, _, _, group_bytes, group_pixels = PIXEL_FORMATS[self.nodes['PixelFormat'].GetValue()]
+        return self.nodes['Height'].GetValue() * self.nodes['Width'].GetValue() * group_bytes // group_pixels
+
+    @property
+    def exposure_time(self) -> float:
+        """the exposure time in seconds"""
+        return self._exposure.GetValue() / 1e6
+
+    def resulting_framerate(self) -> float:
+        """the frame rate the camera runs at, in Hz"""
+        framerate = min(self.max_framerate, 1 / self.exposure_time)
+        if self.nodes['AcquisitionFrameRateEnable'].GetValue():
+            framerate = min(framerate, self._framerate.GetValue())
+        return framerate
+
+    def timestamp(self, t: float) -> int:
+        """the camera timestamp (in ns) of a time of ``time.monotonic()``"""
+        return int((t - self._clock) * 1e9)
+
+    def get_patterns(self):
+        """return ``(values, raw)``: the pixel values of the synthetic images of the current AOI and pixel format,
+        of shape ``(num_patterns, height, width)``, and their bytes as sent by the camera, of shape
+        ``(num_patterns, number_of_bytes)``
+        """
+
+        pixel_format = self.nodes['PixelFormat'].GetValue()
+        height, width = self.nodes['Height'].GetValue(), self.nodes['Width'].GetValue()
+        key = (pixel_format, height, width)
+        if key not in self._patterns:
+            _, bit_depth, pack, group_bytes, group_pixels = PIXEL_FORMATS[pixel_format]
+            dtype = np.uint8 if bit_depth == 8 else np.uint16
+            rng = np.random.default_rng(self.seed)
+            values = rng.integers(0, 2 ** bit_depth, size=(self.num_patterns, height, width), dtype=dtype)
+            values.flags.writeable = False
+            if pack is None:
+                raw = values.reshape(self.num_patterns, -1).view(np.uint8)
+            else:
+                num_groups = height * width // group_pixels
+                raw = np.empty((self.num_patterns, num_groups, group_bytes), dtype=np.uint8)
+                pack(values.reshape(self.num_patterns, num_groups, group_pixels), raw)
+                raw = raw.reshape(self.num_patterns, -1)
+                raw.flags.writeable = False
+            self._patterns = {key: (values, raw)}
+        return self._patterns[key]
+
+    def get_pattern(self, image_number: int):
+        """return the pixel values of the frame of an image number, as the NumPy converter would return them
+        without MSB alignment
+        """
+        values, _ = self.get_patterns()
+        return values[(image_number - 1) % self.num_patterns]
+
+
+# ----------------------- grab results ---------------------------------
+
+class SimulatedGrabResult:
+
+    """A grab result with the interface of pylon's ``GrabResult``, pointing to a synthetic image."""
+
+    def __init__(self, camera=None, values=None, raw=None, pixel_type=None, image_number=0, id=0,
+                 timestamp=0, block_id=0, skipped=0, error_code=0):
+        self._camera = camera
+        self._values = values
+        self._raw = raw
+        self.PixelType = pixel_type
+        self.Height, self.Width = values.shape if values is not None else (0, 0)
+        self.ImageNumber = image_number
+        self.ID = id
+        self.TimeStamp = timestamp
+        self.BlockID = block_id
+        self.NumberOfSkippedImages = skipped
+        self.ErrorCode = error_code
+        self.ErrorDescription = 'The buffer was incompletely grabbed.' if error_code else ''
+        self._released = False
+
+    def IsValid(self) -> bool:
+        return self._values is not None
+
+    def GrabSucceeded(self) -> bool:
+        return self.IsValid() and not self.ErrorCode
+
+    def GetCameraContext(self):
+        return self._camera.GetCameraContext() if self._camera is not None else 0
+
+    def _check_unpacked(self):
+        if not self.GrabSucceeded():
+            raise pypylon.genicam.RuntimeException('The grab failed')
+        if self.PixelType in (pixel_type for pixel_type, _, pack, _, _ in PIXEL_FORMATS.values() if pack):
+            raise pypylon.genicam.RuntimeException('Packed pixel types cannot be accessed as an array')
+
+    def GetArrayZeroCopy(self):
+        self._check_unpacked()
+        return contextlib.nullcontext(self._values)
+
+    def GetArray(self):
+        self._check_unpacked()
+        return self._values.copy()
+
+    def GetImageMemoryView(self):
+        return memoryview(self._raw)
+
+    def GetBuffer(self) -> bytes:
+        return self._raw.tobytes()
+
+    def Release(self):
+        if self._camera is not None and self.IsValid() and not self._released:
+            self._released = True
+            with self._camera._condition:
+                self._camera.outstanding -= 1
+
+
+# ----------------------- camera ---------------------------------------
+
+class _NodeMap:
+
+    def __init__(self, camera):
+        self._camera = camera
+
+    def GetNode(self, name):
+        return self._camera._get_node(name)
+
+
+class _StreamGrabberNodeMap:
+
+    def __init__(self, nodes):
+        self._nodes = nodes
+
+    def GetNode(self, name):
+        return self._nodes.get(name)
+
+
+class SimulatedCamera:
+
+    """
+    A camera with the interface of pylon's ``InstantCamera`` (the parts used by this package), attached to a
+    :class:`SimulatedDevice`.
+
+    Frames are produced on a virtual schedule given by the resulting frame rate, without a background thread:
+    every call catches up with the frames that are due. Like pylon, the grab engine holds at most
+    ``MaxNumBuffer`` frames (``OneByOne``; later frames are lost when the consumer is too slow) or keeps the
+    latest frames (``LatestImageOnly``, ``LatestImages`` with ``OutputQueueSize``, ``UpcomingImage``) and reports
+    the ones it skipped. The grab results retrieved and not released yet are counted in ``outstanding``.
+    """
+
+    def __init__(self, device: SimulatedDevice = None):
+        self._device = device
+        self._open = False
+        self._context = 0
+        self._condition = threading.Condition()
+        self._handlers = []
+        self._loop_thread = None
+        self._instant_nodes = {
+            'MaxNumBuffer': _IntNode('MaxNumBuffer', 10, 1, 1 << 20, locked_while_grabbing=True),
+            'OutputQueueSize': _IntNode('OutputQueueSize', 5, 1, 1 << 20, locked_while_grabbing=True),
+            'NumReadyBuffers': _ComputedNode('NumReadyBuffers', lambda: len(self._queue)), }
+        self._stream_grabber_nodes = {
+            'MaxBufferSize': _IntNode('MaxBufferSize', 1 << 20, 1, 1 << 30, locked_while_grabbing=True), }
+        for node in [*self._instant_nodes.values(), *self._stream_grabber_nodes.values()]:
+            node._device = self
+        self.grabbing = False
+        self.outstanding = 0
+        self._reset()
+
+    def _reset(self):
+        self._queue = deque()
+        self._triggers = deque()
+        self._max_frames = None
+        self._retrieved = 0
+        self._produced = 0
+        self._skipped = 0
+        self._next_image = 1
+        self._next_due = None
+        self._last_arrival = 0.0
+        self._strategy = pypylon.pylon.GrabStrategy_OneByOne
+        self._random = random.Random(self._device.seed if self._device is not None else 0)
+
+    # ---- device ----
+
+    def Attach(self, device: SimulatedDevice):
+        if self._open:
+            raise pypylon.genicam.RuntimeException('Cannot attach a device to an open camera')
+        self._device = device
+        self._reset()
+
+    def IsAttached(self) -> bool:
+        return self._device is not None
+
+    def GetDeviceInfo(self):
+        return self._device.device_info
+
+    def SetCameraContext(self, context: int):
+        self._context = context
+
+    def GetCameraContext(self) -> int:
+        return self._context
+
+    def Open(self):
+        if self._device is None:
+            raise pypylon.genicam.RuntimeException('No device is attached')
+        if self._open:
+            return
+        if self._device.owner is not None:
+            raise pypylon.genicam.RuntimeException(
+                f'The device {self._device.serial_number} is controlled by another application')
+        self._device.owner = self
+        self._open = True
+
+    def Close(self):
+        if not self._open:
+            return
+        self.StopGrabbing()
+        self._device.owner = None
+        self._open = False
+
+    def IsOpen(self) -> bool:
+        return self._open
+
+    def GetNodeMap(self):
+        return _NodeMap(self)
+
+    def GetStreamGrabberNodeMap(self):
+        return _StreamGrabberNodeMap(self._stream_grabber_nodes)
+
+    def _get_node(self, name):
+        if name in self._instant_nodes:
+            return self._instant_nodes[name]
+        if not self._open:
+            raise pypylon.genicam.AccessException(f"Node '{name}' is not accessible, the camera is not open")
+        return self._device.nodes.get(name) or _UnavailableNode(name)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self._get_node(name)
+
+    # ---- grabbing ----
+
+    def StartGrabbing(self, strategy=pypylon.pylon.GrabStrategy_OneByOne,
+                      loop=pypylon.pylon.GrabLoop_ProvidedByUser):
+        self._start(None, strategy, loop)
+
+    def StartGrabbingMax(self, max_images: int, strategy=pypylon.pylon.GrabStrategy_OneByOne,
+                         loop=pypylon.pylon.GrabLoop_ProvidedByUser):
+        self._start(max_images, strategy, loop)
+
+    def _start(self, max_images, strategy, loop):
+        if self.grabbing:
+            raise pypylon.genicam.RuntimeException('Grabbing has already been started.')
+        self.Open()
+        self._device.get_patterns()
+        with self._condition:
+            self._reset()
+            self._max_frames = max_images
+            self._strategy = strategy
+            self._next_due = time.monotonic() + self._device.exposure_time
+            self.grabbing = True
+            self._device.grabbing = True
+        if loop == pypylon.pylon.GrabLoop_ProvidedByInstantCamera:
+            self._loop_thread = threading.Thread(target=self._grab_loop, daemon=True)
+            self._loop_thread.start()
+
+    def StopGrabbing(self):
+        with self._condition:
+            self.grabbing = False
+            if self._device is not None:
+                self._device.grabbing = False
+            self._queue.clear()
+            self._condition.notify_all()
+        thread = self._loop_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+            self._loop_thread = None
+
+    def IsGrabbing(self) -> bool:
+        return self.grabbing
+
+    def _produce(self, now):
+        """move the frames that are due by ``now`` to the output queue; must hold the condition"""
+
+        device = self._device
+        triggered = device.nodes['TriggerMode'].get('FrameStart') == 'On'
+        while self.grabbing:
+            if self._max_frames is not None and self._produced >= self._max_frames:
+                return
+            if triggered:
+                if not self._triggers or self._triggers[0] > now:
+                    return
+                due = self._triggers.popleft()
+            else:
+                due = self._next_due
+                if due > now:
+                    return
+                self._next_due = due + 1 / device.resulting_framerate()
+
+            image_number = self._next_image
+            self._next_image += 1
+            if device.drop_rate and self._random.random() < device.drop_rate:
+                continue
+            arrival = max(due + self._random.uniform(0, device.jitter) if device.jitter else due,
+                          self._last_arrival)
+            self._last_arrival = arrival
+            error = bool(device.error_rate) and self._random.random() < device.error_rate
+
+            if self._strategy == pypylon.pylon.GrabStrategy_OneByOne:
+                if len(self._queue) >= self._instant_nodes['MaxNumBuffer'].GetValue():
+                    # no free buffer: the frame is lost
+                    continue
+                self._queue.append((arrival, image_number, due, error))
+                self._produced += 1
+            else:
+                if self._strategy == pypylon.pylon.GrabStrategy_LatestImages:
+                    size = self._instant_nodes['OutputQueueSize'].GetValue()
+                else:
+                    size = 1
+                self._queue.append((arrival, image_number, due, error))
+                self._produced += 1
+                while len(self._queue) > size:
+                    self._queue.popleft()
+                    self._skipped += 1
+
+    def _next_event(self):
+        """return the time at which something may become ready, or ``None``; must hold the condition"""
+
+        if self._queue:
+            return self._queue[0][0]
+        if not self.grabbing or (self._max_frames is not None and self._produced >= self._max_frames):
+            return None
+        if self._device.nodes['TriggerMode'].get('FrameStart') == 'On':
+            return self._triggers[0] if self._triggers else None
+        return self._next_due
+
+    def _poll(self, now):
+        """return a grab result if one is ready at ``now``, otherwise ``None``; must hold the condition"""
+
+        self._produce(now)
+        if not self._queue or self._queue[0][0] > now:
+            return None
+        _, image_number, due, error = self._queue.popleft()
+        values, raw = self._device.get_patterns()
+        pattern = (image_number - 1) % self._device.num_patterns
+        self._retrieved += 1
+        self.outstanding += 1
+        result = SimulatedGrabResult(
+            self, values[pattern], raw[pattern],
+            PIXEL_FORMATS[self._device.nodes['PixelFormat'].GetValue()][0],
+            image_number, self._retrieved, self._device.timestamp(due),
+            image_number if self._device.generation == 'gige' else 2 ** 64 - 1,
+            self._skipped, _INCOMPLETE_BUFFER if error else 0)
+        self._skipped = 0
+        if self._max_frames is not None and self._retrieved >= self._max_frames:
+            self.grabbing = False
+            self._device.grabbing = False
+        return result
+
+    def RetrieveResult(self, timeout: int, handling=pypylon.pylon.TimeoutHandling_ThrowException):
+        deadline = time.monotonic() + timeout / 1000
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                if self.grabbing:
+                    result = self._poll(now)
+                    if result is not None:
+                        return result
+                if now >= deadline:
+                    break
+                wake = self._next_event() if self.grabbing else None
+                self._condition.wait(max((deadline if wake is None else min(wake, deadline)) - now, 0))
+        if handling == pypylon.pylon.TimeoutHandling_ThrowException:
+            raise pypylon.genicam.TimeoutException('Grab timed out.')
+        return SimulatedGrabResult()
+
+    def GrabOne(self, timeout: int, handling=pypylon.pylon.TimeoutHandling_ThrowException):
+        self.StartGrabbingMax(1)
+        try:
+            return self.RetrieveResult(timeout, handling)
+        finally:
+            self.StopGrabbing()
+
+    def GetGrabResultWaitObject(self):
+        return _WaitObject(self)
+
+    def WaitForFrameTriggerReady(self, timeout: int, handling=pypylon.pylon.TimeoutHandling_ThrowException):
+        if self.grabbing:
+            return True
+        if handling == pypylon.pylon.TimeoutHandling_ThrowException:
+            raise pypylon.genicam.TimeoutException('The camera is not grabbing.')
+        return False
+
+    def ExecuteSoftwareTrigger(self):
+        nodes = self._device.nodes
+        if nodes['TriggerMode'].get('FrameStart') != 'On' or nodes['TriggerSource'].get('FrameStart') != 'Software':
+            return
+        with self._condition:
+            if self.grabbing:
+                self._triggers.append(time.monotonic() + self._device.exposure_time)
+                self._condition.notify_all()
+
+    def RegisterImageEventHandler(self, handler, mode=pypylon.pylon.RegistrationMode_Append,
+                                  cleanup=pypylon.pylon.Cleanup_None):
+        if mode == pypylon.pylon.RegistrationMode_ReplaceAll:
+            self._handlers = []
+        self._handlers.append(handler)
+
+    def DeregisterImageEventHandler(self, handler) -> bool:
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+            return True
+        return False
+
+    def _grab_loop(self):
+        while self.grabbing:
+            result = self.RetrieveResult(100, pypylon.pylon.TimeoutHandling_Return)
+            if result.IsValid():
+                try:
+                    for handler in list(self._handlers):
+                        handler.OnImageGrabbed(self, result)
+                finally:
+                    result.Release()
+
+
+class _WaitObject:
+
+    def __init__(self, camera):
+        self.camera = camera
+
+
+class SimulatedWaitObjects:
+
+    """A container of the wait objects of simulated cameras, with the interface of pylon's ``WaitObjects``."""
+
+    _POLL_INTERVAL = 0.005
+
+    def __init__(self):
+        self._cameras = []
+
+    def Add(self, wait_object):
+        self._cameras.append(wait_object.camera)
+
+    def WaitForAny(self, timeout: int) -> bool:
+        deadline = time.monotonic() + timeout / 1000
+        while True:
+            now = time.monotonic()
+            wake = deadline
+            for camera in self._cameras:
+                with camera._condition:
+                    if not camera.grabbing:
+                        continue
+                    camera._produce(now)
+                    event = camera._next_event()
+                if event is not None:
+                    if event <= now:
+                        return True
+                    wake = min(wake, event)
+            if now >= deadline:
+                return False
+            # software triggers of other threads are noticed within the poll interval
+            time.sleep(min(wake - now, self._POLL_INTERVAL))
+
+
+class SimulatedCameraArray:
+
+    """A camera array with the interface of pylon's ``InstantCameraArray``."""
+
+    def __init__(self, size: int):
+        self._cameras = [SimulatedCamera() for _ in range(size)]
+        for i, camera in enumerate(self._cameras):
+            camera.SetCameraContext(i)
+
+    def __getitem__(self, index: int) -> SimulatedCamera:
+        return self._cameras[index]
+
+    def __len__(self):
+        return len(self._cameras)
+
+    def GetSize(self) -> int:
+        return len(self._cameras)
+
+    def Open(self):
+        for camera in self._cameras:
+            camera.Open()
+
+    def Close(self):
+        for camera in self._cameras:
+            if camera.IsAttached():
+                camera.Close()
+
+    def IsGrabbing(self) -> bool:
+        return any(camera.IsGrabbing() for camera in self._cameras)
+
+    def StopGrabbing(self):
+        for camera in self._cameras:
+            camera.StopGrabbing()
+
+
+# ----------------------- backend --------------------------------------
+
+class SimulatedBackend:
+
+    """
+    A backend of simulated cameras, for testing and benchmarking without hardware. Pass it to
+    :class:`~basler.basler_camera.BaslerCamera` or :class:`~basler.basler_camera_array.BaslerCameraArray`, or
+    make it the default with :func:`~basler.backend.set_default_backend`.
+
+    The ``'pylon'`` converter engine is served by :class:`~basler.unpack.NumpyConverter`, since pylon's
+    converter only accepts pylon grab results.
+
+    Example:
+
+    ``backend = SimulatedBackend(num_devices=2, pixel_format='Mono12p', max_framerate=500)``
+    ``cam = BaslerCamera(serial_number=backend.devices[0].serial_number, backend=backend)``
+    """
+
+    name = 'simulated'
+
+    def __init__(self, devices: list = None, num_devices: int = 2, **device_options):
+        """
+        :param devices: a list of :class:`SimulatedDevice`; if ``None``, ``num_devices`` devices are created
+            with the serial numbers ``'40000000'``, ``'40000001'``, ... and the IP addresses ``'192.168.0.100'``,
+            ``'192.168.0.101'``, ...
+        :param device_options: the options of the created devices; see :class:`SimulatedDevice`
+        """
+        if devices is None:
+            devices = [SimulatedDevice(str(40000000 + i), ip=f'192.168.0.{100 + i}', seed=i, **device_options)
+                       for i in range(num_devices)]
+        self.devices = list(devices)
+
+    def enumerate_devices(self) -> tuple:
+        return tuple(device.device_info for device in self.devices)
+
+    def get_device(self, device_info) -> SimulatedDevice:
+        """return the simulated device matching a (possibly partial) ``CDeviceInfo``"""
+
+        for device in self.devices:
+            info = device.device_info
+            if device_info.IsSerialNumberAvailable() and \
+                    device_info.GetSerialNumber() != info.GetSerialNumber():
+                continue
+            if device_info.IsIpAddressAvailable() and \
+                    not (info.IsIpAddressAvailable() and device_info.GetIpAddress() == info.GetIpAddress()):
+                continue
+            return device
+        raise pypylon.genicam.RuntimeException(
+            'No device is available or no device contains the provided device info properties.')
+
+    def create_device(self, device_info) -> SimulatedDevice:
+        return self.get_device(device_info)
+
+    def create_camera(self, device_info) -> SimulatedCamera:
+        return SimulatedCamera(self.create_device(device_info))
+
+    def create_camera_array(self, size: int) -> SimulatedCameraArray:
+        return SimulatedCameraArray(size)
+
+    def create_wait_objects(self) -> SimulatedWaitObjects:
+        return SimulatedWaitObjects()
+
+    def create_converter(self, msb_align: bool = True):
+        return NumpyConverter(msb_align)
+
+    def save_features(self, cam, path: str):
+        """save the writable feature nodes of a camera in the text format of pylon's ``.pfs`` files"""
+
+        with open(path, 'w') as f:
+            f.write('# GenApi persistence file (version 3.1.0)\n')
+            f.write(f'# Device = {cam.GetDeviceInfo().GetModelName()}\n')
+            for name, node in cam._device.nodes.items():
+                if node.IsWritable():
+                    f.write(f'{name}\t{node.ToString()}\n')
+
+    def load_features(self, cam, path: str, validate: bool = True):
+        """load a file saved with :func:`save_features` into a camera"""
+
+        with open(path) as f:
+            for line in f:
+                if line.startswith('#') or not line.strip():
+                    continue
+                name, text = line.rstrip('\n').split('\t', 1)
+                node = cam._device.nodes.get(name)
+                if node is None:
+                    if validate:
+                        raise pypylon.genicam.RuntimeException(f"Node '{name}' does not exist")
+                    continue
+                node.FromString(text)
@@ -0,0 +1,119 @@
+import json
+import math
+from .backend import is_readable, is_writable
+
+
+SNAPSHOT_NODES = (
+    'PixelFormat',
+    'BinningHorizontal',
+    'BinningVertical',
+    'Width',
+    'Height',
+    'OffsetX',
+    'OffsetY',
+    'Gain',
+    'GainRaw',
+    'AcquisitionFrameRateEnable',
+    'GevSCPSPacketSize',
+    'GevSCPD', )
+"""The feature nodes captured in a snapshot (if the camera has them), besides the exposure time and the
+acquisition frame rate nodes found by :func:`~basler.basler_camera.BaslerCamera.get_capabilities`."""
+
+AOI_NODES = ('OffsetX', 'OffsetY', 'Width', 'Height')
+
+
+def read_features(cam, names) -> dict:
+    """return a dictionary of the values of the feature nodes of a pylon camera that exist and are both
+    readable and writable, in the order of ``names``
+    """
+
+    node_map = cam.GetNodeMap()
+    values = {}
+    for name in names:
+        node = node_map.GetNode(name)
+        if is_readable(node) and is_writable(node):
+            values[name] = getattr(cam, name).GetValue()
+    return values
+
+
+def _same(a, b):
+    if isinstance(a, float) or isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-9)
+    return a == b
+
+
+class FeatureSnapshot:
+
+    """
+    The values of the feature nodes that describe the configuration of a camera (AOI, pixel format, exposure
+    time, frame rate, gain, packet size, ...), as plain Python values that can be saved as JSON.
+
+    Snapshots are taken and applied with :func:`~basler.basler_camera.BaslerCamera.get_snapshot` and
+    :func:`~basler.basler_camera.BaslerCamera.apply_snapshot`. Unlike pylon's feature persistence files (see
+    :func:`~basler.basler_camera.BaslerCamera.save_features`), which restore every node, applying a snapshot
+    only writes the nodes that differ from the current configuration.
+    """
+
+    def __init__(self, values: dict, model_name: str = None, serial_number: str = None):
+        """
+        :param values: a dictionary of feature node names and values, in the order they were read
+        :param model_name: the model of the camera the snapshot was taken from, for reference
+        :param serial_number: the serial number of the camera the snapshot was taken from, for reference
+        """
+        self.values = dict(values)
+        self.model_name = model_name
+        self.serial_number = serial_number
+
+    def __eq__(self, other):
+        return isinstance(other, FeatureSnapshot) and not self.diff(other.values) and \
+            self.values.keys() == other.values.keys()
+
+    def __repr__(self):
+        return f'FeatureSnapshot({self.values!r}, {self.model_name!r}, {self.serial_number!r})'
+
+    def diff(self, current: dict) -> dict:
+        """return the nodes of the snapshot whose value differs from ``current`` (or that are missing from it),
+        with the value of the snapshot
+        """
+        return {name: value for name, value in self.values.items()
+                if name not in current or not _same(value, current[name])}
+
+    def to_dict(self) -> dict:
+        return {'model_name': self.model_name, 'serial_number': self.serial_number, 'values': self.values}
+
+    @classmethod
+    def from_dict(cls, dct: dict):
+        return cls(dct['values'], dct.get('model_name'), dct.get('serial_number'))
+
+    def save(self, path: str):
+        """save the snapshot as a JSON file"""
+        save_snapshots(path, self)
+
+    @classmethod
+    def load(cls, path: str):
+        """load a snapshot saved with :func:`save`"""
+        snapshot = load_snapshots(path)
+        if not isinstance(snapshot, cls):
+            raise ValueError(f'{path} holds the snapshots of several cameras')
+        return snapshot
+
+
+def save_snapshots(path: str, snapshots):
+    """save a snapshot, or a list of snapshots (e.g. of a camera array), as a JSON file"""
+
+    if isinstance(snapshots, FeatureSnapshot):
+        content = snapshots.to_dict()
+    else:
+        content = [snapshot.to_dict() for snapshot in snapshots]
+    with open(path, 'w') as f:
+        json.dump(content, f, indent=2)
+
+
+def load_snapshots(path: str):
+    """load a snapshot or a list of snapshots saved with :func:`save_snapshots`"""
+
+    with open(path) as f:
+        content = json.load(f)
+    if isinstance(content, list):
+        return [FeatureSnapshot.from_dict(dct) for dct in content]
+    return FeatureSnapshot.from_dict(content)
@@ -0,0 +1,53 @@
+import pypylon.pylon
+
+
+GRAB_STRATEGIES = {
+    'OneByOne': pypylon.pylon.GrabStrategy_OneByOne,
+    'LatestImageOnly': pypylon.pylon.GrabStrategy_LatestImageOnly,
+    'LatestImages': pypylon.pylon.GrabStrategy_LatestImages,
+    'UpcomingImage': pypylon.pylon.GrabStrategy_UpcomingImage, }
+
+
+def get_grab_strategy(strategy: str):
+    """return the pylon grab strategy constant for a strategy name.
+
+    :param strategy: ``'OneByOne'`` (every frame, in order; for recording), ``'LatestImageOnly'``
+        (only the newest frame; lowest latency for live view), ``'LatestImages'`` or ``'UpcomingImage'``.
+        See the pylon documentation for details.
+    """
+    try:
+        return GRAB_STRATEGIES[strategy]
+    except KeyError:
+        raise ValueError(f'Unknown grab strategy {strategy!r}, expected one of {list(GRAB_STRATEGIES)}')
+
+
+class FrameStream:
+
+    """
+    An iterator over grabbed frames that is also a context manager. Grabbing is stopped and the grab results
+    are released when the stream is exhausted, closed, or left through an exception.
+
+    Example:
+
+    ``with cam.stream(duration=10) as frames:``
+        ``for frame in frames: ...``
+    """
+
+    def __init__(self, generator):
+        self._generator = generator
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._generator)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """stop grabbing"""
+        self._generator.close()
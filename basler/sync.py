@@ -0,0 +1,85 @@
+from collections import deque, namedtuple
+
+
+FrameSet = namedtuple('FrameSet', ['key', 'frames', 'metadata', 'complete'])
+FrameSet.__doc__ = """A set of frames captured by all cameras of an array at the same trigger.
+
+* ``key``: the value of the matching key (e.g. the image number) of the first frame of the set
+* ``frames``: a list with the frame of each camera, ``None`` for the cameras that are missing
+* ``metadata``: a list with the metadata record of each camera, ``None`` for the cameras that are missing
+* ``complete``: whether every camera contributed a frame
+"""
+
+SYNC_KEYS = ('image_number', 'block_id', 'timestamp', 'host_time')
+
+
+class FrameSetAssembler:
+
+    """
+    Group the frames of several cameras into :class:`FrameSet` objects by matching a field of their metadata
+    (see :data:`~basler.metadata.FRAME_METADATA_DTYPE`), e.g. the image number for hardware-triggered cameras
+    or the timestamp within a tolerance for synchronized clocks.
+
+    Frames of each camera are expected in order. Only a bounded window of incomplete sets is kept: a set is
+    given up (and returned as incomplete) when a newer set completes or when the window is full.
+    """
+
+    def __init__(self, num_cameras: int, key: str = 'image_number', tolerance: float = 0, window: int = 8):
+        """
+        :param num_cameras: the number of cameras
+        :param key: the metadata field to match: ``'image_number'``, ``'block_id'``, ``'timestamp'``
+            or ``'host_time'``
+        :param tolerance: the maximum difference between the keys of frames of the same set
+        :param window: the maximum number of incomplete sets kept in memory
+        """
+        if key not in SYNC_KEYS:
+            raise ValueError(f'Unknown key {key!r}, expected one of {SYNC_KEYS}')
+        if window < 1:
+            raise ValueError('The window must hold at least one set')
+        self._num_cameras = num_cameras
+        self._key = key
+        self._tolerance = tolerance
+        self._window = window
+        self._pending = deque()
+
+    def _new_set(self, key):
+        return FrameSet(key, [None] * self._num_cameras, [None] * self._num_cameras, False)
+
+    def _finish(self, frame_set):
+        return frame_set._replace(complete=all(frame is not None for frame in frame_set.frames))
+
+    def add(self, cam_id: int, frame, record) -> list:
+        """add the frame of a camera.
+
+        :param cam_id: the camera ID
+        :param frame: the frame
+        :param record: the metadata record of the frame
+        :return: the list of the sets that are finished, oldest first (often empty)
+        """
+
+        value = record[self._key].item()
+        for position, frame_set in enumerate(self._pending):
+            if frame_set.frames[cam_id] is None and abs(value - frame_set.key) <= self._tolerance:
+                break
+        else:
+            frame_set = self._new_set(value)
+            self._pending.append(frame_set)
+            position = len(self._pending) - 1
+
+        frame_set.frames[cam_id] = frame
+        frame_set.metadata[cam_id] = record
+
+        finished = []
+        if all(frame is not None for frame in frame_set.frames):
+            for _ in range(position + 1):
+                finished.append(self._finish(self._pending.popleft()))
+        while len(self._pending) > self._window:
+            finished.append(self._finish(self._pending.popleft()))
+        return finished
+
+    def flush(self) -> list:
+        """return all the pending sets, oldest first, and forget them"""
+
+        finished = [self._finish(frame_set) for frame_set in self._pending]
+        self._pending.clear()
+        return finished
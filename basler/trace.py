@@ -0,0 +1,195 @@
+import json
+import os
+import threading
+import time
+import numpy as np
+
+
+STAGES = ('retrieve', 'convert', 'submit', 'write')
+"""The stages of the acquisition loops recorded by an :class:`AcquisitionTrace`:
+
+* ``retrieve``: waiting for and retrieving a grab result (``RetrieveResult``, and ``WaitForAny`` for arrays); the
+  queue depth is the number of grab results still ready in pylon's output queue (``NumReadyBuffers``)
+* ``convert``: converting or copying the grab result into the frame buffer (the converter, or the NumPy copy)
+* ``submit``: handing the frame over to the writer threads, including the wait for a free slot; the queue depth is
+  the number of frames waiting to be written
+* ``write``: writing a frame on a writer thread (e.g. the ``PylonImage`` copy and the TIFF ``Save``); the queue
+  depth is the number of frames still waiting
+"""
+
+RETRIEVE, CONVERT, SUBMIT, WRITE = range(len(STAGES))
+
+TRACE_EVENT_DTYPE = np.dtype([
+    ('stage', np.uint8),
+    ('camera', np.int16),
+    ('thread', np.uint16),
+    ('index', np.int64),
+    ('start', np.float64),
+    ('duration', np.float64),
+    ('queue_depth', np.int32), ])
+"""The structured dtype of the events of a trace: the stage (an index into :data:`STAGES`), the camera ID, the
+thread (an index into :attr:`AcquisitionTrace.threads`), the index of the frame, the start time and duration in
+seconds (from the creation of the trace) and the queue depth (``-1`` if not sampled)."""
+
+COUNTERS = ('frames', 'dropped', 'underruns', 'bytes_written')
+"""The live counters of an :class:`AcquisitionTrace`:
+
+* ``frames``: the frames retrieved
+* ``dropped``: the frames lost: gaps in the image numbers, images skipped by the grab strategy, and frames dropped
+  by the writer queue
+* ``underruns``: the frames for which no recycled buffer was free, so that one was allocated in the loop
+* ``bytes_written``: the bytes of the frames written
+"""
+
+
+class AcquisitionTrace:
+
+    """
+    Record the duration of every stage (see :data:`STAGES`) of the acquisition loops of a camera or a camera
+    array, together with queue depths and live counters, to find where the time goes when grabbing falls behind.
+
+    Events are stored in an array preallocated at construction, so recording allocates nothing; once it is full,
+    further events are only counted in :attr:`overflow`. Tracing is enabled by passing the trace to
+    :func:`~basler.basler_camera.BaslerCamera.set_trace` (or the array's); when no trace is set, the loops only
+    test for ``None``.
+
+    Example:
+
+    ``trace = AcquisitionTrace()``
+    ``cam.set_trace(trace)``
+    ``cam.grab_n_save(1000, '/data/frame-%d.tiff')``
+    ``print(trace.summary())``
+    ``trace.save_chrome_trace('/data/trace.json')``  # open in https://ui.perfetto.dev or chrome://tracing
+    """
+
+    clock = staticmethod(time.perf_counter)
+
+    def __init__(self, capacity: int = 1 << 16, sample_buffers: bool = True):
+        """
+        :param capacity: the maximum number of events
+        :param sample_buffers: read the number of ready grab results from pylon after each retrieval (a node
+            read of about 10 µs per frame)
+        """
+        self.capacity = capacity
+        self.sample_buffers = sample_buffers
+        self.events = np.zeros(capacity, dtype=TRACE_EVENT_DTYPE)
+        self.threads = []
+        self._thread_ids = {}
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """forget the events and zero the counters"""
+        with self._lock:
+            self.origin = self.clock()
+            self._size = 0
+            self._last_image_numbers = {}
+            self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def __len__(self):
+        return min(self._size, self.capacity)
+
+    @property
+    def overflow(self) -> int:
+        """the number of events that did not fit"""
+        return max(self._size - self.capacity, 0)
+
+    def _thread(self) -> int:
+        ident = threading.get_ident()
+        thread = self._thread_ids.get(ident)
+        if thread is None:
+            with self._lock:
+                thread = self._thread_ids.setdefault(ident, len(self.threads))
+                if thread == len(self.threads):
+                    self.threads.append(threading.current_thread().name)
+        return thread
+
+    def record(self, stage: int, camera: int, index: int, start: float, end: float, queue_depth: int = -1):
+        """record an event
+
+        :param stage: the index of the stage in :data:`STAGES`
+        :param start: the start time, from :attr:`clock`
+        :param end: the end time, from :attr:`clock`
+        """
+        thread = self._thread()
+        with self._lock:
+            i = self._size
+            self._size += 1
+        if i < self.capacity:
+            self.events[i] = (stage, camera, thread, index, start - self.origin, end - start, queue_depth)
+
+    def add(self, counter: str, value: int = 1):
+        """increase a counter (see :data:`COUNTERS`)"""
+        with self._lock:
+            self.counters[counter] += value
+
+    def frame(self, camera: int, grab_result):
+        """count a retrieved frame, and the frames lost before it"""
+        image_number = grab_result.ImageNumber
+        last = self._last_image_numbers.get(camera)
+        self._last_image_numbers[camera] = image_number
+        lost = grab_result.NumberOfSkippedImages
+        if last is not None and image_number > last + 1:
+            lost += image_number - last - 1
+        with self._lock:
+            self.counters['frames'] += 1
+            self.counters['dropped'] += lost
+
+    def ready_buffers(self, cam) -> int:
+        """return the number of grab results ready in the output queue of a camera, or ``-1`` if not sampled"""
+        if not self.sample_buffers:
+            return -1
+        try:
+            return cam.NumReadyBuffers.GetValue()
+        except Exception:
+            return -1
+
+    def get_counters(self) -> dict:
+        """return a copy of the live counters; can be called from any thread while grabbing"""
+        with self._lock:
+            return dict(self.counters)
+
+    def get_events(self):
+        """return the recorded events, an array of :data:`TRACE_EVENT_DTYPE`"""
+        return self.events[:len(self)]
+
+    def summary(self) -> dict:
+        """return, for each stage that has events, a dictionary with the ``count`` of events, the ``total`` time
+        and the ``mean``, ``p50``, ``p99`` and ``max`` durations in milliseconds, and the ``max_queue_depth``
+        """
+        events = self.get_events()
+        result = {}
+        for stage, name in enumerate(STAGES):
+            selected = events[events['stage'] == stage]
+            if len(selected) == 0:
+                continue
+            durations = selected['duration'] * 1000
+            p50, p99 = np.percentile(durations, [50, 99])
+            result[name] = {'count': len(selected), 'total': float(durations.sum()),
+                            'mean': float(durations.mean()), 'p50': float(p50), 'p99': float(p99),
+                            'max': float(durations.max()), 'max_queue_depth': int(selected['queue_depth'].max())}
+        return result
+
+    def to_chrome_trace(self) -> dict:
+        """return the events in the Trace Event Format of Chrome (``chrome://tracing``) and Perfetto: one
+        complete event per stage and frame on the thread that ran it, and a counter track per queue
+        """
+        pid = os.getpid()
+        trace_events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                        for tid, name in enumerate(self.threads)]
+        for event in self.get_events().tolist():
+            stage, camera, tid, index, start, duration, queue_depth = event
+            ts = start * 1e6
+            trace_events.append({'name': STAGES[stage], 'cat': 'acquisition', 'ph': 'X', 'pid': pid, 'tid': tid,
+                                 'ts': ts, 'dur': duration * 1e6,
+                                 'args': {'camera': camera, 'index': index, 'queue_depth': queue_depth}})
+            if queue_depth >= 0:
+                trace_events.append({'name': f'{STAGES[stage]} queue (camera {camera})', 'ph': 'C', 'pid': pid,
+                                     'ts': ts, 'args': {'depth': queue_depth}})
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms',
+                'otherData': {'counters': self.get_counters(), 'overflow': self.overflow}}
+
+    def save_chrome_trace(self, path: str):
+        """save the events as a Chrome/Perfetto trace JSON file; see :func:`to_chrome_trace`"""
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome_trace(), f)
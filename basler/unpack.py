@@ -0,0 +1,132 @@
+import numpy as np
+import pypylon.pylon
+
+
+PACKED_PIXEL_TYPES = {
+    pypylon.pylon.PixelType_Mono12packed: 12,
+    pypylon.pylon.PixelType_Mono12p: 12,
+    pypylon.pylon.PixelType_Mono10packed: 10,
+    pypylon.pylon.PixelType_Mono10p: 10, }
+
+UNPACKED_PIXEL_TYPES = {
+    pypylon.pylon.PixelType_Mono8: 8,
+    pypylon.pylon.PixelType_Mono10: 10,
+    pypylon.pylon.PixelType_Mono12: 12,
+    pypylon.pylon.PixelType_Mono16: 16, }
+
+
+def _unpack_mono12packed(b, o):
+    # GigE Vision: byte 0 and 2 hold the 8 high bits, byte 1 the 4 low bits of both pixels
+    np.left_shift(b[..., 0], 4, out=o[..., 0], dtype=np.uint16)
+    o[..., 0] |= b[..., 1] & 0x0F
+    np.left_shift(b[..., 2], 4, out=o[..., 1], dtype=np.uint16)
+    o[..., 1] |= b[..., 1] >> 4
+
+
+def _unpack_mono12p(b, o):
+    # GenICam PFNC: bits are packed contiguously, least significant first
+    np.left_shift(b[..., 1] & 0x0F, 8, out=o[..., 0], dtype=np.uint16)
+    o[..., 0] |= b[..., 0]
+    np.left_shift(b[..., 2], 4, out=o[..., 1], dtype=np.uint16)
+    o[..., 1] |= b[..., 1] >> 4
+
+
+def _unpack_mono10packed(b, o):
+    # GigE Vision: byte 0 and 2 hold the 8 high bits, byte 1 the 2 low bits of both pixels
+    np.left_shift(b[..., 0], 2, out=o[..., 0], dtype=np.uint16)
+    o[..., 0] |= b[..., 1] & 0x03
+    np.left_shift(b[..., 2], 2, out=o[..., 1], dtype=np.uint16)
+    o[..., 1] |= (b[..., 1] >> 4) & 0x03
+
+
+def _unpack_mono10p(b, o):
+    # GenICam PFNC: 4 pixels in 5 bytes, least significant first
+    np.left_shift(b[..., 1] & 0x03, 8, out=o[..., 0], dtype=np.uint16)
+    o[..., 0] |= b[..., 0]
+    np.left_shift(b[..., 2] & 0x0F, 6, out=o[..., 1], dtype=np.uint16)
+    o[..., 1] |= b[..., 1] >> 2
+    np.left_shift(b[..., 3] & 0x3F, 4, out=o[..., 2], dtype=np.uint16)
+    o[..., 2] |= b[..., 2] >> 4
+    np.left_shift(b[..., 4], 2, out=o[..., 3], dtype=np.uint16)
+    o[..., 3] |= b[..., 3] >> 6
+
+
+# pixel type: (unpacking function, bytes per group, pixels per group)
+_UNPACKERS = {
+    pypylon.pylon.PixelType_Mono12packed: (_unpack_mono12packed, 3, 2),
+    pypylon.pylon.PixelType_Mono12p: (_unpack_mono12p, 3, 2),
+    pypylon.pylon.PixelType_Mono10packed: (_unpack_mono10packed, 3, 2),
+    pypylon.pylon.PixelType_Mono10p: (_unpack_mono10p, 5, 4), }
+
+
+def unpack_frames(raw, pixel_type: int, out, msb_align: bool = False):
+    """unpack Mono10/Mono12 packed pixel data into 16-bit pixels with NumPy, writing directly into ``out``.
+
+    Several frames can be unpacked at once by stacking them along leading axes.
+
+    :param raw: a ``uint8`` array of shape ``(..., number_of_bytes)`` with the packed data of each frame
+    :param pixel_type: the pylon pixel type of the data, one of :data:`PACKED_PIXEL_TYPES`
+    :param out: a C-contiguous ``uint16`` array of shape ``(..., height, width)``
+    :param msb_align: shift the values so that the most significant bit is aligned (like the pylon converter);
+        otherwise the raw values are kept (e.g. 0 to 4095 for 12-bit data)
+    :return: ``out``
+    """
+
+    try:
+        unpacker, group_bytes, group_pixels = _UNPACKERS[pixel_type]
+    except KeyError:
+        raise ValueError(f'Pixel type {pixel_type} is not a supported packed format')
+    if out.dtype != np.uint16 or not out.flags.c_contiguous:
+        raise ValueError('The output must be a C-contiguous uint16 array')
+
+    leading_shape = out.shape[:-2]
+    num_pixels = out.shape[-2] * out.shape[-1]
+    if num_pixels % group_pixels:
+        raise ValueError(f'The number of pixels must be a multiple of {group_pixels}')
+    num_groups = num_pixels // group_pixels
+
+    b = raw.reshape(leading_shape + (-1,))[..., :num_groups * group_bytes]
+    b = b.reshape(leading_shape + (num_groups, group_bytes))
+    o = out.reshape(leading_shape + (num_groups, group_pixels))
+    unpacker(b, o)
+
+    if msb_align:
+        out <<= 16 - PACKED_PIXEL_TYPES[pixel_type]
+    return out
+
+
+class NumpyConverter:
+
+    """
+    Convert grab results to 16-bit frames with NumPy instead of pylon's ``ImageFormatConverter``.
+    Unpacked formats (``Mono8``, ``Mono10``, ``Mono12``, ``Mono16``) are copied straight from the grab buffer,
+    and packed formats (``Mono10Packed``, ``Mono10p``, ``Mono12Packed``, ``Mono12p``) are unpacked with
+    :func:`unpack_frames`, both directly into the destination array.
+    """
+
+    def __init__(self, msb_align: bool = True):
+        """
+        :param msb_align: align the most significant bit like the pylon converter does; if ``False``,
+            the raw values are kept
+        """
+        self.msb_align = msb_align
+
+    def copy_frame(self, grab_result, dest):
+        """convert a grab result and write the pixels into ``dest``, a ``uint16`` array of shape
+        ``(height, width)``
+        """
+
+        pixel_type = grab_result.PixelType
+        if pixel_type in PACKED_PIXEL_TYPES:
+            raw = np.frombuffer(grab_result.GetImageMemoryView(), dtype=np.uint8)
+            unpack_frames(raw, pixel_type, dest, self.msb_align)
+            return
+
+        try:
+            bit_depth = UNPACKED_PIXEL_TYPES[pixel_type]
+        except KeyError:
+            raise ValueError(f'Pixel type {pixel_type} is not supported by the NumPy converter')
+        with grab_result.GetArrayZeroCopy() as frame:
+            dest[...] = frame
+        if self.msb_align and bit_depth < 16:
+            dest <<= 16 - bit_depth
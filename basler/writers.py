@@ -0,0 +1,352 @@
+import json
+import os
+import queue
+import threading
+import time
+import numpy as np
+import pypylon.pylon
+from .trace import WRITE
+
+
+class WriterError(Exception):
+    pass
+
+
+class FrameWriter:
+
+    """
+    Base class of the writers that store a sequence of frames. A writer is opened once with the size of the
+    sequence, receives the frames through :func:`write`, and is closed at the end.
+    Writers with ``ORDERED = True`` store frames in the order of arrival and must be fed by a single thread.
+    """
+
+    ORDERED = False
+
+    def open(self, n: int, shape: tuple, dtype):
+        """prepare to receive ``n`` frames of the given shape and dtype"""
+        pass
+
+    def write(self, index: int, frame):
+        """store ``frame`` as the ``index``-th frame (counting from 0) of the sequence"""
+        raise NotImplementedError
+
+    def close(self):
+        """finish writing"""
+        pass
+
+
+class TiffFileWriter(FrameWriter):
+
+    """
+    Save every frame as a separate TIFF file named after a pattern.
+    """
+
+    _PIXEL_TYPES = {
+        np.dtype(np.uint8): pypylon.pylon.PixelType_Mono8,
+        np.dtype(np.uint16): pypylon.pylon.PixelType_Mono16, }
+
+    def __init__(self, save_pattern: str, n_start: int = 1):
+        """
+        :param save_pattern: a string that contains one single '%d' as the number.
+        :param n_start: the number of the first frame in the file names; default is 1
+        """
+        self._save_pattern = save_pattern
+        self._n_start = n_start
+
+    def write(self, index: int, frame):
+
+        filename = self._save_pattern % (self._n_start + index)
+        image = pypylon.pylon.PylonImage()
+        image.AttachArray(frame, self._PIXEL_TYPES[frame.dtype])
+        image.Save(pypylon.pylon.ImageFileFormat_Tiff, filename)
+        image.Release()
+
+
+class MultiPageTiffWriter(FrameWriter):
+
+    """
+    Save all frames as pages of a single (Big)TIFF file. Requires the ``tifffile`` package.
+    """
+
+    ORDERED = True
+
+    def __init__(self, path: str, bigtiff: bool = True):
+        """
+        :param path: the path of the TIFF file
+        :param bigtiff: write a BigTIFF file, which is not limited to 4 GB
+        """
+        self._path = path
+        self._bigtiff = bigtiff
+        self._file = None
+
+    def open(self, n: int, shape: tuple, dtype):
+        try:
+            import tifffile
+        except ImportError:
+            raise ImportError('MultiPageTiffWriter requires the tifffile package')
+        self._file = tifffile.TiffWriter(self._path, bigtiff=self._bigtiff)
+
+    def write(self, index: int, frame):
+        self._file.write(frame, contiguous=True, photometric='minisblack')
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class RawFileWriter(FrameWriter):
+
+    """
+    Save all frames into a single preallocated ``.npy`` file through a memory map, with a sidecar JSON file
+    (``path + '.json'``) describing the sequence. The file can be opened lazily with
+    ``numpy.load(path, mmap_mode='r')``.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: the path of the ``.npy`` file
+        """
+        self._path = path
+        self._frames = None
+        self._written = 0
+        self._lock = threading.Lock()
+
+    @property
+    def frames(self):
+        """the memory-mapped array of shape ``(n, height, width)``, or ``None`` if not opened"""
+        return self._frames
+
+    def open(self, n: int, shape: tuple, dtype):
+        self._frames = np.lib.format.open_memmap(self._path, mode='w+', dtype=dtype, shape=(n,) + tuple(shape))
+        self._written = 0
+
+    def write(self, index: int, frame):
+        self._frames[index] = frame
+        self.mark_written()
+
+    def mark_written(self, count: int = 1):
+        """count frames that were filled directly into :attr:`frames` instead of through :func:`write`"""
+        with self._lock:
+            self._written += count
+
+    def flush(self, fsync: bool = False):
+        """write the frames received so far to disk
+
+        :param fsync: also ask the operating system to commit the file to the storage device
+        """
+        self._frames.flush()
+        if fsync:
+            with open(self._path, 'rb+') as f:
+                os.fsync(f.fileno())
+
+    def close(self, fsync: bool = False):
+        if self._frames is None:
+            return
+        self.flush(fsync)
+        metadata = {
+            'shape': list(self._frames.shape),
+            'dtype': self._frames.dtype.str,
+            'frames_written': self._written,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'), }
+        with open(self._path + '.json', 'w') as f:
+            json.dump(metadata, f, indent=2)
+
+
+class HDF5Writer(FrameWriter):
+
+    """
+    Save all frames into a chunked dataset of an HDF5 file. Requires the ``h5py`` package.
+    """
+
+    def __init__(self, path: str, dataset: str = 'frames', chunk_frames: int = 16, compression: str = None):
+        """
+        :param path: the path of the HDF5 file
+        :param dataset: the name of the dataset
+        :param chunk_frames: the number of frames per chunk
+        :param compression: an h5py compression filter, e.g. ``'lzf'``; default is no compression
+        """
+        self._path = path
+        self._dataset_name = dataset
+        self._chunk_frames = chunk_frames
+        self._compression = compression
+        self._file = None
+        self._dataset = None
+
+    def open(self, n: int, shape: tuple, dtype):
+        try:
+            import h5py
+        except ImportError:
+            raise ImportError('HDF5Writer requires the h5py package')
+        self._file = h5py.File(self._path, 'w')
+        self._dataset = self._file.create_dataset(
+            self._dataset_name, shape=(n,) + tuple(shape), dtype=dtype,
+            chunks=(min(self._chunk_frames, max(n, 1)),) + tuple(shape), compression=self._compression)
+
+    def write(self, index: int, frame):
+        self._dataset[index] = frame
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._dataset = None
+
+
+WRITERS = {
+    'tiff': TiffFileWriter,
+    'multipage_tiff': MultiPageTiffWriter,
+    'raw': RawFileWriter,
+    'hdf5': HDF5Writer, }
+
+
+def get_writer(save_pattern, writer: str = 'tiff', n_start: int = 1):
+    """return a :class:`FrameWriter` for a save pattern or path.
+
+    :param save_pattern: a '%d' file name pattern for ``'tiff'``, or the path of the output file for the other
+        writers. A :class:`FrameWriter` instance is returned unchanged.
+    :param writer: ``'tiff'`` (one TIFF file per frame), ``'multipage_tiff'`` (one BigTIFF file),
+        ``'raw'`` (one ``.npy`` file) or ``'hdf5'``
+    :param n_start: the number of the first frame in the file names of ``'tiff'``
+    """
+    if isinstance(save_pattern, FrameWriter):
+        return save_pattern
+    if writer not in WRITERS:
+        raise ValueError(f'Unknown writer {writer!r}, expected one of {list(WRITERS)}')
+    if writer == 'tiff':
+        return TiffFileWriter(save_pattern, n_start)
+    return WRITERS[writer](save_pattern)
+
+
+class AsyncFrameWriter:
+
+    """
+    Hand frames over from the grabbing loop to a pool of writer threads through a bounded queue, so that
+    slow disk I/O does not stall the camera.
+
+    Frame buffers are recycled: take one with :func:`get_buffer`, fill it and pass it to :func:`submit`;
+    it is returned to the pool once written (or dropped).
+    """
+
+    OVERFLOW_POLICIES = ('block', 'drop_oldest', 'fail')
+
+    def __init__(self, num_threads: int = 1, queue_size: int = 64, overflow: str = 'block', trace=None):
+        """
+        :param num_threads: the number of writer threads
+        :param queue_size: the maximum number of frames waiting to be written
+        :param overflow: what to do when the queue is full:
+            ``'block'`` waits for a free slot (no frame is lost but grabbing may stall),
+            ``'drop_oldest'`` discards the oldest waiting frame,
+            ``'fail'`` raises a :class:`WriterError`.
+        :param trace: an optional :class:`~basler.trace.AcquisitionTrace` recording the writes, the buffer
+            allocations and the drops
+        """
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f'Unknown overflow policy {overflow!r}, expected one of {self.OVERFLOW_POLICIES}')
+        if num_threads < 1:
+            raise ValueError('At least one writer thread is required')
+
+        self._overflow = overflow
+        self._trace = trace
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._buffers = {}
+        self._lock = threading.Lock()
+        self._written = 0
+        self._dropped = 0
+        self._error = None
+        self._threads = [threading.Thread(target=self._run, name=f'frame-writer-{i}', daemon=True)
+                         for i in range(num_threads)]
+        for thread in self._threads:
+            thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            writer, index, frame, camera = item
+            try:
+                if self._error is None:
+                    trace = self._trace
+                    if trace is not None:
+                        start = trace.clock()
+                    writer.write(index, frame)
+                    if trace is not None:
+                        trace.record(WRITE, camera, index, start, trace.clock(), self._queue.qsize())
+                        trace.add('bytes_written', frame.nbytes)
+                    with self._lock:
+                        self._written += 1
+            except Exception as e:
+                self._error = e
+            finally:
+                self._recycle(frame)
+
+    def _recycle(self, frame):
+        self._buffers.setdefault((frame.shape, frame.dtype), queue.SimpleQueue()).put(frame)
+
+    def get_buffer(self, shape: tuple, dtype):
+        """return a frame buffer of the given shape and dtype, reusing a written one when available"""
+
+        key = (tuple(shape), np.dtype(dtype))
+        try:
+            return self._buffers.setdefault(key, queue.SimpleQueue()).get_nowait()
+        except queue.Empty:
+            if self._trace is not None:
+                self._trace.add('underruns')
+            return np.empty(key[0], dtype=key[1])
+
+    def submit(self, writer, index: int, frame, camera: int = 0):
+        """queue ``frame`` to be written by ``writer.write(index, frame)`` on a writer thread.
+
+        :param writer: a :class:`FrameWriter`
+        :param index: the index of the frame in the sequence
+        :param frame: a buffer obtained from :func:`get_buffer`
+        :param camera: the camera ID of the frame, for tracing
+        """
+
+        if self._error is not None:
+            raise WriterError('Error when writing frames') from self._error
+
+        item = (writer, index, frame, camera)
+        if self._overflow == 'block':
+            self._queue.put(item)
+            return
+
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                if self._overflow == 'fail':
+                    raise WriterError('Writer queue is full')
+            try:
+                oldest = self._queue.get_nowait()
+            except queue.Empty:
+                continue
+            self._recycle(oldest[2])
+            with self._lock:
+                self._dropped += 1
+            if self._trace is not None:
+                self._trace.add('dropped')
+
+    def pending(self) -> int:
+        """return the number of frames waiting to be written"""
+        return self._queue.qsize()
+
+    def close(self, raise_errors: bool = True) -> dict:
+        """wait until all queued frames are written and stop the writer threads.
+
+        :param raise_errors: raise a :class:`WriterError` if a frame could not be written; disable it while
+            another exception propagates, so that the error of the writer threads does not hide it
+        :return: a dictionary with the number of frames ``written`` and ``dropped``
+        """
+
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+        if raise_errors and self._error is not None:
+            raise WriterError('Error when writing frames') from self._error
+
+        return {'written': self._written, 'dropped': self._dropped}
@@ -25,14 +25,15 @@ if __name__ == '__main__':
 
     cam_array.connect()
 
-    cam_array.set_exposure_time(0, CAM0_EXPOSURE_TIME)
-    cam_array.set_exposure_time(1, CAM1_EXPOSURE_TIME)
-    cam_array.set_acquisition_framerate(0, CAM0_FRAMERATE)
-    cam_array.set_acquisition_framerate(1, CAM1_FRAMERATE)
-    cam_array.set_pixel_format(0, CAM0_PIXEL_FORMAT)
-    cam_array.set_pixel_format(1, CAM0_PIXEL_FORMAT)
-    cam_array.set_aoi(0, CAM0_AOI)
-    cam_array.set_aoi(1, CAM1_AOI)
+    # pixel format, AOI, exposure time and frame rate are applied in a safe order, both cameras in parallel
+    reports = cam_array.configure([
+        {'pixel_format': CAM0_PIXEL_FORMAT, 'aoi': CAM0_AOI, 'exposure_time': CAM0_EXPOSURE_TIME,
+         'acquisition_framerate': CAM0_FRAMERATE},
+        {'pixel_format': CAM1_PIXEL_FORMAT, 'aoi': CAM1_AOI, 'exposure_time': CAM1_EXPOSURE_TIME,
+         'acquisition_framerate': CAM1_FRAMERATE}, ])
+    for cam_id, report in enumerate(reports):
+        if report['failed']:
+            print(f'Camera {cam_id} failed to apply: {report["failed"]}')
 
     # data acquisition
 
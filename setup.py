@@ -9,5 +9,6 @@ setuptools.setup(name='PyBasler',
     license='MIT',
     packages=setuptools.find_packages(),
     install_requires=['pypylon', 'numpy'],
+    extras_require={'tiff': ['tifffile'], 'hdf5': ['h5py']},
     test_suite='tests',
     )
\ No newline at end of file
@@ -0,0 +1,119 @@
+import time
+import unittest
+from basler.acquisition import ACQUISITION_DEFAULTS, check_acquisition_settings, size_buffer_pool
+from basler.basler_camera import BaslerCamera, DeviceError, GrabTimeoutError
+from basler.basler_camera_array import BaslerCameraArray
+from basler.sim import SimulatedBackend
+
+
+class TestAcquisitionSettings(unittest.TestCase):
+
+    def test_0_size_buffer_pool(self):
+
+        pool = size_buffer_pool(1000, 100, 0.5)
+        self.assertEqual({'max_num_buffer': 52, 'max_buffer_size': 1000, 'memory': 52000, 'stall_tolerance': 0.5},
+                         pool)
+        self.assertEqual(1, size_buffer_pool(1000, 100, 0, headroom=0)['max_num_buffer'])
+        with self.assertRaises(ValueError):
+            size_buffer_pool(1000, 100, 0.5, memory_limit=10000)
+        with self.assertRaises(ValueError):
+            size_buffer_pool(1000, 0, 0.5)
+
+    def test_1_check_settings(self):
+
+        settings = check_acquisition_settings({'max_num_buffer': 20})
+        self.assertEqual(20, settings['max_num_buffer'])
+        self.assertEqual(ACQUISITION_DEFAULTS['timeout'], settings['timeout'])
+        settings = check_acquisition_settings({'timeout': 10}, settings)
+        self.assertEqual((20, 10), (settings['max_num_buffer'], settings['timeout']))
+
+        for invalid in ({'max_num_buffers': 20}, {'max_num_buffer': 0}, {'output_queue_size': 2.5},
+                        {'strategy': 'Newest'}, {'timeout': -1}, {'timeout_handling': 'ignore'}):
+            with self.assertRaises(ValueError):
+                check_acquisition_settings(invalid)
+
+    def test_2_class_timeout(self):
+
+        class SlowCamera(BaslerCamera):
+            _TIME_OUT = 5000
+
+        class SlowCameraArray(BaslerCameraArray):
+            _TIME_OUT = 5000
+
+        backend = SimulatedBackend(num_devices=1)
+        for camera in (SlowCamera(backend=backend), SlowCameraArray([{}], backend=backend)):
+            self.assertEqual(5000, camera.get_acquisition_settings()['timeout'])
+        self.assertEqual(ACQUISITION_DEFAULTS['timeout'],
+                         BaslerCamera(backend=backend).get_acquisition_settings()['timeout'])
+
+
+class TestSimulatedAcquisition(unittest.TestCase):
+
+    def test_0_camera(self):
+
+        backend = SimulatedBackend(num_devices=1, max_framerate=1000)
+        cam = BaslerCamera(serial_number='40000000', backend=backend)
+        cam.set_acquisition_settings(max_num_buffer=3, strategy='LatestImageOnly')
+        cam.connect()
+        try:
+            self.assertEqual(3, cam._get_device().MaxNumBuffer.GetValue())
+            cam.set_aoi((0, 0, 256, 128))
+            cam.set_exposure_time(0.1)
+
+            # the configured strategy applies to the streams
+            image_numbers = []
+            with cam.stream(metadata=True) as frames:
+                for frame, record in frames:
+                    image_numbers.append(record['image_number'])
+                    if len(image_numbers) == 3:
+                        break
+                    time.sleep(0.02)
+            self.assertGreater(image_numbers[-1], 3)
+
+            self.assertEqual(2, cam.size_buffer_pool(0.001, headroom=1, apply=False)['max_num_buffer'])
+            pool = cam.size_buffer_pool(0.1, framerate=100)
+            self.assertEqual((12, 256 * 128), (pool['max_num_buffer'], pool['max_buffer_size']))
+            self.assertEqual(12, cam.get_acquisition_settings()['max_num_buffer'])
+            self.assertEqual(256 * 128,
+                             cam._get_device().GetStreamGrabberNodeMap().GetNode('MaxBufferSize').GetValue())
+        finally:
+            cam.disconnect()
+
+    def test_1_timeout_handling(self):
+
+        backend = SimulatedBackend(num_devices=2, max_framerate=1000)
+        cam = BaslerCamera(serial_number='40000000', backend=backend)
+        cam.connect()
+        try:
+            cam.configure({'TriggerMode': 'On', 'aoi': (0, 0, 64, 32)})
+            cam.set_acquisition_settings(timeout=20, timeout_handling='return')
+            frames, metadata = cam.grab_many(3, metadata=True)
+            self.assertEqual(((0, 32, 64), 0), (frames.shape, len(metadata)))
+            self.assertEqual(0, len(list(cam.stream(max_frames=3))))
+
+            cam.set_acquisition_settings(timeout_handling='raise')
+            for grab in (cam.grab_one, lambda: cam.grab_many(3), lambda: list(cam.stream(max_frames=3))):
+                with self.assertRaises(GrabTimeoutError):
+                    grab()
+            self.assertFalse(cam._get_device().IsGrabbing())
+        finally:
+            cam.disconnect()
+
+        array = BaslerCameraArray([{'serial_number': '40000000'}, {'serial_number': '40000001'}], backend=backend)
+        array.connect()
+        try:
+            array.configure({'TriggerMode': 'On', 'aoi': (0, 0, 64, 32)})
+            array.set_acquisition_settings(timeout=20, timeout_handling='return')
+            self.assertEqual([(0, 32, 64)] * 2, [r.shape for r in array.grab_many(3)])
+            array.set_acquisition_settings(timeout_handling='raise')
+            for grab in (array.grab_one, lambda: array.grab_many(3), lambda: list(array.stream(max_frames=3))):
+                with self.assertRaises(GrabTimeoutError):
+                    grab()
+            # timeouts are device errors
+            self.assertTrue(issubclass(GrabTimeoutError, DeviceError))
+        finally:
+            array.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import asyncio
+import contextlib
+import unittest
+import numpy as np
+from basler.aio import AsyncBaslerCamera, AsyncBaslerCameraArray
+from basler.basler_camera import BaslerCamera
+from basler.basler_camera_array import BaslerCameraArray
+from basler.sim import SimulatedBackend
+
+
+class TestAsyncFacades(unittest.TestCase):
+
+    def test_0_camera(self):
+
+        backend = SimulatedBackend(num_devices=2, max_framerate=500)
+        device = backend.devices[0]
+
+        async def run():
+            cameras = [AsyncBaslerCamera(camera=BaslerCamera(serial_number=other.serial_number, backend=backend))
+                       for other in backend.devices]
+            async with cameras[0] as cam, cameras[1]:
+                await cam.set_aoi((0, 0, 64, 32))
+                frames, other_frames = await asyncio.gather(cam.grab_many(3), cameras[1].grab_many(2))
+                records = []
+                async with contextlib.aclosing(cam.stream(max_frames=5, metadata=True)) as stream:
+                    async for frame, record in stream:
+                        records.append(record)
+                        if len(records) == 2:
+                            break
+                self.assertFalse(cam.camera._get_device().IsGrabbing())
+            return cameras, frames, other_frames, records
+
+        cameras, frames, other_frames, records = asyncio.run(run())
+        self.assertEqual((3, 32, 64), frames.shape)
+        np.testing.assert_array_equal(device.get_pattern(3), frames[2] >> 8)
+        self.assertEqual((2, 1024, 1024), other_frames.shape)
+        self.assertEqual([1, 2], [record['image_number'] for record in records])
+        for cam in cameras:
+            self.assertTrue(cam._executor._shutdown)
+            with self.assertRaises(NameError):
+                cam.camera._get_device()
+
+    def test_1_array(self):
+
+        backend = SimulatedBackend(num_devices=2, max_framerate=500)
+
+        async def run():
+            array = AsyncBaslerCameraArray(camera_array=BaslerCameraArray(
+                [{'serial_number': '40000000'}, {'serial_number': '40000001'}], backend=backend))
+            await array.connect()
+            try:
+                frames = await array.grab_many(2)
+                cam_ids = []
+                async for cam_id, frame in array.stream(max_frames=2):
+                    cam_ids.append(cam_id)
+            finally:
+                await array.close()
+            return array, frames, cam_ids
+
+        array, frames, cam_ids = asyncio.run(run())
+        self.assertEqual([(2, 1024, 1024)] * 2, [r.shape for r in frames])
+        self.assertEqual([0, 0, 1, 1], sorted(cam_ids))
+        self.assertTrue(array._executor._shutdown)
+        with self.assertRaises(NameError):
+            array.camera_array._get_camera_array()
+
+
+if __name__ == '__main__':
+    unittest.main()
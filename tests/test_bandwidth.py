@@ -0,0 +1,73 @@
+import unittest
+from basler.bandwidth import (ETHERNET_OVERHEAD, FRAME_OVERHEAD, PACKET_HEADER_SIZE, get_frame_size,
+                              get_payload_size, plan_bandwidth)
+from basler.basler_camera_array import BaslerCameraArray
+from basler.sim import SimulatedBackend
+
+
+class TestBandwidth(unittest.TestCase):
+
+    def test_0_sizes(self):
+
+        self.assertEqual(1920 * 1200, get_payload_size(1920, 1200, 'Mono8'))
+        self.assertEqual(1920 * 1200 * 3 // 2, get_payload_size(1920, 1200, 'Mono12Packed'))
+        with self.assertRaises(ValueError):
+            get_payload_size(16, 16, 'Mono7')
+
+        packets, frame_size = get_frame_size(10000, 1500)
+        self.assertEqual(7, packets)
+        self.assertEqual(10000 + 7 * (PACKET_HEADER_SIZE + ETHERNET_OVERHEAD) + FRAME_OVERHEAD, frame_size)
+
+    def test_1_plan(self):
+
+        camera = {'payload_size': 1_000_000, 'framerate': 20}
+        plan = plan_bandwidth([camera, camera], packet_size=9000)
+        self.assertTrue(plan['fits'])
+        first, second = plan['cameras']
+        self.assertEqual(20, second['achievable_framerate'])
+        self.assertEqual(0, first['frame_delay'])
+        self.assertEqual(round((9000 + ETHERNET_OVERHEAD) / 125_000_000 * 125_000_000), second['frame_delay'])
+        # each camera is limited to half of the budget
+        packet_period = (9000 + ETHERNET_OVERHEAD) / plan['budget'] * 2
+        self.assertAlmostEqual(packet_period * 125_000_000, first['packet_delay'] + second['frame_delay'], delta=1)
+
+        plan = plan_bandwidth([camera, dict(camera, framerate=100)], margin=0)
+        self.assertFalse(plan['fits'])
+        achievable = [camera['achievable_framerate'] for camera in plan['cameras']]
+        self.assertAlmostEqual(plan['budget'], sum(camera['frame_size'] * framerate
+                                                   for camera, framerate in zip(plan['cameras'], achievable)))
+        self.assertAlmostEqual(5, achievable[1] / achievable[0])
+
+        with self.assertRaises(ValueError):
+            plan_bandwidth([{'payload_size': 1000}])
+        with self.assertRaises(ValueError):
+            plan_bandwidth([camera], margin=1)
+
+    def test_2_array(self):
+
+        backend = SimulatedBackend(num_devices=2, generation='gige', max_framerate=50)
+        array = BaslerCameraArray([{'serial_number': '40000000'}, {'serial_number': '40000001'}], backend=backend)
+        array.connect()
+        try:
+            plan = array.plan_bandwidth(packet_size=9001, framerates=[50, 25])
+            self.assertEqual([{'applied': ['GevSCPSPacketSize', 'GevSCPD', 'GevSCFTD'], 'failed': {}}] * 2,
+                             [camera['report'] for camera in plan['cameras']])
+            first = plan['cameras'][0]
+            self.assertEqual((9000, 1024 * 1024), (first['packet_size'], first['payload_size']))
+            cam = array._get_camera_by_id(1)
+            self.assertEqual((9000, plan['cameras'][1]['packet_delay'], plan['cameras'][1]['frame_delay']),
+                             (cam.GevSCPSPacketSize.GetValue(), cam.GevSCPD.GetValue(), cam.GevSCFTD.GetValue()))
+        finally:
+            array.disconnect()
+
+        array = BaslerCameraArray([{'serial_number': '40000000'}], backend=SimulatedBackend(num_devices=1))
+        array.connect()
+        try:
+            with self.assertRaises(RuntimeError):
+                array.plan_bandwidth()
+        finally:
+            array.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main()
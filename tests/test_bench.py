@@ -0,0 +1,58 @@
+import unittest
+from unittest import mock
+from basler.bench import _RssSampler, compare_reports, run_case, sweep
+
+
+class TestBench(unittest.TestCase):
+
+    def test_0_sweep(self):
+
+        cases = sweep(operations=('raw', 'grab_many', 'grab_n_save'), pixel_formats=('Mono8', 'Mono12p'),
+                      converters=('none', 'numpy'), cameras=(1, 2), writers=('raw', 'tiff'))
+        self.assertEqual(2 + 3 + 3 * 2, len([case for case in cases if case['num_cameras'] == 1]))
+        self.assertFalse([case for case in cases if case['operation'] == 'raw' and case['num_cameras'] == 2])
+        self.assertFalse([case for case in cases if case['operation'] != 'raw' and
+                          case['pixel_format'] == 'Mono12p' and case['converter'] == 'none'])
+        self.assertEqual({None}, {case['writer'] for case in cases if case['operation'] != 'grab_n_save'})
+
+    def test_1_run_case(self):
+
+        for case in sweep(operations=('raw', 'grab_many', 'grab_n_save'), sizes=((64, 32),), frames=(10,),
+                          cameras=(1, 2)):
+            result = run_case(case, framerate=500)
+            self.assertIsNone(result['error'])
+            self.assertEqual(10 * case['num_cameras'], result['frames'])
+            self.assertEqual(0, result['dropped'])
+            self.assertAlmostEqual(2, result['latency_ms']['p50'], delta=1.5)
+            self.assertGreater(result['peak_rss_mb'], 0)
+
+        result = run_case(sweep(operations=('grab_many',), sizes=((64, 32),), pixel_formats=('Mono42',))[0])
+        self.assertIn('Mono42', result['error'])
+
+    def test_2_compare(self):
+
+        case = sweep(operations=('grab_many',))[0]
+        baseline = {'results': [dict(case, fps=100.0, latency_ms={'p50': 1.0})]}
+        current = {'results': [dict(case, fps=85.0, latency_ms={'p50': 1.05})]}
+        regressions = compare_reports(baseline, current)
+        self.assertEqual([(100.0, 85.0)], [(r['baseline'], r['current']) for r in regressions])
+        self.assertFalse(compare_reports(baseline, current, metric='latency_ms'))
+        self.assertFalse(compare_reports(baseline, current, tolerance=0.2))
+
+    def test_3_memory_without_proc(self):
+
+        # like Windows and macOS: the lifetime peak of the resource module is not reported as the peak of a run
+        with mock.patch('builtins.open', side_effect=OSError):
+            with _RssSampler() as rss:
+                pass
+        self.assertIsNone(rss.start_rss)
+        self.assertIsNone(rss.peak_rss)
+
+        case = sweep(operations=('grab_many',))[0]
+        baseline = {'results': [dict(case, peak_rss_mb=100.0)]}
+        current = {'results': [dict(case, peak_rss_mb=None)]}
+        self.assertFalse(compare_reports(baseline, current, metric='peak_rss_mb'))
+
+
+if __name__ == '__main__':
+    unittest.main()
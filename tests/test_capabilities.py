@@ -0,0 +1,75 @@
+import unittest
+from basler.basler_camera import BaslerCamera
+from basler.basler_camera_array import BaslerCameraArray
+from basler.sim import SimulatedBackend
+
+
+USB_CAPABILITIES = {
+    'exposure_time': 'ExposureTime',
+    'acquisition_framerate': 'AcquisitionFrameRate',
+    'resulting_framerate': 'ResultingFrameRate', }
+
+GIGE_CAPABILITIES = {
+    'exposure_time': 'ExposureTimeAbs',
+    'acquisition_framerate': 'AcquisitionFrameRateAbs',
+    'resulting_framerate': 'ResultingFrameRateAbs', }
+
+
+class TestCapabilities(unittest.TestCase):
+
+    def test_0_camera(self):
+
+        for generation, capabilities in (('usb', USB_CAPABILITIES), ('gige', GIGE_CAPABILITIES)):
+            backend = SimulatedBackend(num_devices=1, generation=generation)
+            nodes = backend.devices[0].nodes
+            cam = BaslerCamera(serial_number='40000000', backend=backend)
+            cam.connect()
+            try:
+                self.assertEqual(capabilities, cam.get_capabilities())
+
+                # the getters and setters use the resolved node names
+                cam.set_exposure_time(2)
+                self.assertEqual(2000, nodes[capabilities['exposure_time']].GetValue())
+                self.assertEqual(2, cam.get_exposure_time())
+                cam.set_acquisition_framerate(20)
+                self.assertEqual(20, nodes[capabilities['acquisition_framerate']].GetValue())
+                self.assertTrue(nodes['AcquisitionFrameRateEnable'].GetValue())
+                self.assertEqual(nodes[capabilities['resulting_framerate']].GetValue(),
+                                 cam.get_resulting_framerate())
+            finally:
+                cam.disconnect()
+
+        with self.assertRaises(NameError):
+            cam.get_capabilities()
+
+    def test_1_unsupported(self):
+
+        backend = SimulatedBackend(num_devices=1)
+        del backend.devices[0].nodes['AcquisitionFrameRate']
+        cam = BaslerCamera(serial_number='40000000', backend=backend)
+        cam.connect()
+        try:
+            self.assertEqual(dict(USB_CAPABILITIES, acquisition_framerate=None), cam.get_capabilities())
+            with self.assertRaises(RuntimeError):
+                cam.set_acquisition_framerate(20)
+            # disabling the frame rate control does not need the node
+            cam.set_acquisition_framerate(None)
+        finally:
+            cam.disconnect()
+
+    def test_2_array(self):
+
+        backend = SimulatedBackend(num_devices=2, generation='gige')
+        array = BaslerCameraArray([{'serial_number': '40000000'}, {'serial_number': '40000001'}], backend=backend)
+        array.connect()
+        try:
+            self.assertEqual([GIGE_CAPABILITIES] * 2, [array.get_capabilities(i) for i in range(2)])
+            array.set_exposure_time(1, 3)
+            self.assertEqual(3000, backend.devices[1].nodes['ExposureTimeAbs'].GetValue())
+            self.assertEqual(3, array.get_exposure_time(1))
+        finally:
+            array.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from basler.basler_camera import BaslerCamera
+from basler.basler_camera_array import BaslerCameraArray
+from basler.sim import SimulatedBackend
+
+
+class TestConfigure(unittest.TestCase):
+
+    def test_0_order(self):
+
+        backend = SimulatedBackend(num_devices=1)
+        nodes = backend.devices[0].nodes
+        cam = BaslerCamera(serial_number='40000000', backend=backend)
+        cam.connect()
+        try:
+            cam.set_aoi((512, 512, 512, 512))
+            # the size only fits once the offsets are smaller, and the offsets only fit with the old size
+            report = cam.configure({'OffsetY': 0, 'exposure_time': 2, 'OffsetX': 0, 'Height': 1024, 'Width': 1024,
+                                    'PixelFormat': 'Mono12'})
+            self.assertEqual({'applied': ['PixelFormat', 'Height', 'Width', 'OffsetY', 'OffsetX', 'exposure_time'],
+                              'failed': {}}, report)
+            self.assertEqual((1024, 1024, 0, 0), tuple(nodes[name].GetValue()
+                                                       for name in ('Width', 'Height', 'OffsetX', 'OffsetY')))
+
+            report = cam.configure({'aoi': (256, 128, 512, 256), 'Gain': 6})
+            self.assertEqual({'applied': ['aoi', 'Gain'], 'failed': {}}, report)
+            self.assertEqual((512, 256, 256, 128), tuple(nodes[name].GetValue()
+                                                         for name in ('Width', 'Height', 'OffsetX', 'OffsetY')))
+
+            # an offset without its size is applied to the current size
+            self.assertEqual({'applied': ['OffsetX'], 'failed': {}}, cam.configure({'OffsetX': 512}))
+            self.assertEqual((512, 512), (nodes['Width'].GetValue(), nodes['OffsetX'].GetValue()))
+        finally:
+            cam.disconnect()
+
+    def test_1_failures(self):
+
+        backend = SimulatedBackend(num_devices=1)
+        cam = BaslerCamera(serial_number='40000000', backend=backend)
+        cam.connect()
+        try:
+            report = cam.configure({'NoSuchNode': 1, 'Width': 4096, 'Gain': 3, 'exposure_time': 2})
+            self.assertEqual(['Gain', 'exposure_time'], report['applied'])
+            self.assertEqual(['Width', 'NoSuchNode'], list(report['failed']))
+            self.assertIn('NoSuchNode', report['failed']['NoSuchNode'])
+            self.assertEqual((1024, 3, 2), (cam.get_aoi()[1], backend.devices[0].nodes['Gain'].GetValue(),
+                                            cam.get_exposure_time()))
+        finally:
+            cam.disconnect()
+
+    def test_2_array(self):
+
+        backend = SimulatedBackend(num_devices=2)
+        array = BaslerCameraArray([{'serial_number': '40000000'}, {'serial_number': '40000001'}], backend=backend)
+        array.connect()
+        try:
+            reports = array.configure([{'aoi': (0, 0, 256, 128)}, {'exposure_time': 3, 'NoSuchNode': 1}])
+            self.assertEqual([['aoi'], ['exposure_time']], [report['applied'] for report in reports])
+            self.assertEqual([[], ['NoSuchNode']], [list(report['failed']) for report in reports])
+            self.assertEqual((128, 256), (backend.devices[0].nodes['Height'].GetValue(),
+                                          backend.devices[0].nodes['Width'].GetValue()))
+
+            reports = array.configure({'Gain': 2})
+            self.assertEqual([{'applied': ['Gain'], 'failed': {}}] * 2, reports)
+            with self.assertRaises(ValueError):
+                array.configure([{}])
+        finally:
+            array.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main()
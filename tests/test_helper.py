@@ -0,0 +1,81 @@
+import unittest
+from unittest import mock
+import pypylon.pylon
+from basler.helper import BaslerCameraManager
+
+
+def _device_info(serial_number, ip=None, user_defined_name='', model_name='acA1920-40gm'):
+    info = pypylon.pylon.CDeviceInfo()
+    info.SetSerialNumber(serial_number)
+    info.SetModelName(model_name)
+    info.SetFriendlyName(f'Basler {model_name} ({serial_number})')
+    info.SetUserDefinedName(user_defined_name)
+    if ip is not None:
+        info.SetIpAddress(ip)
+    return info
+
+
+class TestBaslerCameraManager(unittest.TestCase):
+
+    def setUp(self):
+
+        self.devices = [_device_info('21939024', '192.168.0.31', 'left'),
+                        _device_info('20717903', '192.168.0.32', 'right'),
+                        _device_info('40000000', model_name='acA1920-155um')]
+        self.factory = mock.Mock()
+        self.factory.EnumerateDevices.side_effect = lambda: list(self.devices)
+        self.now = 1000.0
+        patches = [mock.patch('pypylon.pylon.TlFactory.GetInstance', return_value=self.factory),
+                   mock.patch('basler.helper.time.monotonic', side_effect=lambda: self.now)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        BaslerCameraManager.invalidate()
+        self.addCleanup(BaslerCameraManager.invalidate)
+
+    def test_0_cache(self):
+
+        names = BaslerCameraManager.get_camera_list_names()
+        self.assertEqual('Basler acA1920-40gm (21939024)', names[0])
+        BaslerCameraManager.get_devices()
+        BaslerCameraManager.get_camera_list_dict()
+        self.assertEqual(1, self.factory.EnumerateDevices.call_count)
+
+        # expiry
+        self.now += BaslerCameraManager.CACHE_TTL + 1
+        self.devices.pop()
+        self.assertEqual(2, len(BaslerCameraManager.get_devices()))
+        self.assertEqual(2, self.factory.EnumerateDevices.call_count)
+
+        # refresh and invalidate
+        self.devices.append(_device_info('40000001'))
+        self.assertEqual(3, len(BaslerCameraManager.get_devices(refresh=True)))
+        self.assertEqual(3, self.factory.EnumerateDevices.call_count)
+        BaslerCameraManager.get_devices()
+        self.assertEqual(3, self.factory.EnumerateDevices.call_count)
+        BaslerCameraManager.invalidate()
+        BaslerCameraManager.get_devices()
+        self.assertEqual(4, self.factory.EnumerateDevices.call_count)
+
+    def test_1_lookup(self):
+
+        index = BaslerCameraManager.get_index()
+        self.assertEqual('20717903', index['ip']['192.168.0.32'].GetSerialNumber())
+        self.assertEqual('21939024', index['user_defined_name']['left'].GetSerialNumber())
+        self.assertEqual(['21939024', '20717903'],
+                         [device.GetSerialNumber() for device in index['model_name']['acA1920-40gm']])
+        self.assertNotIn('', index['user_defined_name'])
+
+        self.assertEqual('40000000', BaslerCameraManager.find_device(serial_number='40000000').GetSerialNumber())
+        self.assertEqual('20717903', BaslerCameraManager.find_device(ip='192.168.0.32').GetSerialNumber())
+        self.assertEqual('20717903', BaslerCameraManager.find_device(user_defined_name='right').GetSerialNumber())
+        self.assertEqual('40000000',
+                         BaslerCameraManager.find_device(model_name='acA1920-155um').GetSerialNumber())
+        self.assertEqual('21939024', BaslerCameraManager.find_device().GetSerialNumber())
+        self.assertIsNone(BaslerCameraManager.find_device(serial_number='21939024', ip='192.168.0.32'))
+        self.assertIsNone(BaslerCameraManager.find_device(ip='10.0.0.1'))
+        self.assertEqual(1, self.factory.EnumerateDevices.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
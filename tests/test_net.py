@@ -0,0 +1,71 @@
+import threading
+import unittest
+import numpy as np
+from basler.metadata import empty_metadata
+from basler.net import FrameClient, FrameServer
+
+
+class TestFrameServer(unittest.TestCase):
+
+    def test_0_decimation_and_roi(self):
+
+        frames = np.arange(10 * 6 * 8, dtype=np.uint16).reshape(10, 6, 8)
+        meta = empty_metadata(10)
+        meta['image_number'] = np.arange(1, 11)
+
+        with FrameServer() as server:
+            host, port = server.address
+            full = FrameClient(host, port, timeout=10)
+            cropped = FrameClient(host, port, decimation=3, roi=(2, 1, 4, 3), timeout=10)
+            full.connect()
+            cropped.connect()
+            for frame, record in zip(frames, meta):
+                server.publish(frame, record)
+                # let the first client read each frame, so that nothing is dropped
+                seq, frame_received, record_received = full.recv()
+                np.testing.assert_array_equal(frame, frame_received)
+                self.assertEqual(seq, record_received['image_number'])
+
+        received = list(cropped)
+        self.assertEqual([1, 4, 7, 10], [seq for seq, _, _ in received])
+        for seq, frame, _ in received:
+            np.testing.assert_array_equal(frames[seq - 1, 1:4, 2:6], frame)
+        full.close()
+        cropped.close()
+
+    def test_1_slow_client(self):
+
+        frame = np.zeros((1000, 1000), dtype=np.uint16)
+        server = FrameServer(queue_size=2)
+        server.start()
+        client = FrameClient(*server.address, timeout=10)
+        client.connect()
+
+        # the server must keep accepting frames while the client does not read
+        publisher = threading.Thread(target=lambda: [server.publish(frame) for _ in range(100)])
+        publisher.start()
+        publisher.join(timeout=5)
+        self.assertFalse(publisher.is_alive())
+
+        seqs = []
+        consumer = threading.Thread(target=lambda: seqs.extend(seq for seq, _, _ in client))
+        consumer.start()
+        stats = server.get_stats()
+        server.stop()
+        consumer.join(timeout=10)
+        client.close()
+
+        self.assertEqual(100, seqs[-1])
+        self.assertLess(len(seqs), 100)
+        self.assertEqual(seqs, sorted(seqs))
+        self.assertGreater(stats[0]['dropped'], 0)
+
+    def test_2_invalid_request(self):
+
+        with FrameServer() as server:
+            with self.assertRaises(ConnectionError):
+                FrameClient(*server.address, decimation=0, timeout=10).connect()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import functools
+import time
+import unittest
+import numpy as np
+from basler.process_array import ProcessCameraArray
+from basler.sim import SimulatedBackend
+
+
+BACKEND_FACTORY = functools.partial(SimulatedBackend, num_devices=2, max_framerate=500)
+
+
+class TestProcessCameraArray(unittest.TestCase):
+
+    def test_0_grab_many(self):
+
+        array = ProcessCameraArray([{'serial_number': '40000000'}, {'ip': '192.168.0.101'}],
+                                   backend_factory=BACKEND_FACTORY)
+        array.connect()
+        try:
+            array.set_aoi(1, (0, 0, 128, 64))
+            frames, metadata = array.grab_many(3, metadata=True)
+            self.assertEqual([(3, 1024, 1024), (3, 64, 128)], [r.shape for r in frames])
+            np.testing.assert_array_equal(np.arange(1, 4), metadata[1]['image_number'])
+            devices = BACKEND_FACTORY().devices
+            np.testing.assert_array_equal(devices[0].get_pattern(2), frames[0][1] >> 8)
+            devices[1].nodes['Width'].SetValue(128)
+            devices[1].nodes['Height'].SetValue(64)
+            np.testing.assert_array_equal(devices[1].get_pattern(3), frames[1][2] >> 8)
+        finally:
+            array.disconnect()
+
+    def test_1_apply_snapshots(self):
+
+        array = ProcessCameraArray([{'serial_number': '40000000'}, {'serial_number': '40000001'}],
+                                   backend_factory=BACKEND_FACTORY)
+        array.connect()
+        try:
+            snapshots = array.get_snapshots()
+            array.set_exposure_time(0, 2)
+            array.set_exposure_time(1, 3)
+            reports = array.apply_snapshots([snapshots[0], None])
+            self.assertEqual({'applied': [], 'failed': {}, 'unchanged': []}, reports[1])
+            self.assertFalse(reports[0]['failed'])
+            self.assertEqual(snapshots[0].values['ExposureTime'] / 1000, array.get_exposure_time(0))
+            self.assertEqual(3, array.get_exposure_time(1))
+            # the pipes are still in step
+            self.assertEqual('40000001', array.call(1, 'get_camera_info')['SerialNumber'])
+        finally:
+            array.disconnect()
+
+    def test_2_connect_failure(self):
+
+        array = ProcessCameraArray([{'serial_number': '40000000'}, {'serial_number': '1'},
+                                    {'serial_number': '40000001'}], backend_factory=BACKEND_FACTORY)
+        start = time.monotonic()
+        with self.assertRaises(Exception):
+            array.connect()
+        self.assertLess(time.monotonic() - start, 5)
+        with self.assertRaises(NameError):
+            array.get_aoi(0)
+
+    def test_3_shared_views(self):
+
+        array = ProcessCameraArray([{'serial_number': '40000000'}], backend_factory=BACKEND_FACTORY)
+        array.connect()
+        try:
+            array.set_aoi(0, (0, 0, 64, 32))
+            frames = array.grab_many(2)[0]
+            self.assertFalse(frames.flags.owndata)
+            pattern = frames[1].copy()
+            # the next grab reuses the shared memory of the views
+            again = array.grab_many(2)[0]
+            self.assertTrue(np.shares_memory(frames, again))
+
+            out = [np.zeros((2, 32, 64), dtype=np.uint16)]
+            result = array.grab_many(2, out=out)
+            self.assertIs(out[0], result[0])
+            self.assertFalse(np.shares_memory(out[0], frames))
+            np.testing.assert_array_equal(pattern, out[0][1])
+
+            # a larger grab replaces the shared memory while views of the old one are alive
+            array.set_aoi(0, (0, 0, 128, 64))
+            larger = array.grab_one()[0]
+            self.assertEqual((64, 128), larger.shape)
+            np.testing.assert_array_equal(pattern, frames[1])
+        finally:
+            array.disconnect()
+        # the block stays mapped until the views are gone
+        np.testing.assert_array_equal(pattern, frames[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
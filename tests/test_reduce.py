@@ -0,0 +1,35 @@
+import unittest
+import numpy as np
+from basler.reduce import FrameReducer
+
+
+class TestFrameReducer(unittest.TestCase):
+
+    def test_0_statistics(self):
+
+        frames = np.random.default_rng(0).integers(0, 4096, size=(50, 4, 5), dtype=np.uint16)
+        reducer = FrameReducer((4, 5), ops=['sum', 'mean', 'var', 'std', 'min', 'max'], ddof=1)
+        for frame in frames:
+            reducer.add(frame)
+        result = reducer.result()
+
+        self.assertEqual(50, reducer.count)
+        np.testing.assert_allclose(frames.sum(axis=0), result['sum'])
+        np.testing.assert_allclose(frames.mean(axis=0), result['mean'])
+        np.testing.assert_allclose(frames.var(axis=0, ddof=1), result['var'])
+        np.testing.assert_allclose(frames.std(axis=0, ddof=1), result['std'])
+        np.testing.assert_array_equal(frames.min(axis=0), result['min'])
+        np.testing.assert_array_equal(frames.max(axis=0), result['max'])
+
+    def test_1_large_offset(self):
+
+        frames = 1e9 + np.arange(10, dtype=float).reshape(10, 1, 1)
+        reducer = FrameReducer((1, 1), ops=['var'])
+        for frame in frames:
+            reducer.add(frame)
+
+        np.testing.assert_allclose(frames.var(axis=0), reducer.result()['var'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import multiprocessing
+import sys
+import time
+import unittest
+from queue import Empty
+from unittest import mock
+import numpy as np
+from basler.metadata import empty_metadata
+from basler.ring import FramePublisher, FrameSubscriber
+
+
+def _consume(name, n, queue):
+    with FrameSubscriber(name) as subscriber:
+        sums = []
+        for _ in range(n):
+            seq, frame, record = subscriber.next(timeout=10)
+            sums.append((seq, int(frame.sum()), int(record['image_number'])))
+            del frame
+        queue.put(sums)
+
+
+class TestFrameRing(unittest.TestCase):
+
+    def test_0_latest_and_next(self):
+
+        with FramePublisher((3, 4), np.uint16, capacity=4) as publisher:
+            subscriber = FrameSubscriber(publisher.name)
+            self.assertIsNone(subscriber.latest())
+            self.assertEqual(((3, 4), np.uint16, 4), (subscriber.shape, subscriber.dtype, subscriber.capacity))
+
+            meta = empty_metadata(1)
+            for i in range(1, 3):
+                meta['image_number'] = i
+                publisher.publish(np.full((3, 4), i, dtype=np.uint16), meta[0])
+
+            seq, frame, record = subscriber.next(timeout=1)
+            self.assertEqual((1, 1, 1), (seq, frame[0, 0], record['image_number']))
+            seq, frame, record = subscriber.latest()
+            self.assertEqual((2, 2), (seq, frame[0, 0]))
+            self.assertTrue(subscriber.is_valid(seq))
+            with self.assertRaises(TimeoutError):
+                subscriber.next(timeout=0.01)
+            del frame
+            subscriber.close()
+
+    def test_1_overrun(self):
+
+        with FramePublisher((2, 2), np.uint8, capacity=4) as publisher:
+            subscriber = FrameSubscriber(publisher.name)
+            publisher.publish(np.zeros((2, 2), dtype=np.uint8))
+            seq, frame, _ = subscriber.next(timeout=1)
+            for i in range(2, 11):
+                publisher.publish(np.full((2, 2), i, dtype=np.uint8))
+            self.assertFalse(subscriber.is_valid(seq))
+
+            seq, frame, _ = subscriber.next(timeout=1)
+            self.assertEqual((8, 8), (seq, frame[0, 0]))
+            self.assertEqual(6, subscriber.overruns)
+            del frame
+            subscriber.close()
+
+    def test_2_other_process(self):
+
+        context = multiprocessing.get_context('spawn')
+        with FramePublisher((8, 8), np.uint16, capacity=64) as publisher:
+            queue = context.Queue()
+            process = context.Process(target=_consume, args=(publisher.name, 20, queue))
+            process.start()
+            sums = None
+            while sums is None:
+                publisher.publish(np.full((8, 8), publisher.head + 1, dtype=np.uint16))
+                time.sleep(0.001)
+                try:
+                    sums = queue.get_nowait()
+                except Empty:
+                    self.assertTrue(process.is_alive())
+            process.join()
+
+        first = sums[0][0]
+        self.assertEqual([(seq, 64 * seq, 0) for seq in range(first, first + 20)], sums)
+
+    @unittest.skipIf(sys.version_info >= (3, 13), 'subscribers attach with track=False')
+    def test_3_resource_tracker(self):
+
+        with FramePublisher((2, 2), np.uint8, capacity=4) as publisher:
+            # a subscriber sharing the resource tracker of the publisher keeps its registration
+            with mock.patch('basler.ring.resource_tracker.unregister') as unregister:
+                FrameSubscriber(publisher.name).close()
+            unregister.assert_not_called()
+
+            # another tracker would remove the block when the subscriber's process exits
+            with mock.patch('basler.ring.resource_tracker.unregister') as unregister, \
+                    mock.patch('basler.ring._tracker_id', return_value=0):
+                FrameSubscriber(publisher.name).close()
+            unregister.assert_called_once_with('/' + publisher.name, 'shared_memory')
+
+
+if __name__ == '__main__':
+    unittest.main()
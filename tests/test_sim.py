@@ -0,0 +1,430 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+import numpy as np
+import pypylon.pylon
+from basler.basler_camera import BaslerCamera, DeviceError
+from basler.basler_camera_array import BaslerCameraArray
+from basler.events import FrameEventHandler
+from basler.sim import SimulatedBackend, SimulatedCamera, SimulatedDevice
+from basler.writers import FrameWriter
+
+
+class TestSimulatedCamera(unittest.TestCase):
+
+    def test_0_strategies(self):
+
+        cam = SimulatedCamera(SimulatedDevice(max_framerate=1000))
+        cam.Open()
+        cam.ExposureTime.SetValue(100)
+
+        cam.StartGrabbing()
+        time.sleep(0.05)
+        with self.assertRaises(Exception):
+            cam.Width.SetValue(512)
+        image_numbers = []
+        while True:
+            grab_result = cam.RetrieveResult(0, pypylon.pylon.TimeoutHandling_Return)
+            if not grab_result.IsValid():
+                break
+            image_numbers.append(grab_result.ImageNumber)
+        cam.StopGrabbing()
+        # OneByOne keeps the oldest frames, up to MaxNumBuffer
+        self.assertEqual(list(range(1, 11)), image_numbers[:10])
+
+        cam.StartGrabbing(pypylon.pylon.GrabStrategy_LatestImageOnly)
+        time.sleep(0.05)
+        grab_result = cam.RetrieveResult(1000)
+        cam.StopGrabbing()
+        self.assertGreater(grab_result.NumberOfSkippedImages, 0)
+        self.assertEqual(grab_result.ImageNumber, grab_result.NumberOfSkippedImages + 1)
+        cam.Close()
+
+    def test_1_drops(self):
+
+        cam = SimulatedCamera(SimulatedDevice(max_framerate=1000, drop_rate=0.2, seed=3))
+        cam.Open()
+        cam.ExposureTime.SetValue(100)
+        cam.StartGrabbingMax(50)
+        image_numbers = []
+        while cam.IsGrabbing():
+            image_numbers.append(cam.RetrieveResult(1000).ImageNumber)
+        cam.Close()
+        self.assertEqual(50, len(image_numbers))
+        self.assertGreater(image_numbers[-1], 50)
+
+
+class TestSimulatedBackend(unittest.TestCase):
+
+    def test_0_grab_many(self):
+
+        backend = SimulatedBackend(num_devices=1, max_framerate=500)
+        device = backend.devices[0]
+        cam = BaslerCamera(serial_number=device.serial_number, backend=backend)
+        cam.connect()
+        try:
+            cam.set_aoi((0, 0, 256, 128))
+            frames, metadata = cam.grab_many(6, metadata=True)
+            self.assertEqual((6, 128, 256), frames.shape)
+            np.testing.assert_array_equal(np.arange(1, 7), metadata['image_number'])
+            np.testing.assert_array_equal(device.get_pattern(5), frames[4] >> 8)
+
+            cam.set_pixel_format('Mono12p')
+            cam.set_converter(engine='numpy', msb_align=False)
+            frames = cam.grab_many(2)
+            np.testing.assert_array_equal(device.get_pattern(2), frames[1])
+        finally:
+            cam.disconnect()
+
+        cam = BaslerCamera(serial_number=device.serial_number, backend=SimulatedBackend(num_devices=1,
+                                                                                         error_rate=1.0))
+        cam.connect()
+        with self.assertRaises(DeviceError):
+            cam.grab_many(1)
+        cam.disconnect()
+
+    def test_1_configure_and_features(self):
+
+        backend = SimulatedBackend(num_devices=1, generation='gige')
+        cam = BaslerCamera(ip='192.168.0.100', backend=backend)
+        cam.connect()
+        try:
+            self.assertEqual('ExposureTimeAbs', cam.get_capabilities()['exposure_time'])
+            report = cam.configure({'exposure_time': 2, 'GevSCPSPacketSize': 9000, 'NoSuchNode': 1})
+            self.assertEqual(['GevSCPSPacketSize', 'exposure_time'], sorted(report['applied']))
+            self.assertEqual(['NoSuchNode'], list(report['failed']))
+            snapshot = cam.get_snapshot()
+            self.assertEqual(9000, snapshot.values['GevSCPSPacketSize'])
+
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'features.pfs')
+                cam.save_features(path)
+                cam.set_exposure_time(5)
+                cam.load_features(path)
+            self.assertEqual(2, cam.get_exposure_time())
+        finally:
+            cam.disconnect()
+
+    def test_2_array(self):
+
+        backend = SimulatedBackend(num_devices=2, max_framerate=500)
+        array = BaslerCameraArray([{'serial_number': '40000000'}, {'ip': '192.168.0.101'}], backend=backend)
+        array.connect()
+        try:
+            array.set_converter()
+            frames = array.grab_many(3)
+            self.assertEqual([(3, 1024, 1024)] * 2, [r.shape for r in frames])
+            np.testing.assert_array_equal(backend.devices[1].get_pattern(3), frames[1][2] >> 8)
+        finally:
+            array.disconnect()
+
+        with self.assertRaises(Exception):
+            BaslerCameraArray([{'serial_number': '1'}], backend=backend).connect()
+
+    def test_3_callback(self):
+
+        backend = SimulatedBackend(num_devices=1, max_framerate=500)
+        cam = BaslerCamera(serial_number='40000000', backend=backend)
+        cam.connect()
+        records = []
+        cam.start_callback(lambda frame, record: records.append(record))
+        time.sleep(0.1)
+        report = cam.stop_callback()
+        cam.disconnect()
+        self.assertEqual(len(records), report['frames'])
+        self.assertGreater(len(records), 10)
+
+    def test_4_snapshot_trigger_settings(self):
+
+        backend = SimulatedBackend(num_devices=2, max_framerate=500)
+        array = BaslerCameraArray([{'serial_number': '40000000'}, {'serial_number': '40000001'}], backend=backend)
+        array.connect()
+
+        def trigger_settings():
+            settings = []
+            for device in backend.devices:
+                nodes = device.nodes
+                settings.append((nodes['TriggerSelector'].GetValue(), nodes['TriggerMode'].get('FrameStart'),
+                                 nodes['TriggerSource'].get('FrameStart')))
+            return settings
+
+        try:
+            backend.devices[1].nodes['TriggerSelector'].SetValue('AcquisitionStart')
+            backend.devices[1].nodes['TriggerSource']._values['FrameStart'] = 'Line1'
+            expected = [('FrameStart', 'Off', 'Software'), ('AcquisitionStart', 'Off', 'Line1')]
+            self.assertEqual(expected, trigger_settings())
+
+            frames, metadata = array.snapshot()
+            self.assertEqual(2, len(frames))
+            self.assertEqual(expected, trigger_settings())
+
+            # the second camera fails to switch to software triggering: the first one is restored too
+            source = backend.devices[1].nodes['TriggerSource']
+            set_value = source.SetValue
+
+            def fail_on_software(value):
+                if value == 'Software':
+                    raise RuntimeError('TriggerSource is not writable')
+                set_value(value)
+
+            source.SetValue = fail_on_software
+            with self.assertRaises(RuntimeError):
+                array.snapshot()
+            self.assertEqual(expected, trigger_settings())
+        finally:
+            array.disconnect()
+
+    def test_5_release_on_error(self):
+
+        backend = SimulatedBackend(num_devices=1, max_framerate=500)
+        cam = BaslerCamera(serial_number='40000000', backend=backend)
+        cam.connect()
+        try:
+            device = cam._get_device()
+            cam.set_aoi((0, 0, 64, 32))
+            # packed frames cannot be copied without a converter
+            cam.set_pixel_format('Mono12p')
+            cam.set_converter(False)
+            with tempfile.TemporaryDirectory() as directory:
+                grabs = [cam.grab_one, lambda: cam.grab_many(3), lambda: cam.grab_reduce(3),
+                         lambda: cam.grab_to_memmap(3, os.path.join(directory, 'frames.npy')),
+                         lambda: list(cam.stream(max_frames=3)),
+                         lambda: cam.grab_n_save(3, os.path.join(directory, 'f%d.tiff'))]
+                for grab in grabs:
+                    with self.assertRaises(Exception):
+                        grab()
+                    self.assertEqual(0, device.outstanding)
+        finally:
+            cam.disconnect()
+
+        backend = SimulatedBackend(num_devices=1, error_rate=1.0)
+        cam = BaslerCamera(serial_number='40000000', backend=backend)
+        cam.connect()
+        try:
+            for grab in (cam.grab_one, lambda: cam.grab_many(1)):
+                with self.assertRaises(DeviceError):
+                    grab()
+                self.assertEqual(0, cam._get_device().outstanding)
+        finally:
+            cam.disconnect()
+
+    def test_6_callback_backpressure(self):
+
+        backend = SimulatedBackend(num_devices=1, max_framerate=500)
+        cam = BaslerCamera(serial_number='40000000', backend=backend)
+        cam.connect()
+        try:
+            cam.set_aoi((0, 0, 64, 32))
+            records = []
+
+            def slow_callback(frame, record):
+                time.sleep(0.02)
+                records.append(record)
+
+            cam.start_callback(slow_callback, num_threads=1, queue_size=1, overflow='drop')
+            time.sleep(0.2)
+            report = cam.stop_callback()
+            self.assertEqual(len(records), report['frames'])
+            self.assertGreater(report['dropped'], 0)
+            self.assertLess(report['frames'], 15)
+
+            # a frame that cannot be copied gives its queue slot back
+            device = cam._get_device()
+            device.StartGrabbing(pypylon.pylon.GrabStrategy_OneByOne)
+            grab_result = device.RetrieveResult(1000)
+            calls = []
+
+            def copy_frame(grab_result, dest):
+                calls.append(grab_result)
+                if len(calls) == 1:
+                    raise RuntimeError('conversion failed')
+                cam.copy_frame(grab_result, dest)
+
+            frames = []
+            handler = FrameEventHandler(lambda frame, record: frames.append(frame), copy_frame=copy_frame,
+                                        dtype=cam.get_frame_dtype(), num_threads=1, queue_size=1, overflow='drop')
+            try:
+                with self.assertRaises(RuntimeError):
+                    handler.OnImageGrabbed(device, grab_result)
+                handler.OnImageGrabbed(device, grab_result)
+            finally:
+                grab_result.Release()
+                device.StopGrabbing()
+            self.assertEqual({'frames': 1, 'dropped': 0}, handler.close())
+            np.testing.assert_array_equal(backend.devices[0].get_pattern(1), frames[0] >> 8)
+        finally:
+            cam.disconnect()
+
+    def test_7_grab_to_memmap(self):
+
+        def read(path):
+            with open(path + '.json') as f:
+                return np.load(path), json.load(f)['frames_written']
+
+        backend = SimulatedBackend(num_devices=2, max_framerate=500)
+        device = backend.devices[0]
+        cam = BaslerCamera(serial_number='40000000', backend=backend)
+        cam.connect()
+        try:
+            cam.set_aoi((0, 0, 64, 32))
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'frames.npy')
+                cam.grab_to_memmap(4, path, flush_every=2)
+                frames, frames_written = read(path)
+                self.assertEqual(((4, 32, 64), 4), (frames.shape, frames_written))
+                for i in range(4):
+                    np.testing.assert_array_equal(device.get_pattern(i + 1), frames[i] >> 8)
+
+                # the burst fails at the third frame: the sidecar counts the two frames written before
+                copy_frame = cam.copy_frame
+                calls = []
+
+                def fail_third(grab_result, dest):
+                    calls.append(grab_result)
+                    if len(calls) == 3:
+                        raise RuntimeError('conversion failed')
+                    copy_frame(grab_result, dest)
+
+                cam.copy_frame = fail_third
+                with self.assertRaises(RuntimeError):
+                    cam.grab_to_memmap(4, path)
+                frames, frames_written = read(path)
+                self.assertEqual(2, frames_written)
+                np.testing.assert_array_equal(device.get_pattern(2), frames[1] >> 8)
+        finally:
+            cam.disconnect()
+
+        backend = SimulatedBackend(num_devices=2, max_framerate=500)
+        device = backend.devices[0]
+        array = BaslerCameraArray([{'serial_number': '40000000'}, {'serial_number': '40000001'}], backend=backend)
+        array.connect()
+        try:
+            array.set_aoi(1, (0, 0, 32, 16))
+            # the second camera waits for a trigger that never comes, until the grab times out
+            backend.devices[1].nodes['TriggerMode']._values['FrameStart'] = 'On'
+            backend.devices[1].nodes['TriggerSource']._values['FrameStart'] = 'Line1'
+            array.set_acquisition_settings(timeout=100, timeout_handling='return')
+            with tempfile.TemporaryDirectory() as directory:
+                paths = [os.path.join(directory, f'cam{i}.npy') for i in range(2)]
+                array.grab_to_memmap(3, paths)
+                (frames, frames_written), (other_frames, other_written) = [read(path) for path in paths]
+            self.assertEqual(((3, 1024, 1024), 3), (frames.shape, frames_written))
+            self.assertEqual(((3, 16, 32), 0), (other_frames.shape, other_written))
+            for i in range(3):
+                np.testing.assert_array_equal(device.get_pattern(i + 1), frames[i])
+        finally:
+            array.disconnect()
+
+    def test_8_post_processing(self):
+
+        backend = SimulatedBackend(num_devices=1, max_framerate=500)
+        device = backend.devices[0]
+        cam = BaslerCamera(serial_number='40000000', backend=backend)
+        cam.connect()
+        array = BaslerCameraArray([{'serial_number': '40000000'}], backend=backend)
+        try:
+            cam.set_aoi((0, 0, 64, 32))
+            cam.set_pixel_format('Mono12p')
+            for engine in ('pylon', 'numpy'):
+                cam.set_converter(engine=engine, msb_align=False)
+                array.set_converter(engine=engine, msb_align=False)
+                sim_cam = cam._get_device()
+                sim_cam.StartGrabbing()
+                grab_result = sim_cam.RetrieveResult(1000)
+                try:
+                    image = cam.post_processing(grab_result)
+                    np.testing.assert_array_equal(device.get_pattern(1), image.GetArray())
+                    np.testing.assert_array_equal(image.GetArray(), array.post_processing(grab_result).GetArray())
+                finally:
+                    grab_result.Release()
+                    sim_cam.StopGrabbing()
+        finally:
+            cam.disconnect()
+
+    def test_9_frame_dtype(self):
+
+        backend = SimulatedBackend(num_devices=1, max_framerate=500)
+        device = backend.devices[0]
+        cam = BaslerCamera(serial_number='40000000', backend=backend)
+        cam.connect()
+        try:
+            cam.set_aoi((0, 0, 64, 32))
+            for pixel_format in ('Mono8', 'Mono10', 'Mono12', 'Mono16', 'Mono10p', 'Mono12Packed'):
+                cam.set_pixel_format(pixel_format)
+                cam.set_converter(False)
+                expected = np.uint8 if pixel_format == 'Mono8' else np.uint16
+                self.assertEqual(np.dtype(expected), cam.get_frame_dtype(), pixel_format)
+                if pixel_format[-1].isdigit():
+                    frames = cam.grab_many(2)
+                    self.assertEqual(np.dtype(expected), frames.dtype)
+                    np.testing.assert_array_equal(device.get_pattern(2), frames[1])
+
+                cam.set_converter(engine='numpy', msb_align=False)
+                self.assertEqual(np.dtype(np.uint16), cam.get_frame_dtype())
+                out = np.empty((2, 32, 64), dtype=np.uint16)
+                self.assertIs(out, cam.grab_many(2, out=out))
+                np.testing.assert_array_equal(device.get_pattern(2), out[1])
+            with self.assertRaises(ValueError):
+                cam.grab_many(3, out=out)
+        finally:
+            cam.disconnect()
+
+        array = BaslerCameraArray([{'serial_number': '40000000'}], backend=backend)
+        array.connect()
+        try:
+            array.set_pixel_format(0, 'Mono8')
+            self.assertEqual(np.dtype(np.uint8), array.grab_many(2)[0].dtype)
+            array.set_converter()
+            self.assertEqual(np.dtype(np.uint16), array.grab_many(2)[0].dtype)
+        finally:
+            array.disconnect()
+
+        # failed grabs release their results
+        backend = SimulatedBackend(num_devices=1, error_rate=1.0)
+        cam = BaslerCamera(serial_number='40000000', backend=backend)
+        cam.connect()
+        try:
+            for grab in (cam.grab_one, lambda: cam.grab_many(2)):
+                with self.assertRaises(DeviceError):
+                    grab()
+                self.assertEqual(0, cam._get_device().outstanding)
+        finally:
+            cam.disconnect()
+
+
+    def test_10_grab_n_save_errors(self):
+
+        class FailingWriter(FrameWriter):
+            # the first write fails and the following frames are delivered as failed grab results
+            def __init__(self, device):
+                self.device = device
+
+            def write(self, index, frame):
+                self.device.error_rate = 1.0
+                raise OSError('disk full')
+
+        backend = SimulatedBackend(num_devices=1, width=64, height=32, max_framerate=10)
+        cam = BaslerCamera(serial_number='40000000', backend=backend)
+        cam.connect()
+        try:
+            # the error of the grab loop is not hidden by the error of the writer
+            with self.assertRaises(DeviceError):
+                cam.grab_n_save(3, FailingWriter(backend.devices[0]))
+            self.assertEqual(0, cam._get_device().outstanding)
+        finally:
+            cam.disconnect()
+
+        backend = SimulatedBackend(num_devices=1, width=64, height=32, max_framerate=10)
+        array = BaslerCameraArray([{'serial_number': '40000000'}], backend=backend)
+        array.connect()
+        try:
+            with self.assertRaises(DeviceError):
+                array.grab_n_save(3, [FailingWriter(backend.devices[0])])
+        finally:
+            array.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import os
+import tempfile
+import unittest
+from basler.snapshot import FeatureSnapshot, load_snapshots, save_snapshots
+
+
+class TestFeatureSnapshot(unittest.TestCase):
+
+    def test_0_diff(self):
+
+        snapshot = FeatureSnapshot({'PixelFormat': 'Mono12', 'Width': 800, 'ExposureTime': 10000.0})
+        current = {'PixelFormat': 'Mono12', 'Width': 640, 'ExposureTime': 10000.0 * (1 + 1e-12)}
+        self.assertEqual({'Width': 800}, snapshot.diff(current))
+        self.assertEqual({'ExposureTime': 10000.0}, snapshot.diff({'PixelFormat': 'Mono12', 'Width': 800}))
+
+    def test_1_save_and_load(self):
+
+        snapshots = [FeatureSnapshot({'PixelFormat': 'Mono8', 'AcquisitionFrameRateEnable': True}, 'acA1300', '1'),
+                     FeatureSnapshot({'Gain': 1.5}, 'acA1300', '2')]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'array.json')
+            save_snapshots(path, snapshots)
+            self.assertEqual(snapshots, load_snapshots(path))
+            with self.assertRaises(ValueError):
+                FeatureSnapshot.load(path)
+
+            path = os.path.join(directory, 'camera.json')
+            snapshots[0].save(path)
+            loaded = FeatureSnapshot.load(path)
+            self.assertEqual(snapshots[0], loaded)
+            self.assertEqual(('acA1300', '1'), (loaded.model_name, loaded.serial_number))
+            self.assertEqual(['PixelFormat', 'AcquisitionFrameRateEnable'], list(loaded.values))
+
+
+if __name__ == '__main__':
+    unittest.main()
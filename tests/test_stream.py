@@ -0,0 +1,87 @@
+import time
+import unittest
+import numpy as np
+from basler.basler_camera import BaslerCamera
+from basler.basler_camera_array import BaslerCameraArray
+from basler.sim import SimulatedBackend
+from basler.stream import get_grab_strategy
+
+
+class TestStream(unittest.TestCase):
+
+    def test_0_camera(self):
+
+        backend = SimulatedBackend(num_devices=1, width=64, height=32, max_framerate=500)
+        device = backend.devices[0]
+        cam = BaslerCamera(serial_number='40000000', backend=backend)
+        cam.connect()
+        sim_cam = cam._get_device()
+        try:
+            frames = list(cam.stream(max_frames=4))
+            self.assertEqual(4, len(frames))
+            np.testing.assert_array_equal(device.get_pattern(4), frames[3] >> 8)
+            self.assertFalse(any(np.shares_memory(frames[0], frame) for frame in frames[1:]))
+
+            # frames of a pool are overwritten pool_size frames later
+            frames = list(cam.stream(max_frames=5, pool_size=2))
+            self.assertTrue(np.shares_memory(frames[0], frames[2]))
+            self.assertFalse(np.shares_memory(frames[0], frames[1]))
+            np.testing.assert_array_equal(device.get_pattern(5), frames[0] >> 8)
+
+            # leaving the stream early stops grabbing and releases the results
+            with cam.stream(metadata=True) as stream:
+                image_numbers = [record['image_number'] for _, (frame, record) in zip(range(3), stream)]
+            self.assertEqual([1, 2, 3], image_numbers)
+            self.assertFalse(sim_cam.IsGrabbing())
+            self.assertEqual(0, sim_cam.outstanding)
+
+            with self.assertRaises(RuntimeError):
+                for _ in cam.stream():
+                    raise RuntimeError('consumer failed')
+            self.assertFalse(sim_cam.IsGrabbing())
+
+            start = time.monotonic()
+            frames = list(cam.stream(duration=0.05))
+            self.assertLess(time.monotonic() - start, 1)
+            self.assertGreater(len(frames), 0)
+
+            # the latest frame only: the frames grabbed while the consumer is busy are skipped
+            records = []
+            for frame, record in cam.stream(max_frames=30, strategy='LatestImageOnly', metadata=True):
+                records.append(record)
+                if len(records) == 3:
+                    break
+                time.sleep(0.02)
+            self.assertTrue(all(record['skipped_images'] > 0 for record in records[1:]))
+        finally:
+            cam.disconnect()
+
+        with self.assertRaises(ValueError):
+            get_grab_strategy('Newest')
+
+    def test_1_array(self):
+
+        backend = SimulatedBackend(num_devices=2, width=64, height=32, max_framerate=500)
+        array = BaslerCameraArray([{'serial_number': '40000000'}, {'serial_number': '40000001'}], backend=backend)
+        array.connect()
+        try:
+            array.set_aoi(1, (0, 0, 32, 16))
+            frames = {0: [], 1: []}
+            for cam_id, frame in array.stream(max_frames=3, pool_size=2):
+                frames[cam_id].append(frame)
+            self.assertEqual([3, 3], [len(frames[0]), len(frames[1])])
+            self.assertEqual([(32, 64), (16, 32)], [frames[0][0].shape, frames[1][0].shape])
+            self.assertTrue(np.shares_memory(frames[1][0], frames[1][2]))
+            np.testing.assert_array_equal(backend.devices[0].get_pattern(3), frames[0][2])
+
+            with array.stream(metadata=True) as stream:
+                next(stream)
+            for i in range(2):
+                self.assertFalse(array._get_camera_by_id(i).IsGrabbing())
+                self.assertEqual(0, array._get_camera_by_id(i).outstanding)
+        finally:
+            array.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main()
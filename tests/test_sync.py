@@ -0,0 +1,60 @@
+import unittest
+import numpy as np
+from basler.metadata import empty_metadata
+from basler.sync import FrameSetAssembler
+
+
+def record(image_number, timestamp=0):
+    r = empty_metadata(1)[0]
+    r['image_number'] = image_number
+    r['timestamp'] = timestamp
+    return r
+
+
+class TestFrameSetAssembler(unittest.TestCase):
+
+    def test_0_image_number(self):
+
+        assembler = FrameSetAssembler(2)
+        self.assertEqual([], assembler.add(0, 'a1', record(1)))
+        self.assertEqual([], assembler.add(0, 'a2', record(2)))
+        finished = assembler.add(1, 'b1', record(1))
+
+        self.assertEqual(1, len(finished))
+        self.assertEqual(['a1', 'b1'], finished[0].frames)
+        self.assertTrue(finished[0].complete)
+
+    def test_1_missing_frame(self):
+
+        assembler = FrameSetAssembler(2)
+        assembler.add(0, 'a1', record(1))
+        assembler.add(0, 'a2', record(2))
+        finished = assembler.add(1, 'b2', record(2))
+
+        self.assertEqual([1, 2], [frame_set.key for frame_set in finished])
+        self.assertFalse(finished[0].complete)
+        self.assertEqual(['a1', None], finished[0].frames)
+        self.assertTrue(finished[1].complete)
+
+    def test_2_timestamp_tolerance(self):
+
+        assembler = FrameSetAssembler(2, key='timestamp', tolerance=10)
+        assembler.add(0, 'a1', record(1, timestamp=1000))
+        assembler.add(0, 'a2', record(2, timestamp=2000))
+        finished = assembler.add(1, 'b1', record(7, timestamp=995))
+
+        self.assertEqual(['a1', 'b1'], finished[0].frames)
+
+    def test_3_window(self):
+
+        assembler = FrameSetAssembler(2, window=2)
+        finished = []
+        for i in range(5):
+            finished += assembler.add(0, i, record(i))
+
+        self.assertEqual([0, 1, 2], [frame_set.key for frame_set in finished])
+        self.assertEqual(2, len(assembler.flush()))
+
+
+if __name__ == '__main__':
+    unittest.main()
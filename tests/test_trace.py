@@ -0,0 +1,112 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from basler.basler_camera import BaslerCamera
+from basler.basler_camera_array import BaslerCameraArray
+from basler.sim import SimulatedBackend
+from basler.trace import CONVERT, RETRIEVE, STAGES, AcquisitionTrace
+
+
+class _GrabResult:
+
+    def __init__(self, image_number, skipped=0):
+        self.ImageNumber = image_number
+        self.NumberOfSkippedImages = skipped
+
+
+class TestAcquisitionTrace(unittest.TestCase):
+
+    def test_0_record(self):
+
+        trace = AcquisitionTrace(capacity=3)
+        trace.record(RETRIEVE, 0, 0, trace.origin + 1.0, trace.origin + 1.5, 2)
+        trace.record(CONVERT, 1, 0, trace.origin + 1.5, trace.origin + 1.75)
+        thread = threading.Thread(target=trace.record, args=(CONVERT, 1, 1, trace.origin + 2, trace.origin + 2.25),
+                                  name='worker')
+        thread.start()
+        thread.join()
+        trace.record(CONVERT, 1, 2, trace.origin + 3, trace.origin + 3.25)
+
+        self.assertEqual(3, len(trace))
+        self.assertEqual(1, trace.overflow)
+        self.assertEqual(['MainThread', 'worker'], trace.threads)
+        summary = trace.summary()
+        self.assertEqual(['retrieve', 'convert'], list(summary))
+        self.assertEqual((1, 500.0, 2), (summary['retrieve']['count'], summary['retrieve']['total'],
+                                         summary['retrieve']['max_queue_depth']))
+        self.assertEqual(2, summary['convert']['count'])
+
+        events = trace.to_chrome_trace()['traceEvents']
+        self.assertEqual({'worker'}, {e['args']['name'] for e in events if e['ph'] == 'M' and e['tid'] == 1})
+        complete = [e for e in events if e['ph'] == 'X']
+        self.assertEqual([1e6, 1.5e6, 2e6], [e['ts'] for e in complete])
+        self.assertEqual([5e5, 2.5e5, 2.5e5], [e['dur'] for e in complete])
+        self.assertEqual([2], [e['args']['depth'] for e in events if e['ph'] == 'C'])
+
+        trace.reset()
+        self.assertEqual(0, len(trace))
+
+    def test_1_counters(self):
+
+        trace = AcquisitionTrace()
+        for image_number, skipped in ((1, 0), (2, 0), (5, 0), (6, 3)):
+            trace.frame(0, _GrabResult(image_number, skipped))
+        trace.frame(1, _GrabResult(7))
+        trace.add('bytes_written', 100)
+        self.assertEqual({'frames': 5, 'dropped': 5, 'underruns': 0, 'bytes_written': 100}, trace.get_counters())
+
+    def test_2_grab_n_save(self):
+
+        backend = SimulatedBackend(num_devices=1, width=64, height=32, max_framerate=500)
+        cam = BaslerCamera(serial_number='40000000', backend=backend)
+        cam.connect()
+        trace = AcquisitionTrace()
+        cam.set_trace(trace)
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                cam.grab_n_save(10, os.path.join(directory, 'frame-%d.tiff'))
+        finally:
+            cam.disconnect()
+
+        self.assertEqual(set(STAGES), set(trace.summary()))
+        self.assertEqual({stage: 10 for stage in STAGES},
+                         {stage: stats['count'] for stage, stats in trace.summary().items()})
+        counters = trace.get_counters()
+        # the converter set by connect() writes 16-bit frames
+        self.assertEqual((10, 0, 10 * 64 * 32 * 2), (counters['frames'], counters['dropped'], counters['bytes_written']))
+        self.assertIn('frame-writer-0', trace.threads)
+
+    def test_3_save_chrome_trace(self):
+
+        backend = SimulatedBackend(num_devices=2, width=64, height=32, max_framerate=500)
+        array = BaslerCameraArray([{'serial_number': '40000000'}, {'serial_number': '40000001'}], backend=backend)
+        array.connect()
+        trace = AcquisitionTrace()
+        array.set_trace(trace)
+        try:
+            array.grab_many(5)
+        finally:
+            array.disconnect()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.json')
+            trace.save_chrome_trace(path)
+            with open(path) as f:
+                saved = json.load(f)
+
+        self.assertEqual(trace.to_chrome_trace(), saved)
+        self.assertEqual('ms', saved['displayTimeUnit'])
+        self.assertEqual({'frames': 10, 'dropped': 0, 'underruns': 0, 'bytes_written': 0},
+                         saved['otherData']['counters'])
+        complete = [e for e in saved['traceEvents'] if e['ph'] == 'X']
+        for camera in (0, 1):
+            retrieved = [e for e in complete if e['name'] == 'retrieve' and e['args']['camera'] == camera]
+            self.assertEqual(list(range(5)), [e['args']['index'] for e in retrieved])
+            self.assertTrue(all(e['dur'] >= 0 and e['ts'] >= 0 for e in retrieved))
+        self.assertEqual(['MainThread'], [e['args']['name'] for e in saved['traceEvents'] if e['ph'] == 'M'])
+
+
+if __name__ == '__main__':
+    unittest.main()
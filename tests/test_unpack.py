@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+import pypylon.pylon
+from basler.unpack import unpack_frames
+
+
+class TestUnpack(unittest.TestCase):
+
+    # reference values obtained with pylon's ImageFormatConverter
+    RAW = np.array([0xAB, 0xCD, 0xEF, 0x12, 0x34, 0x56], dtype=np.uint8)
+
+    def unpack(self, pixel_type, raw, msb_align=False):
+        out = np.empty((1, 4), dtype=np.uint16)
+        return unpack_frames(raw, pixel_type, out, msb_align).ravel().tolist()
+
+    def test_0_mono12packed(self):
+
+        self.assertEqual([0xABD, 0xEFC, 0x124, 0x563],
+                         self.unpack(pypylon.pylon.PixelType_Mono12packed, self.RAW))
+
+    def test_1_mono12p(self):
+
+        self.assertEqual([0xDAB, 0xEFC, 0x412, 0x563],
+                         self.unpack(pypylon.pylon.PixelType_Mono12p, self.RAW))
+
+    def test_2_mono10packed(self):
+
+        self.assertEqual([0x2AD, 0x3BC, 0x048, 0x15B],
+                         self.unpack(pypylon.pylon.PixelType_Mono10packed, self.RAW))
+
+    def test_3_mono10p(self):
+
+        self.assertEqual([0x1AB, 0x3F3, 0x12E, 0x0D0],
+                         self.unpack(pypylon.pylon.PixelType_Mono10p, self.RAW[:5]))
+
+    def test_4_msb_align(self):
+
+        self.assertEqual([0xABD0, 0xEFC0, 0x1240, 0x5630],
+                         self.unpack(pypylon.pylon.PixelType_Mono12packed, self.RAW, msb_align=True))
+
+    def test_5_batch(self):
+
+        raw = np.stack([self.RAW, self.RAW[::-1]])
+        out = np.empty((2, 2, 2), dtype=np.uint16)
+        unpack_frames(raw, pypylon.pylon.PixelType_Mono12packed, out)
+        for i in range(2):
+            self.assertEqual(self.unpack(pypylon.pylon.PixelType_Mono12packed, raw[i]), out[i].ravel().tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+import numpy as np
+from basler.writers import AsyncFrameWriter, RawFileWriter, WriterError
+
+
+class ListWriter:
+
+    def __init__(self, gate=None):
+        self.frames = {}
+        self._gate = gate
+
+    def write(self, index, frame):
+        if self._gate is not None:
+            self._gate.wait()
+        self.frames[index] = frame.copy()
+
+
+class TestAsyncFrameWriter(unittest.TestCase):
+
+    def test_0_write_all(self):
+
+        writer = ListWriter()
+        async_writer = AsyncFrameWriter(num_threads=3, queue_size=4)
+        for i in range(20):
+            frame = async_writer.get_buffer((2, 3), np.uint16)
+            frame[...] = i
+            async_writer.submit(writer, i, frame)
+        report = async_writer.close()
+
+        self.assertEqual({'written': 20, 'dropped': 0}, report)
+        for i in range(20):
+            self.assertTrue(np.all(writer.frames[i] == i))
+
+    def test_1_drop_oldest(self):
+
+        gate = threading.Event()
+        writer = ListWriter(gate)
+        async_writer = AsyncFrameWriter(num_threads=1, queue_size=2, overflow='drop_oldest')
+        for i in range(10):
+            async_writer.submit(writer, i, async_writer.get_buffer((1,), np.uint8))
+        gate.set()
+        report = async_writer.close()
+
+        self.assertEqual(10, report['written'] + report['dropped'])
+        self.assertGreater(report['dropped'], 0)
+        self.assertIn(9, writer.frames)
+
+    def test_2_fail(self):
+
+        gate = threading.Event()
+        async_writer = AsyncFrameWriter(num_threads=1, queue_size=1, overflow='fail')
+        with self.assertRaises(WriterError):
+            for i in range(10):
+                async_writer.submit(ListWriter(gate), i, async_writer.get_buffer((1,), np.uint8))
+        gate.set()
+        async_writer.close()
+
+    def test_3_write_error(self):
+
+        class FailingWriter:
+            def write(self, index, frame):
+                raise OSError('disk full')
+
+        for raise_errors in (True, False):
+            async_writer = AsyncFrameWriter()
+            async_writer.submit(FailingWriter(), 0, async_writer.get_buffer((1,), np.uint8))
+            if raise_errors:
+                with self.assertRaises(WriterError) as context:
+                    async_writer.close()
+                self.assertIsInstance(context.exception.__cause__, OSError)
+            else:
+                self.assertEqual({'written': 0, 'dropped': 0}, async_writer.close(raise_errors=False))
+
+
+class TestRawFileWriter(unittest.TestCase):
+
+    def test_0_write_and_load(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'frames.npy')
+            writer = RawFileWriter(path)
+            writer.open(4, (2, 3), np.uint16)
+            for i in range(4):
+                writer.write(i, np.full((2, 3), i, dtype=np.uint16))
+            writer.close()
+
+            frames = np.load(path, mmap_mode='r')
+            self.assertEqual((4, 2, 3), frames.shape)
+            self.assertEqual(np.uint16, frames.dtype)
+            self.assertTrue(np.all(frames[3] == 3))
+            with open(path + '.json') as f:
+                self.assertEqual(4, json.load(f)['frames_written'])
+            del frames
+
+
+if __name__ == '__main__':
+    unittest.main()